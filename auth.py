@@ -3,7 +3,7 @@ import os
 from typing import Optional, Dict, Any, Set
 
 import streamlit as st
-import requests
+import http_client
 
 # =========================================================
 # 👑 TOKEN DE ADMINISTRADOR (HARDCODED)
@@ -79,7 +79,7 @@ def buscar_cliente_por_token(token: str) -> Optional[Dict[str, Any]]:
     query = f"?token=eq.{token}&select=*"
     url = REST_URL_CLIENTES + query
 
-    resp = requests.get(url, headers=HEADERS_CLIENTES)
+    resp = http_client.get(url, headers=HEADERS_CLIENTES)
     if resp.status_code != 200:
         return None
 
@@ -0,0 +1,80 @@
+# bp/benchmarks/bench_force_1d.py
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark do force_1d / normalize_ohlcv / apply_all_indicators.
+
+Compara a implementação antiga (loop Python elemento a elemento) com o
+caminho rápido atual, em candles sintéticos de 500 barras × 90 tickers.
+
+Uso:
+    python -m bp.benchmarks.bench_force_1d
+"""
+
+import numpy as np
+import pandas as pd
+
+from bp.benchmarks.fixtures import make_ohlcv, timeit as _timeit
+from bp.core import indicators
+from bp.core.indicators import apply_all_indicators, force_1d
+
+N_BARS = 500
+N_TICKERS = 90
+
+
+def force_1d_legacy(series):
+    """
+    Versão original do force_1d (referência de comportamento e de tempo).
+    """
+    if isinstance(series, pd.DataFrame):
+        series = series.iloc[:, 0]
+
+    cleaned = []
+    for x in series:
+        if isinstance(x, (list, tuple, np.ndarray)):
+            cleaned.append(x[0] if len(x) > 0 else np.nan)
+        else:
+            cleaned.append(x)
+
+    cleaned = pd.to_numeric(cleaned, errors="coerce")
+    return pd.Series(cleaned, index=series.index)
+
+
+def _run_pipeline(frames):
+    for df in frames:
+        apply_all_indicators(df.copy())
+
+
+def main():
+    frames = [make_ohlcv(seed=i) for i in range(N_TICKERS)]
+
+    # --- force_1d isolado: coluna float e coluna object (listas) ---
+    col = frames[0]["Close"]
+    wrapped = pd.Series([[x] for x in col], index=col.index, dtype=object)
+
+    pd.testing.assert_series_equal(force_1d(wrapped), force_1d_legacy(wrapped))
+
+    print(f"force_1d float64   legado={_timeit(lambda: force_1d_legacy(col)) * 1e6:9.1f}µs"
+          f"  atual={_timeit(lambda: force_1d(col)) * 1e6:9.1f}µs")
+    print(f"force_1d object    legado={_timeit(lambda: force_1d_legacy(wrapped)) * 1e6:9.1f}µs"
+          f"  atual={_timeit(lambda: force_1d(wrapped)) * 1e6:9.1f}µs")
+
+    # --- pipeline completo, 90 tickers ---
+    atual = _timeit(lambda: _run_pipeline(frames), repeat=1)
+    novo_out = apply_all_indicators(frames[0].copy())
+
+    indicators.force_1d = force_1d_legacy
+    try:
+        legado = _timeit(lambda: _run_pipeline(frames), repeat=1)
+        legado_out = apply_all_indicators(frames[0].copy())
+    finally:
+        indicators.force_1d = force_1d
+
+    pd.testing.assert_frame_equal(novo_out, legado_out)
+
+    print(f"apply_all_indicators × {N_TICKERS} tickers ({N_BARS} barras): "
+          f"legado={legado:.2f}s  atual={atual:.2f}s  ({legado / atual:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
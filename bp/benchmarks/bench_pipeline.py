@@ -0,0 +1,231 @@
+# bp/benchmarks/bench_pipeline.py
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark por estágio do pipeline bp.core, com limites de regressão.
+
+Cada estágio é cronometrado isoladamente (melhor de N execuções) sobre
+universos sintéticos de 1, 90 e 500 tickers × 500 candles:
+
+    normalize_ohlcv[formato] → calc_* → apply_all_indicators →
+    evaluate_all_criteria → calculate_score → select_top_assets →
+    generate_trade_setup
+
+O tempo é comparado, em µs por ticker, com bp/benchmarks/thresholds.json.
+Estágio acima do limite → REGRESSÃO e código de saída 1 (serve para CI).
+Os limites foram calibrados em uma máquina de referência com folga de
+THRESHOLD_MARGIN×; em hardware muito diferente, recalibre com --update.
+
+Uso:
+    python -m bp.benchmarks.bench_pipeline
+    python -m bp.benchmarks.bench_pipeline --sizes 1 90 --repeat 5
+    python -m bp.benchmarks.bench_pipeline --update     # grava novos limites
+"""
+
+import argparse
+import json
+import os
+import sys
+
+from bp.benchmarks.fixtures import SHAPES, make_shape, make_universe, timeit
+from bp.bp_runner import score_frame
+from bp.core import indicators as ind
+from bp.core.criteria_engine import evaluate_all_criteria
+from bp.core.scoring import calculate_score
+from bp.core.selectors import select_top_assets
+from bp.core.trade_engine import generate_trade_setup
+
+SIZES = (1, 90, 500)
+REPEAT = 3
+THRESHOLD_MARGIN = 2.0
+THRESHOLD_FLOOR_US = 10.0     # estágios de poucos µs oscilam mais que 2× entre execuções
+
+THRESHOLDS_PATH = os.path.join(os.path.dirname(__file__), "thresholds.json")
+
+
+# ------------------------------------------------------------
+# ESTÁGIOS — cada um: (nome, preparo(frames) → entrada, execução(entrada))
+#
+# Estágios em _FRESH_INPUT alteram a entrada in-place (normalize_ohlcv
+# converte as colunas) → a entrada é refeita antes de cada repetição.
+# ------------------------------------------------------------
+def _each(fn):
+    def run(items):
+        for item in items:
+            fn(item)
+    return run
+
+
+def _calc(name, fn):
+    return (name, lambda frames: [df.copy() for df in frames.values()], _each(fn))
+
+
+def _normalize_stage(shape):
+    def prepare(frames):
+        return [make_shape(df, shape) for df in frames.values()]
+    return (f"normalize_ohlcv[{shape}]", prepare, _each(ind.normalize_ohlcv))
+
+
+def _with_mm14(frames):
+    return [ind.calc_volume_mm14(df.copy()) for df in frames.values()]
+
+
+def _indicator_frames(frames):
+    return [ind.apply_all_indicators(df.copy()) for df in frames.values()]
+
+
+def _criteria(frames):
+    return [evaluate_all_criteria(df) for df in _indicator_frames(frames)]
+
+
+def _scored(frames):
+    return {ticker: score_frame(df, keep_frame=True, ticker=ticker) for ticker, df in frames.items()}
+
+
+def _setup_inputs(frames):
+    out = []
+    for df in _indicator_frames(frames):
+        fs = calculate_score(evaluate_all_criteria(df))["fs"]
+        out.append((df, fs))
+    return out
+
+
+def _select(results):
+    select_top_assets(results)
+
+
+_FRESH_INPUT = {f"normalize_ohlcv[{shape}]" for shape in SHAPES}
+
+STAGES = (
+    [_normalize_stage(shape) for shape in SHAPES]
+    + [
+        _calc("calc_ma[9]", lambda df: ind.calc_ma(df, 9)),
+        _calc("calc_ma[21]", lambda df: ind.calc_ma(df, 21)),
+        _calc("calc_ma[50]", lambda df: ind.calc_ma(df, 50)),
+        _calc("calc_ma[200]", lambda df: ind.calc_ma(df, 200)),
+        _calc("calc_vwap", ind.calc_vwap),
+        _calc("calc_rsi", ind.calc_rsi),
+        _calc("calc_obv", ind.calc_obv),
+        _calc("calc_ad_line", ind.calc_ad_line),
+        _calc("calc_atr_pct", ind.calc_atr_pct),
+        _calc("calc_volume_mm14", ind.calc_volume_mm14),
+        ("calc_volume_deviation", _with_mm14, _each(ind.calc_volume_deviation)),
+        _calc("apply_all_indicators", ind.apply_all_indicators),
+        ("evaluate_all_criteria", _indicator_frames, _each(evaluate_all_criteria)),
+        ("calculate_score", _criteria, _each(calculate_score)),
+        ("select_top_assets", _scored, _select),
+        ("generate_trade_setup", _setup_inputs, _each(lambda item: generate_trade_setup(*item))),
+    ]
+)
+
+
+# ------------------------------------------------------------
+# EXECUÇÃO
+# ------------------------------------------------------------
+def run_benchmarks(sizes=SIZES, repeat=REPEAT, stages=None):
+    """
+    Retorna {estágio: {tamanho: µs por ticker}}.
+    """
+    wanted = None if stages is None else set(stages)
+    results = {}
+
+    for size in sizes:
+        frames = make_universe(size)
+        for name, prepare, run in STAGES:
+            if wanted is not None and name not in wanted:
+                continue
+            if name in _FRESH_INPUT:
+                seconds = timeit(run, repeat=repeat, setup=lambda: prepare(frames))
+            else:
+                arg = prepare(frames)
+                seconds = timeit(lambda: run(arg), repeat=repeat)
+            results.setdefault(name, {})[size] = seconds / size * 1e6
+
+    return results
+
+
+def load_thresholds(path=THRESHOLDS_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_thresholds(results, path=THRESHOLDS_PATH, margin=THRESHOLD_MARGIN):
+    """
+    Grava limites = medição × margin (µs por ticker, mínimo de
+    THRESHOLD_FLOOR_US), preservando os tamanhos/estágios que não foram
+    medidos agora.
+    """
+    limits = load_thresholds(path)
+    for name, by_size in results.items():
+        for size, us in by_size.items():
+            limits.setdefault(name, {})[str(size)] = round(max(us * margin, THRESHOLD_FLOOR_US), 1)
+
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(limits, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def check(results, limits):
+    """
+    Lista de (estágio, tamanho, medido, limite) acima do limite.
+    """
+    regressions = []
+    for name, by_size in results.items():
+        for size, us in by_size.items():
+            limit = limits.get(name, {}).get(str(size))
+            if limit is not None and us > limit:
+                regressions.append((name, size, us, limit))
+    return regressions
+
+
+def report(results, limits):
+    sizes = sorted({size for by_size in results.values() for size in by_size})
+    header = f"{'estágio':<32}" + "".join(f"{f'{s} tk (µs/tk)':>22}" for s in sizes)
+    print(header)
+    print("-" * len(header))
+
+    for name, by_size in results.items():
+        cells = []
+        for size in sizes:
+            us = by_size.get(size)
+            limit = limits.get(name, {}).get(str(size))
+            if us is None:
+                cells.append(f"{'—':>22}")
+                continue
+            flag = " !" if limit is not None and us > limit else "  "
+            cells.append(f"{us:>10.1f} / {limit if limit is not None else '—':>7}{flag}")
+        print(f"{name:<32}" + "".join(cells))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark por estágio do bp.core")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--stage", action="append", help="só estes estágios (repetível)")
+    parser.add_argument("--update", action="store_true", help="recalibra thresholds.json")
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+
+    results = run_benchmarks(args.sizes, args.repeat, args.stage)
+
+    if args.update:
+        save_thresholds(results)
+        print(f"[OK] Limites gravados em {THRESHOLDS_PATH} (margem {THRESHOLD_MARGIN}×).")
+
+    limits = load_thresholds()
+    report(results, limits)
+
+    regressions = check(results, limits)
+    if regressions:
+        print(f"\n[!] {len(regressions)} regressão(ões) de desempenho:")
+        for name, size, us, limit in regressions:
+            print(f"    {name} @ {size} tickers: {us:.1f} µs/ticker > limite {limit}")
+        return 1
+
+    print("\n✅ Nenhuma regressão acima dos limites.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+# bp/benchmarks/fixtures.py
+# -*- coding: utf-8 -*-
+
+"""
+Candles sintéticos determinísticos para os benchmarks do BP-Fênix.
+
+Mesma semente → mesmos candles em qualquer máquina. Além do DataFrame
+OHLCV "limpo", reproduz os formatos do yfinance contra os quais
+force_1d / normalize_ohlcv se defendem:
+
+    object      → células embrulhadas em lista ([x]) com dtype object
+    multiindex  → colunas (Price, Ticker) do yf.download de 1 ticker
+                  (df["Close"] devolve um DataFrame de 1 coluna)
+    duplicadas  → lote multi-ticker achatado (nomes de coluna repetidos,
+                  df["Close"] devolve um DataFrame 2-D)
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+
+N_BARS = 500
+
+OHLCV = ["Open", "High", "Low", "Close", "Volume"]
+
+SHAPES = ("float", "object", "multiindex", "duplicadas")
+
+
+def make_ohlcv(n_bars=N_BARS, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 50 + np.cumsum(rng.normal(0, 1, n_bars))
+    high = close + rng.uniform(0.1, 1.5, n_bars)
+    low = close - rng.uniform(0.1, 1.5, n_bars)
+    open_ = low + (high - low) * rng.uniform(0, 1, n_bars)
+    volume = rng.integers(100_000, 5_000_000, n_bars).astype(float)
+
+    return pd.DataFrame(
+        {"Open": open_, "High": high, "Low": low, "Close": close,
+         "Adj Close": close, "Volume": volume},
+        index=pd.bdate_range("2023-01-02", periods=n_bars, name="Date"),
+    )
+
+
+def make_universe(n_tickers, n_bars=N_BARS, seed=0):
+    """
+    {ticker: DataFrame OHLCV} com `n_tickers` séries independentes.
+    """
+    return {f"SYN{i:03d}.SA": make_ohlcv(n_bars, seed=seed + i) for i in range(n_tickers)}
+
+
+# ------------------------------------------------------------
+# FORMATOS DO YFINANCE
+# ------------------------------------------------------------
+def as_object_cells(df):
+    """
+    Colunas OHLCV com cada valor embrulhado em lista (dtype object).
+    """
+    out = df.copy()
+    for col in OHLCV:
+        out[col] = pd.Series([[x] for x in df[col].to_numpy()], index=df.index, dtype=object)
+    return out
+
+
+def as_multiindex(df, ticker="SYN000.SA"):
+    """
+    Colunas MultiIndex (Price, Ticker), como o yf.download de 1 ticker.
+    """
+    out = df.copy()
+    out.columns = pd.MultiIndex.from_product([df.columns, [ticker]], names=["Price", "Ticker"])
+    return out
+
+
+def as_duplicated_columns(df):
+    """
+    Lote de 2 tickers achatado em level 0 → nomes de coluna repetidos.
+    """
+    return pd.concat([df, df * 1.01], axis=1)
+
+
+def make_shape(df, shape):
+    if shape == "float":
+        return df.copy()
+    if shape == "object":
+        return as_object_cells(df)
+    if shape == "multiindex":
+        return as_multiindex(df)
+    if shape == "duplicadas":
+        return as_duplicated_columns(df)
+    raise ValueError(f"Formato desconhecido: {shape} (use {', '.join(SHAPES)})")
+
+
+# ------------------------------------------------------------
+# CRONÔMETRO
+# ------------------------------------------------------------
+def timeit(fn, repeat=3, setup=None):
+    """
+    Melhor tempo (s) de `repeat` execuções de fn(); `setup()` roda antes
+    de cada execução, fora da medição, e seu retorno é passado a fn.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        arg = setup() if setup is not None else None
+        t0 = time.perf_counter()
+        fn(arg) if setup is not None else fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
@@ -1,15 +1,241 @@
 import time
-from bp.core.data_loader import load_universe, get_ticker_data, validate_data
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
+
+from bp.core import configs
+from bp.core.data_loader import load_universe, get_universe_data, validate_data
 from bp.core.indicators import apply_all_indicators
-from bp.core.criteria_engine import evaluate_all_criteria
+from bp.core.metrics import CycleMetrics, export_cycle
+from bp.core.criteria_engine import evaluate_all_criteria, evaluate_state
+from bp.core.indicator_state import IndicatorStates
 from bp.core.scoring import calculate_score
-from bp.core.selectors import select_top_assets
+from bp.core.selectors import TopNSelector
+from bp.core.ticker_score import LazyDetails, TickerScore
+from bp.core.utils import TokenBucket, download_timing
+
+
+# ------------------------------------------------------------
+# Estágio de CPU (roda dentro do pool de processos)
+# ------------------------------------------------------------
+def score_frame(df, keep_frame=False, ticker=None):
+    """
+    indicadores → critérios → score de UM ticker.
+    Função de módulo para ser serializável pelo ProcessPoolExecutor.
+    `keep_frame=True` devolve um TickerScore compacto (com `ticker`), com
+    o df de indicadores acessível (remontado sob demanda) em
+    details["df"] — necessário para setups e para o dashboard.
+    """
+    df = apply_all_indicators(df)
+    criteria = evaluate_all_criteria(df)
+    score_info = calculate_score(criteria)
+    if keep_frame:
+        return TickerScore(score_info, df, ticker)
+    return score_info
+
+
+def score_frame_timed(df, keep_frame=False, ticker=None):
+    """
+    score_frame com o tempo de cada estágio (medido dentro do worker).
+
+    Retorna:
+        (score_info, {"indicators": s, "criteria": s, "scoring": s})
+    """
+    t0 = time.perf_counter()
+    df = apply_all_indicators(df)
+    t1 = time.perf_counter()
+    criteria = evaluate_all_criteria(df)
+    t2 = time.perf_counter()
+    score_info = calculate_score(criteria)
+    if keep_frame:
+        score_info = TickerScore(score_info, df, ticker)
+    t3 = time.perf_counter()
+    return score_info, {"indicators": t1 - t0, "criteria": t2 - t1, "scoring": t3 - t2}
+
+
+def score_state(states, ticker, df, keep_frame=False):
+    """
+    Re-score incremental de UM ticker: sincroniza o IndicatorState dele
+    com `df` (só os candles novos / o candle em formação) e avalia os
+    critérios direto do estado, sem DataFrame de indicadores.
+
+    `keep_frame=True`: details["df"] roda apply_all_indicators sob
+    demanda — só para quem o TopNSelector realmente avalia.
+
+    Retorna:
+        (score_info, {"indicators": s, "criteria": s, "scoring": s})
+    """
+    t0 = time.perf_counter()
+    state = states.sync(ticker, df)
+    t1 = time.perf_counter()
+    criteria = evaluate_state(state)
+    t2 = time.perf_counter()
+    score_info = calculate_score(criteria)
+    if keep_frame:
+        score_info["details"] = LazyDetails(criteria, lambda: apply_all_indicators(df.copy()))
+    t3 = time.perf_counter()
+    return score_info, {"indicators": t1 - t0, "criteria": t2 - t1, "scoring": t3 - t2}
+
+
+# ------------------------------------------------------------
+# Executor concorrente: download (threads) → score (processos)
+# ------------------------------------------------------------
+def run_scan(
+    tickers,
+    download_workers=None,
+    score_workers=None,
+    rate_per_sec=None,
+    chunk_size=None,
+    on_score=None,
+    on_fail=None,
+    keep_frame=False,
+    metrics=None,
+    states=None,
+):
+    """
+    Baixa e pontua `tickers` em pipeline:
+    - estágio I/O: lotes multi-ticker em um pool de threads limitado,
+      com ritmo controlado por token bucket. O yf.download em si é
+      serializado no processo (bp.core.utils.yf_download), então os
+      downloads NÃO correm em paralelo entre si: o ganho do pipeline é
+      sobrepor o download de um lote com o score dos anteriores (por isso
+      configs.DOWNLOAD_WORKERS = 1)
+    - estágio CPU: cada DataFrame válido segue para o pool de processos
+      assim que o seu lote chega (score_workers=0 → pontua inline)
+
+    O resultado independe da ordem de conclusão: o dict final segue a
+    ordem de `tickers`.
+
+    `on_score(ticker, score_info)` é chamado (na thread principal) assim
+    que cada ticker é pontuado — ex.: TopNSelector.push para emitir o top
+    parcial durante a varredura. `on_fail(ticker, motivo)` idem, para
+    cada ticker descartado (download, blindagem ou score) — pontuados +
+    falhas fecham o total. `keep_frame`: ver score_frame.
+
+    `states` (IndicatorStates, opcional): score incremental pelo estado
+    de cada ticker (ver score_state), inline — sem pool de processos.
+
+    `metrics` (bp.core.metrics.CycleMetrics, opcional) recebe a latência
+    de download (por lote, sem as esperas), a espera na fila do download
+    (lock do yfinance + token bucket, em "download_wait"), indicadores,
+    critérios e score (por ticker) e as falhas por motivo.
+
+    Retorna:
+        (results, falhas)
+        - results: {ticker: score_info}
+        - falhas:  {ticker: motivo}
+    """
+    download_workers = download_workers or configs.DOWNLOAD_WORKERS
+    score_workers = configs.SCORE_WORKERS if score_workers is None else score_workers
+    if states is not None:
+        score_workers = 0            # O(candles novos) por ticker: não compensa o pool
+    rate_per_sec = rate_per_sec or configs.DOWNLOAD_RATE_PER_SEC
+    chunk_size = chunk_size or configs.DOWNLOAD_CHUNK_SIZE
+
+    metrics = CycleMetrics() if metrics is None else metrics
+
+    tickers = list(dict.fromkeys(tickers))
+    bucket = TokenBucket(rate_per_sec, max(configs.DOWNLOAD_BURST, chunk_size))
+
+    chunks = [tickers[i:i + chunk_size] for i in range(0, len(tickers), chunk_size)]
+
+    scores = {}
+    falhas = {}
+
+    # spawn: o fork (padrão no Linux) copiaria o processo com as threads de
+    # download já rodando e locks (yfinance, cache) possivelmente presos
+    cpu_pool = (
+        ProcessPoolExecutor(max_workers=score_workers, mp_context=get_context("spawn"))
+        if score_workers > 0 else None
+    )
+    cpu_futures = {}
+
+    def _fail(ticker, motivo):
+        falhas[ticker] = motivo
+        if on_fail is not None:
+            on_fail(ticker, motivo)
+
+    def _fetch(chunk):
+        # "download" = trabalho do lote (rede, cache, blindagem);
+        # "download_wait" = fila no lock do yfinance + token bucket
+        t0 = time.perf_counter()
+        with download_timing() as timing:
+            def _throttle(n):
+                t = time.perf_counter()
+                bucket.acquire(n)
+                timing["wait"] += time.perf_counter() - t
+
+            try:
+                return get_universe_data(chunk, chunk_size=chunk_size, throttle=_throttle)
+            finally:
+                elapsed = time.perf_counter() - t0
+                metrics.observe("download", elapsed - timing["wait"], len(chunk))
+                metrics.observe("download_wait", timing["wait"], len(chunk))
+
+    def _collect(ticker, fut):
+        try:
+            scores[ticker], timings = fut.result()
+            metrics.observe_many(timings)
+        except Exception as e:
+            _fail(ticker, f"erro_score: {e}")
+            return
+        if on_score is not None:
+            on_score(ticker, scores[ticker])
+
+    def _drain_done():
+        for ticker in [t for t, f in cpu_futures.items() if f.done()]:
+            _collect(ticker, cpu_futures.pop(ticker))
+
+    try:
+        with ThreadPoolExecutor(max_workers=download_workers) as io_pool:
+            io_futures = [io_pool.submit(_fetch, chunk) for chunk in chunks]
+
+            for fut in as_completed(io_futures):
+                dados, falhas_lote = fut.result()
+                for ticker, motivo in falhas_lote.items():
+                    _fail(ticker, motivo)
+
+                for ticker, df in dados.items():
+                    if not validate_data(df):
+                        _fail(ticker, "dados_invalidos")
+                        continue
+
+                    if cpu_pool is None:
+                        try:
+                            if states is not None:
+                                scores[ticker], timings = score_state(states, ticker, df, keep_frame)
+                            else:
+                                scores[ticker], timings = score_frame_timed(df, keep_frame, ticker)
+                            metrics.observe_many(timings)
+                        except Exception as e:
+                            _fail(ticker, f"erro_score: {e}")
+                            continue
+                        if on_score is not None:
+                            on_score(ticker, scores[ticker])
+                    else:
+                        cpu_futures[ticker] = cpu_pool.submit(score_frame_timed, df, keep_frame, ticker)
+
+                _drain_done()
+
+        pending = {fut: ticker for ticker, fut in cpu_futures.items()}
+        for fut in as_completed(pending):
+            _collect(pending[fut], fut)
+
+    finally:
+        if cpu_pool is not None:
+            cpu_pool.shutdown()
+
+    # ordem determinística = ordem do universo
+    results = {t: scores[t] for t in tickers if t in scores}
+    falhas = {t: falhas[t] for t in tickers if t in falhas}
+    metrics.count_failures(falhas)
+
+    return results, falhas
 
 
 # ------------------------------------------------------------
 # Função principal do BP-Fênix (um único ciclo)
 # ------------------------------------------------------------
-def run_cycle():
+def run_cycle(download_workers=None, score_workers=None, rate_per_sec=None, states=None):
     """
     Executa um ciclo completo do BP-Fênix:
     - carrega tickers (universo IBOV)
@@ -18,52 +244,92 @@ def run_cycle():
     - avalia critérios
     - calcula scores
     - seleciona top ativos
-    """
 
-    results = {}
+    Download e score rodam em paralelo (ver run_scan); a concorrência
+    padrão vem de bp.core.configs.
+
+    Com `states` (IndicatorStates) o score é incremental: cada ticker só
+    aplica os candles novos ao seu estado (ver run_intraday_cycle).
+
+    Tempos por estágio, falhas por motivo e totais do ciclo vão para
+    data/metrics/ (JSON + Prometheus, ver bp.core.metrics).
+    """
+    metrics = CycleMetrics("IBOV")
 
     # 1 — carregar universo de ativos do IBOV
-    tickers = load_universe()
+    with metrics.stage("universe", tickers=0):
+        tickers = load_universe()
     print(f"\n🟦 INICIANDO CICLO BP-FÊNIX")
     print(f"Carregando {len(tickers)} tickers do universo...\n")
 
-    for ticker in tickers:
-        print(f"🔍 Processando {ticker}...")
-
-        # 2 — baixar dados
-        df = get_ticker_data(ticker)
-
-        if not validate_data(df):
-            print(f"⚠️ Dados inválidos para {ticker}. Pulando...\n")
-            continue
-
-        # 3 — aplicar indicadores
-        df = apply_all_indicators(df)
+    # 2…6 — baixar dados, indicadores, critérios e score; o top é
+    # montado em streaming conforme os scores chegam
+    position = {t: i for i, t in enumerate(tickers)}
+    selector = TopNSelector()
 
-        # 4 — avaliar critérios
-        criteria = evaluate_all_criteria(df)
+    @metrics.timed("selection")
+    def _select(ticker, info):
+        selector.push(ticker, info, position[ticker])
 
-        # 5 — calcular score
-        score = calculate_score(criteria)
+    with metrics.stage("scan", tickers=0):
+        results, falhas = run_scan(
+            tickers,
+            download_workers=download_workers,
+            score_workers=score_workers,
+            rate_per_sec=rate_per_sec,
+            on_score=_select,
+            keep_frame=True,          # o setup do top precisa do df de indicadores
+            metrics=metrics,
+            states=states,
+        )
 
-        # armazenar
-        results[ticker] = score
-
-        print(f"➡️ Score {ticker}: {score['score']}")
-        print("-" * 50)
+    for ticker in tickers:
+        if ticker in results:
+            print(f"➡️ Score {ticker}: {results[ticker]['score']}")
+        elif ticker in falhas:
+            print(f"⚠️ Dados inválidos para {ticker} ({falhas[ticker]}). Pulando...")
 
-        time.sleep(0.2)
+    print("-" * 50)
 
-    # 6 — selecionar top ativos
-    top_assets = select_top_assets(results)
+    # 6 — top ativos (seq = posição no universo → desempate determinístico)
+    top_assets = selector.snapshot()
 
     print("\n🟩 ATIVOS SELECIONADOS PELO BP-FÊNIX:")
     for asset in top_assets:
         print(f"  • {asset['ticker']} | Score {asset['score']}")
 
+    metrics.finish(
+        tickers=len(tickers),
+        scored=len(results),
+        failed=len(falhas),
+        selected=len(top_assets),
+    )
+    export_cycle(metrics)
+
+    print(f"\n{metrics.summary()}")
     print("\nCiclo completo.\n")
 
     return {
         "raw_results": results,
-        "top_assets": top_assets
+        "top_assets": top_assets,
+        "metrics": metrics.to_dict(),
     }
+
+
+# ------------------------------------------------------------
+# Ciclo intradiário do scheduler (score incremental)
+# ------------------------------------------------------------
+# estados dos tickers entre os ciclos do processo do scheduler
+INTRADAY_STATES = IndicatorStates()
+
+
+def run_intraday_cycle(states=INTRADAY_STATES, **kwargs):
+    """
+    Ciclo usado pelo scheduler a cada 15 minutos: o 1º ciclo do dia
+    semeia o IndicatorState de cada ticker; os seguintes só refazem o
+    candle em formação (O(1) por ticker) em vez do pipeline inteiro.
+
+    Scores iguais aos de run_cycle dentro da tolerância de
+    bp.core.indicator_state (RTOL nas médias de janela).
+    """
+    return run_cycle(states=states, **kwargs)
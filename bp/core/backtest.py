@@ -0,0 +1,437 @@
+# bp/core/backtest.py
+# -*- coding: utf-8 -*-
+
+"""
+Backtest walk-forward do BP-Fênix (critérios + FS + setups MODELO C).
+
+Reproduz, para CADA pregão do histórico salvo no candle store, o que o
+ciclo ao vivo teria visto naquele dia — sem nenhum loop por ticker/dia:
+
+    1. indicadores do universo inteiro (universe_engine, uma passada)
+    2. critérios de todos os (dia, ticker) em UMA chamada de
+       evaluate_universe (janelas de 6 candles empilhadas)
+    3. score / FS vetorizados; filtro score_min e top N por dia
+    4. setup MODELO C vetorizado (generate_trade_setups_batch), com o
+       swing procurado nas mesmas 20 linhas que o df ao vivo tem
+    5. simulação das ordens nos candles seguintes:
+         - entrada: ordem stop no preço de entrada, válida ENTRY_WINDOW
+           candles (gap acima → preenche na abertura)
+         - saída: stop, alvo ou MAX_HOLD_BARS (fechamento); stop e alvo
+           no mesmo candle → conta o stop (conservador)
+
+Cada sinal é um trade independente (sem gestão de carteira).
+Relatório por faixa de FS: taxa de acerto, expectativa (em R) e
+distribuição do R/R planejado e realizado.
+
+Uso:
+    python -m bp.core.backtest [IBOV|SMLL|BDR]
+"""
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from bp.core import candle_store
+from bp.core.criteria_engine import evaluate_universe, MOMENTUM_MIN_ROWS
+from bp.core.indicators import TAIL_ROWS
+from bp.core.scoring import calculate_universe_score
+from bp.core.trade_engine import (
+    MAX_LOOKBACK_SWINGS,
+    swing_mask,
+    generate_trade_setups_batch,
+)
+from bp.core.universe_engine import (
+    stack_universe,
+    compute_universe_indicators,
+    _finite_or_nan,
+)
+
+ENTRY_WINDOW = 5          # candles para a ordem de entrada ser executada
+MAX_HOLD_BARS = 20        # saída no fechamento após N candles posicionado
+SCORE_MIN = 3             # mesmo filtro de select_top_assets
+TOP_N = 5                 # ativos selecionados por dia (None = todos)
+
+FS_BUCKETS = (0.0, 2.0, 2.5, 3.0, 3.5, 4.0, 4.5, 6.0)   # FS vai de 0.6 a 6.0
+
+# colunas consumidas por evaluate_universe
+CRITERIA_COLUMNS = [
+    "Close", "Volume",
+    "MA9", "MA21", "MA200", "RSI14", "OBV", "AD",
+    "ATR_pct", "Volume_MM14", "VWAP",
+]
+
+
+# ------------------------------------------------------------
+# 1. HISTÓRICO (somente disco — nenhum download)
+# ------------------------------------------------------------
+def load_history(tickers, interval="1d"):
+    """
+    {ticker: DataFrame OHLCV} a partir do candle store local.
+    Tickers sem cache são ignorados.
+    """
+    frames = {}
+    for ticker in tickers:
+        df, _ = candle_store.load_candles(ticker, interval)
+        if df is not None:
+            frames[ticker] = df
+    return frames
+
+
+# ------------------------------------------------------------
+# 2. SINAIS — critérios e FS de todos os (dia, ticker)
+# ------------------------------------------------------------
+def _date_matrix(block):
+    """
+    Datas (int64 ns) alinhadas à direita como as matrizes do bloco.
+    """
+    n_bars = block.n_bars
+    dates = np.full((n_bars, len(block.tickers)), np.iinfo(np.int64).min)
+    for j, ticker in enumerate(block.tickers):
+        index = pd.DatetimeIndex(block.frames[ticker].index)
+        if index.tz is not None:
+            index = index.tz_localize(None)
+        dates[n_bars - len(index):, j] = index.as_unit("ns").asi8
+    return dates
+
+
+def history_windows(block):
+    """
+    Janelas de 6 candles de todos os (dia, ticker), no formato colunar de
+    evaluate_universe.
+
+    Retorna:
+        (arrays, counts, valid, rows) — itens achatados de tamanho
+        (n_bars - 5) * n_tickers; `rows` = linha do bloco de cada item.
+    """
+    a = block.arrays
+    n_bars, n_tickers = a["Close"].shape
+    w = MOMENTUM_MIN_ROWS
+
+    # janelas de 6 candles: (n_bars - 5, n_tickers, 6) → (6, M)
+    arrays = {}
+    for col in CRITERIA_COLUMNS:
+        win = sliding_window_view(_finite_or_nan(a[col]), w, axis=0)
+        arrays[col] = np.moveaxis(win, -1, 0).reshape(w, -1)
+
+    valid = ~np.isnan(a["Close"])
+    counts = np.minimum(np.cumsum(valid, axis=0), w)[w - 1:].reshape(-1)
+
+    rows = np.repeat(np.arange(w - 1, n_bars), n_tickers)
+    return arrays, counts, valid[w - 1:].reshape(-1), rows
+
+
+def evaluate_history(block, **criteria_params):
+    """
+    Critérios + score de cada (dia, ticker) do bloco, como o ciclo ao
+    vivo os veria naquele dia (`criteria_params` → evaluate_universe).
+
+    Retorna:
+        (universe_scores, rows) — ver history_windows.
+    """
+    arrays, counts, valid, rows = history_windows(block)
+
+    universe = evaluate_universe(arrays, counts, details=False, **criteria_params)
+    scores = calculate_universe_score(universe)
+    scores["valid"] = valid
+
+    return scores, rows
+
+
+def select_signals(block, scores, rows, score_min=SCORE_MIN, top_n=TOP_N, dates=None):
+    """
+    Filtra score_min e, por data, mantém os top_n pelo ranking oficial
+    (FS → momentum → tendência → volume; empate → ordem do universo).
+    `dates`: matriz de _date_matrix já calculada (opcional).
+    """
+    n_tickers = len(block.tickers)
+    cols = np.tile(np.arange(n_tickers), len(rows) // max(n_tickers, 1))
+
+    keep = scores["valid"] & (scores["score"] >= score_min)
+    idx = np.flatnonzero(keep)
+
+    dates = _date_matrix(block) if dates is None else dates
+    dates = dates[rows[idx], cols[idx]]
+
+    if top_n is not None:
+        order = np.lexsort((
+            cols[idx],
+            -scores["volume_norm"][idx],
+            -scores["tendencia_norm"][idx],
+            -scores["momentum_norm"][idx],
+            -scores["fs"][idx],
+            dates,
+        ))
+        idx, dates = idx[order], dates[order]
+
+        # posição dentro do dia (0, 1, 2…) → só as top_n primeiras
+        new_day = np.r_[True, dates[1:] != dates[:-1]]
+        day_start = np.maximum.accumulate(np.where(new_day, np.arange(len(idx)), 0))
+        rank_in_day = np.arange(len(idx)) - day_start
+        idx, dates = idx[rank_in_day < top_n], dates[rank_in_day < top_n]
+
+    return {
+        "row": rows[idx],
+        "col": cols[idx],
+        "date": dates.astype("datetime64[ns]"),
+        "fs": scores["fs"][idx],
+        "score": scores["score"][idx],
+    }
+
+
+# ------------------------------------------------------------
+# 3. SETUPS — MODELO C vetorizado
+# ------------------------------------------------------------
+def _swing_at_signal(values, mask, rows, cols, limit, kind, max_lookback=MAX_LOOKBACK_SWINGS):
+    """
+    Último swing visível no df tail(TAIL_ROWS) do dia do sinal
+    (mesma janela de _find_last_swing_*: posições 2 … n-3 do tail,
+    no máximo `max_lookback` candles atrás).
+    """
+    found = np.full(len(rows), np.nan)
+    for k in range(2, min(TAIL_ROWS - 3, max_lookback) + 1):   # k = distância ao candle do sinal
+        r = rows - k
+        ok = (r >= 0) & np.isnan(found)
+        r = np.where(ok, r, 0)
+        price = values[r, cols]
+        with np.errstate(invalid="ignore"):
+            hit = ok & mask[r, cols] & ((price >= limit) if kind == "high" else (price <= limit))
+        found[hit] = price[hit]
+    return found
+
+
+def swing_masks(block):
+    """
+    Máscaras de swing high / low do bloco inteiro (reutilizáveis entre
+    execuções com parâmetros diferentes).
+    """
+    a = block.arrays
+    return swing_mask(a["High"], "high", axis=0), swing_mask(a["Low"], "low", axis=0)
+
+
+def build_setups(block, signals, max_lookback=MAX_LOOKBACK_SWINGS, masks=None, **setup_params):
+    """
+    Setup MODELO C de cada sinal (entrada, stop, alvo, R/R).
+    `setup_params` → generate_trade_setups_batch (rr_max, multiplicadores).
+    """
+    a = block.arrays
+    r, c = signals["row"], signals["col"]
+    close = a["Close"][r, c]
+
+    high_mask, low_mask = swing_masks(block) if masks is None else masks
+    swing_high = _swing_at_signal(a["High"], high_mask, r, c, close, "high", max_lookback)
+    swing_low = _swing_at_signal(a["Low"], low_mask, r, c, close, "low", max_lookback)
+
+    # tendencia_norm / momentum_norm não existem no df ao vivo → padrão 0.5
+    atr = _finite_or_nan(a["ATR"][r, c])
+    return generate_trade_setups_batch(
+        close, a["High"][r, c], a["Low"][r, c], atr,
+        fs=signals["fs"], swing_high=swing_high, swing_low=swing_low,
+        **setup_params,
+    )
+
+
+# ------------------------------------------------------------
+# 4. SIMULAÇÃO DAS ORDENS
+# ------------------------------------------------------------
+def _forward(mat, rows, cols, horizon):
+    """
+    (n_sinais, horizon) com os candles t+1 … t+horizon de cada sinal
+    (NaN depois do fim do histórico).
+    """
+    r = rows[:, None] + np.arange(1, horizon + 1)[None, :]
+    ok = r < mat.shape[0]
+    out = mat[np.where(ok, r, 0), cols[:, None]]
+    return np.where(ok, out, np.nan)
+
+
+def _first(mask):
+    """
+    Índice da primeira coluna True de cada linha (-1 se nenhuma).
+    """
+    any_ = mask.any(axis=1)
+    return np.where(any_, mask.argmax(axis=1), -1)
+
+
+def simulate(block, signals, setups, entry_window=ENTRY_WINDOW, max_hold=MAX_HOLD_BARS):
+    """
+    Executa entrada / stop / alvo nos candles seguintes a cada sinal.
+
+    Retorna DataFrame com um trade por sinal: status ("alvo", "stop",
+    "tempo", "sem_entrada", "aberto"), preços e R realizado.
+    """
+    a = block.arrays
+    r, c = signals["row"], signals["col"]
+    horizon = entry_window + max_hold
+
+    o = _forward(a["Open"], r, c, horizon)
+    h = _forward(a["High"], r, c, horizon)
+    l = _forward(a["Low"], r, c, horizon)
+    cl = _forward(a["Close"], r, c, horizon)
+
+    long_ = setups["operacao"] == "LONG"
+    sign = np.where(long_, 1.0, -1.0)[:, None]
+    entry = setups["entrada"][:, None]
+    stop = setups["stop"][:, None]
+    target = setups["alvo"][:, None]
+    steps = np.arange(horizon)[None, :]
+
+    with np.errstate(invalid="ignore"):
+        # --- entrada (ordem stop) ---
+        touched = np.where(long_[:, None], h >= entry, l <= entry)
+        touched[:, entry_window:] = False
+        fill_at = _first(touched & setups["valido"][:, None])
+        filled = fill_at >= 0
+
+        fill_open = o[np.arange(len(r)), np.maximum(fill_at, 0)]
+        gap = (sign[:, 0] * (fill_open - entry[:, 0])) > 0
+        fill_price = np.where(gap, fill_open, entry[:, 0])
+
+        # --- saída: do candle de entrada até max_hold candles ---
+        live = (steps >= fill_at[:, None]) & (steps < fill_at[:, None] + max_hold) & filled[:, None]
+        stop_hit = live & (sign * (stop - np.where(long_[:, None], l, h)) >= 0)
+        target_hit = live & (sign * (np.where(long_[:, None], h, l) - target) >= 0)
+
+        first_stop = _first(stop_hit)
+        first_target = _first(target_hit)
+        big = horizon + 1
+        s_idx = np.where(first_stop >= 0, first_stop, big)
+        t_idx = np.where(first_target >= 0, first_target, big)
+
+        by_stop = filled & (s_idx <= t_idx) & (s_idx < big)
+        by_target = filled & (t_idx < s_idx)
+        exit_at = np.where(by_stop, s_idx, np.where(by_target, t_idx, fill_at + max_hold - 1))
+        exit_at = np.clip(exit_at, 0, horizon - 1)
+
+        rows_ = np.arange(len(r))
+        exit_open = o[rows_, exit_at]
+        after_fill = exit_at > fill_at                 # gap só conta após o candle de entrada
+
+        stop_px = np.where(after_fill & (sign[:, 0] * (stop[:, 0] - exit_open) > 0), exit_open, stop[:, 0])
+        target_px = np.where(after_fill & (sign[:, 0] * (exit_open - target[:, 0]) > 0), exit_open, target[:, 0])
+        time_px = cl[rows_, exit_at]
+
+        exit_price = np.where(by_stop, stop_px, np.where(by_target, target_px, time_px))
+
+        timed_out = filled & ~by_stop & ~by_target
+        still_open = timed_out & np.isnan(time_px)
+
+        risk = np.abs(fill_price - stop[:, 0])
+        r_mult = sign[:, 0] * (exit_price - fill_price) / np.where(risk > 0, risk, np.nan)
+
+    status = np.full(len(r), "sem_entrada", dtype=object)
+    status[by_target] = "alvo"
+    status[by_stop] = "stop"
+    status[timed_out] = "tempo"
+    status[still_open] = "aberto"
+    status[~setups["valido"]] = "sem_setup"
+
+    closed = filled & ~still_open
+
+    return pd.DataFrame({
+        "date": signals["date"],
+        "ticker": np.asarray(block.tickers, dtype=object)[c],
+        "score": signals["score"],
+        "fs": signals["fs"],
+        "operacao": setups["operacao"],
+        "entrada": setups["entrada"],
+        "stop": setups["stop"],
+        "alvo": setups["alvo"],
+        "rr_planejado": setups["rr"],
+        "status": status,
+        "preco_entrada": np.where(filled, fill_price, np.nan),
+        "preco_saida": np.where(closed, exit_price, np.nan),
+        "barras": np.where(closed, exit_at - fill_at + 1, 0),
+        "r": np.where(closed, r_mult, np.nan),
+    })
+
+
+# ------------------------------------------------------------
+# 5. RELATÓRIO POR FAIXA DE FS
+# ------------------------------------------------------------
+def summarize(trades, buckets=FS_BUCKETS):
+    """
+    Por faixa de FS: sinais, trades fechados, taxa de acerto (R > 0),
+    expectativa (R médio) e quartis do R/R planejado e do R realizado.
+    """
+    if trades.empty:
+        return pd.DataFrame()
+
+    faixa = pd.cut(trades["fs"], bins=list(buckets), include_lowest=True)
+    closed = trades["r"].notna()
+
+    rows = []
+    for label, group in trades.groupby(faixa, observed=True):
+        done = group[closed.loc[group.index]]
+        rr = group["rr_planejado"].dropna()
+        rows.append({
+            "faixa_fs": str(label),
+            "sinais": len(group),
+            "trades": len(done),
+            "acerto_%": 100 * (done["r"] > 0).mean() if len(done) else np.nan,
+            "alvo_%": 100 * (done["status"] == "alvo").mean() if len(done) else np.nan,
+            "expectativa_R": done["r"].mean() if len(done) else np.nan,
+            "R_p25": done["r"].quantile(0.25) if len(done) else np.nan,
+            "R_p50": done["r"].median() if len(done) else np.nan,
+            "R_p75": done["r"].quantile(0.75) if len(done) else np.nan,
+            "rr_plan_p25": rr.quantile(0.25) if len(rr) else np.nan,
+            "rr_plan_p50": rr.median() if len(rr) else np.nan,
+            "rr_plan_p75": rr.quantile(0.75) if len(rr) else np.nan,
+        })
+
+    return pd.DataFrame(rows)
+
+
+# ------------------------------------------------------------
+# API PRINCIPAL
+# ------------------------------------------------------------
+def run_backtest(
+    frames,
+    score_min=SCORE_MIN,
+    top_n=TOP_N,
+    entry_window=ENTRY_WINDOW,
+    max_hold=MAX_HOLD_BARS,
+    buckets=FS_BUCKETS,
+):
+    """
+    Backtest completo sobre {ticker: DataFrame OHLCV}.
+
+    Retorna:
+        (trades, resumo) — um trade por sinal e o relatório por faixa de FS.
+    """
+    block = compute_universe_indicators(stack_universe(frames))
+    if not block.tickers:
+        return pd.DataFrame(), pd.DataFrame()
+
+    scores, rows = evaluate_history(block)
+    signals = select_signals(block, scores, rows, score_min, top_n)
+    setups = build_setups(block, signals)
+    trades = simulate(block, signals, setups, entry_window, max_hold)
+
+    return trades, summarize(trades, buckets)
+
+
+def main(argv=None):
+    from bp.core.universe_store import get_universe
+
+    argv = sys.argv[1:] if argv is None else argv
+    universe = argv[0] if argv else "IBOV"
+
+    t0 = time.perf_counter()
+    frames = load_history(get_universe(universe))
+    if not frames:
+        print(f"[!] Nenhum candle em cache para {universe} — rode um ciclo antes.")
+        return
+
+    trades, resumo = run_backtest(frames)
+    elapsed = time.perf_counter() - t0
+
+    print(f"\n🟦 BACKTEST BP-FÊNIX — {universe}: {len(frames)} tickers, "
+          f"{len(trades)} sinais em {elapsed:.1f}s\n")
+    print(resumo.to_string(index=False, float_format=lambda x: f"{x:.2f}"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+# bp/core/candle_store.py
+# -*- coding: utf-8 -*-
+
+"""
+Armazém local de candles (OHLCV) do BP-Fênix.
+
+Um arquivo Parquet por ticker/intervalo em `data/candles/`, com um
+sidecar JSON de metadados (período coberto + horário do último fetch).
+
+Política de frescor (`plan_fetch`):
+    - "hit"   → último fetch há menos de CACHE_TTL_SECONDS: serve do disco
+    - "topup" → baixa só a cauda desde o último candle salvo e mescla
+    - "full"  → sem cache, cache corrompido, período maior que o salvo,
+                lacuna maior que TOPUP_MAX_GAP_DAYS ou refresh completo
+                vencido (FULL_REFRESH_DAYS, p/ pegar ajustes da fonte)
+
+O último candle salvo é sempre rebaixado no top-up, pois o candle do dia
+ainda está em formação durante o pregão.
+"""
+
+import json
+import os
+import threading
+import time
+
+import pandas as pd
+
+from bp.core.utils import atomic_write
+
+CANDLE_DIR = os.path.join("data", "candles")
+
+CACHE_TTL_SECONDS = 10 * 60      # < ciclo do scheduler (15 min)
+TOPUP_MAX_GAP_DAYS = 30          # lacuna maior → refetch completo
+FULL_REFRESH_DAYS = 7            # refetch completo periódico
+
+REQUIRED_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+# Contadores do processo (expostos via get_cache_stats); atualizados
+# pelas threads de download do run_scan → sempre via count_stat
+CACHE_STATS = {"hits": 0, "topups": 0, "misses": 0, "corrupted": 0}
+_STATS_LOCK = threading.Lock()
+
+
+# ------------------------------------------------------------
+# CONTADORES
+# ------------------------------------------------------------
+def get_cache_stats():
+    """
+    Retorna uma cópia dos contadores de cache do processo.
+    """
+    with _STATS_LOCK:
+        return dict(CACHE_STATS)
+
+
+def reset_cache_stats():
+    with _STATS_LOCK:
+        for k in CACHE_STATS:
+            CACHE_STATS[k] = 0
+
+
+def count_stat(name, n=1):
+    with _STATS_LOCK:
+        CACHE_STATS[name] += n
+
+
+# ------------------------------------------------------------
+# PERÍODOS DO YFINANCE
+# ------------------------------------------------------------
+def period_start(period, now=None):
+    """
+    Converte um período do yfinance ("5d", "6mo", "2y", "ytd", "max")
+    na data inicial equivalente. "max" → None (sem corte).
+    """
+    now = pd.Timestamp.now().normalize() if now is None else pd.Timestamp(now)
+
+    if period == "max":
+        return None
+    if period == "ytd":
+        return pd.Timestamp(year=now.year, month=1, day=1)
+
+    for suffix, unit in (("mo", "months"), ("y", "years"), ("d", "days")):
+        if period.endswith(suffix):
+            n = int(period[: -len(suffix)])
+            return now - pd.DateOffset(**{unit: n})
+
+    raise ValueError(f"Período inválido: {period}")
+
+
+def _covers(stored_period, period):
+    """
+    True se o período salvo cobre o período pedido.
+    """
+    if stored_period == period or stored_period == "max":
+        return True
+    if period == "max":
+        return False
+    try:
+        return period_start(stored_period) <= period_start(period)
+    except ValueError:
+        return False
+
+
+def trim_to_period(df, period):
+    """
+    Corta o histórico salvo para o mesmo recorte que o yfinance
+    devolveria para `period`.
+    """
+    start = period_start(period)
+    if start is None or df is None or df.empty:
+        return df
+
+    index = df.index
+    if getattr(index, "tz", None) is not None:
+        start = start.tz_localize(index.tz)
+
+    return df[index >= start]
+
+
+# ------------------------------------------------------------
+# LEITURA / ESCRITA
+# ------------------------------------------------------------
+def _paths(ticker, interval):
+    base = os.path.join(CANDLE_DIR, f"{ticker.replace('/', '_')}_{interval}")
+    return base + ".parquet", base + ".json"
+
+
+def _discard(ticker, interval):
+    for path in _paths(ticker, interval):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def load_candles(ticker, interval="1d"):
+    """
+    Lê os candles salvos de um ticker.
+
+    Retorna:
+        (DataFrame, meta) ou (None, None) se não houver cache válido.
+        Arquivos corrompidos são descartados (→ refetch completo).
+    """
+    data_path, meta_path = _paths(ticker, interval)
+
+    if not os.path.exists(data_path) or not os.path.exists(meta_path):
+        return None, None
+
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+
+        df = pd.read_parquet(data_path)
+
+        if df.empty or any(col not in df.columns for col in REQUIRED_COLUMNS):
+            raise ValueError("colunas OHLCV ausentes")
+        if not df.index.is_monotonic_increasing:
+            raise ValueError("índice fora de ordem")
+
+        return df, meta
+
+    except Exception as e:
+        print(f"[!] Cache corrompido para {ticker} ({e}) — refazendo download completo.")
+        count_stat("corrupted")
+        _discard(ticker, interval)
+        return None, None
+
+
+def save_candles(ticker, interval, df, period, full=False):
+    """
+    Grava candles + metadados de forma atômica (arquivo temporário + rename).
+    `full=True` marca o instante do último refetch completo.
+    """
+    data_path, meta_path = _paths(ticker, interval)
+
+    try:
+        os.makedirs(CANDLE_DIR, exist_ok=True)
+
+        old_meta = None
+        if not full and os.path.exists(meta_path):
+            with open(meta_path, "r", encoding="utf-8") as f:
+                old_meta = json.load(f)
+
+        now = time.time()
+        meta = {
+            "ticker": ticker,
+            "interval": interval,
+            "period": period,
+            "fetched_at": now,
+            "full_fetched_at": now if full or not old_meta else old_meta.get("full_fetched_at", now),
+            "last_bar": str(df.index[-1]),
+            "rows": len(df),
+        }
+
+        # temporário único por escrita: dois processos (worker do
+        # dashboard + scheduler) podem gravar o mesmo ticker ao mesmo tempo
+        atomic_write(data_path, lambda f: df.to_parquet(f))
+        atomic_write(meta_path, lambda f: f.write(json.dumps(meta)), text=True)
+
+    except Exception as e:
+        print(f"[!] Falha ao gravar cache de {ticker}: {e}")
+
+
+def merge_candles(stored, fresh):
+    """
+    Mescla a cauda recém-baixada no histórico salvo.
+    Em datas repetidas vale o candle novo nas colunas que a cauda traz;
+    as demais (ex.: "Adj Close") mantêm o valor salvo.
+    """
+    if fresh is None or fresh.empty:
+        return stored
+
+    shared = [c for c in stored.columns if c in fresh.columns]
+    missing = [c for c in stored.columns if c not in fresh.columns]
+
+    fresh = fresh[shared].reindex(columns=stored.columns)
+    if missing:
+        repeated = fresh.index.isin(stored.index)
+        fresh.loc[repeated, missing] = stored.loc[fresh.index[repeated], missing].to_numpy()
+
+    merged = pd.concat([stored[~stored.index.isin(fresh.index)], fresh])
+    return merged.sort_index()
+
+
+def apply_topup(ticker, interval, period, stored, tail, clean):
+    """
+    Mescla a cauda no histórico salvo e repassa o resultado pela MESMA
+    blindagem do download completo (`clean`) antes de gravar — candle
+    ruim da cauda não fica no cache até o próximo refetch completo.
+
+    Retorna o DataFrame recortado em `period`, ou None se o histórico
+    mesclado for rejeitado (→ refetch completo).
+    """
+    merged, motivo = clean(ticker, merge_candles(stored, tail))
+    if merged is None:
+        print(f"[!] Top-up rejeitado para {ticker} ({motivo}) — refazendo download completo.")
+        return None
+
+    count_stat("topups")
+    save_candles(ticker, interval, merged, period)
+    return trim_to_period(merged, period)
+
+
+# ------------------------------------------------------------
+# POLÍTICA DE FRESCOR
+# ------------------------------------------------------------
+def plan_fetch(ticker, period="2y", interval="1d", now=None):
+    """
+    Decide o que fazer com o cache de um ticker.
+
+    Retorna:
+        (acao, df_salvo, inicio_topup)
+        acao ∈ {"hit", "topup", "full"}
+    """
+    now = time.time() if now is None else now
+
+    stored, meta = load_candles(ticker, interval)
+    if stored is None:
+        return "full", None, None
+
+    if not _covers(meta.get("period", ""), period):
+        return "full", None, None
+
+    if now - meta.get("fetched_at", 0) < CACHE_TTL_SECONDS:
+        return "hit", stored, None
+
+    if now - meta.get("full_fetched_at", 0) > FULL_REFRESH_DAYS * 86400:
+        return "full", None, None
+
+    last_bar = stored.index[-1]
+    if (pd.Timestamp(now, unit="s").tz_localize(None) - last_bar.tz_localize(None)).days > TOPUP_MAX_GAP_DAYS:
+        return "full", None, None
+
+    return "topup", stored, last_bar
+
+
+def get_candles(ticker, download, clean, period="2y", interval="1d"):
+    """
+    Entrega os candles de um ticker passando pelo cache local.
+
+    - download(ticker, period=..., start=..., interval=...) → DataFrame bruto
+    - clean(ticker, df) → (DataFrame, motivo) — blindagem do data_loader
+
+    Mantém o contrato de `get_ticker_data`: DataFrame válido ou None.
+    """
+    acao, stored, start = plan_fetch(ticker, period, interval)
+
+    if acao == "hit":
+        count_stat("hits")
+        return trim_to_period(stored, period)
+
+    if acao == "topup":
+        try:
+            df, _ = clean_tail(download(ticker, start=start, interval=interval))
+        except Exception as e:
+            print(f"[!] Top-up falhou para {ticker} ({e}) — refazendo download completo.")
+            df = None
+
+        if df is not None:
+            merged = apply_topup(ticker, interval, period, stored, df, clean)
+            if merged is not None:
+                return merged
+        # top-up falhou → cai para o refetch completo
+
+    count_stat("misses")
+    df, _ = clean(ticker, download(ticker, period=period, interval=interval))
+    if df is not None:
+        save_candles(ticker, interval, df, period, full=True)
+    return df
+
+
+def clean_tail(df):
+    """
+    Blindagem mínima da cauda do top-up (poucos candles, então sem a
+    regra de mínimo de candles do data_loader).
+    """
+    if df is None or df.empty:
+        return None, "dados_vazios"
+
+    if isinstance(df.columns, pd.MultiIndex):
+        df.columns = df.columns.get_level_values(0)
+
+    for col in REQUIRED_COLUMNS:
+        if col not in df.columns:
+            return None, "coluna_ausente"
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+
+    df = df[df["Close"].notna()]
+    if df.empty:
+        return None, "dados_vazios"
+
+    return df, None
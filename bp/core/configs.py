@@ -1 +1,31 @@
+# bp/core/configs.py
+# -*- coding: utf-8 -*-
 
+"""
+Parâmetros operacionais do BP-Fênix (concorrência e ritmo de download).
+"""
+
+import os
+
+# ------------------------------------------------------------
+# EXECUTOR DO CICLO (bp_runner.run_scan)
+# ------------------------------------------------------------
+# Todo yf.download do processo passa por um único lock (o yfinance guarda
+# os resultados em globais do módulo, ver bp.core.utils.yf_download):
+# mais threads de download NÃO baixam em paralelo. Uma thread basta — o
+# pipeline sobrepõe o download de um lote com o score dos anteriores.
+DOWNLOAD_WORKERS = 1                        # threads de download (I/O)
+SCORE_WORKERS = min(4, os.cpu_count() or 1) # processos de score (CPU); 0 = inline
+DOWNLOAD_CHUNK_SIZE = 10                    # tickers por requisição em lote
+
+# Token bucket no lugar do antigo time.sleep(0.2) por ticker
+DOWNLOAD_RATE_PER_SEC = 10.0                # tickers por segundo (média)
+DOWNLOAD_BURST = DOWNLOAD_CHUNK_SIZE        # rajada máxima (tickers)
+
+# ------------------------------------------------------------
+# PREGÃO / SCHEDULER (bp.core.market_calendar, bp.core.scheduler)
+# ------------------------------------------------------------
+MARKET_TZ = "America/Sao_Paulo"
+MARKET_OPEN = "10:00"                       # horário padrão do pregão (B3)
+MARKET_CLOSE = "17:00"
+CYCLE_INTERVAL_MINUTES = 15                 # ticks alinhados ao relógio (:00, :15, ...)
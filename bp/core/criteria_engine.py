@@ -1,6 +1,7 @@
 import numpy as np
 
 VOLUME_TOLERANCIA = 0.02  # 2% abaixo da MM14 permitido
+ATR_PCT_MAX = 6           # ATR% máximo para o critério de volatilidade
 
 
 # ------------------------------------------------------------
@@ -40,12 +41,7 @@ def normalize_volume(vol, mm14):
 # ------------------------------------------------------------
 # CRITÉRIO 1 — TENDÊNCIA
 # ------------------------------------------------------------
-def check_trend(df):
-    if df is None or len(df) == 0:
-        return False, "Dados insuficientes", 0.10
-
-    last = df.iloc[-1]
-
+def _trend_from_row(last):
     close = to_float(last["Close"])
     ma9   = to_float(last["MA9"])
     ma21  = to_float(last["MA21"])
@@ -71,22 +67,22 @@ def check_trend(df):
     return status, detail, norm
 
 
+def check_trend(df):
+    if df is None or len(df) == 0:
+        return False, "Dados insuficientes", 0.10
+
+    return _trend_from_row(df.iloc[-1])
+
+
 # ------------------------------------------------------------
 # CRITÉRIO 2 — MOMENTUM
 # ------------------------------------------------------------
-def check_momentum(df):
-    if len(df) < 6:
-        return False, "Dados insuficientes", 0.10
-
-    last = df.iloc[-1]
+def _momentum_from_row(last, obv_up, ad_up):
     rsi  = to_float(last["RSI14"])
 
     if np.isnan(rsi):
         return False, "RSI inválido", 0.10
 
-    obv_up = df["OBV"].diff().tail(5).sum() > 0
-    ad_up  = df["AD"].diff().tail(5).sum()  > 0
-
     cond1 = rsi > 50
     cond2 = obv_up
     cond3 = ad_up
@@ -102,18 +98,26 @@ def check_momentum(df):
     return status, detail, norm
 
 
+def check_momentum(df):
+    if len(df) < 6:
+        return False, "Dados insuficientes", 0.10
+
+    obv_up = df["OBV"].diff().tail(5).sum() > 0
+    ad_up  = df["AD"].diff().tail(5).sum()  > 0
+
+    return _momentum_from_row(df.iloc[-1], obv_up, ad_up)
+
+
 # ------------------------------------------------------------
 # CRITÉRIO 3 — VOLATILIDADE (SEM ZERO)
 # ------------------------------------------------------------
-def check_volatility(df):
-    last = df.iloc[-1]
-
+def _volatility_from_row(last):
     atr_pct = to_float(last["ATR_pct"])
     if np.isnan(atr_pct):
         return False, "ATR% inválido", 0.10
 
     # critério binário continua igual
-    status = atr_pct <= 6
+    status = atr_pct <= ATR_PCT_MAX
 
     # normalização com teto realista (25%) + piso 0.10
     max_atr = 25
@@ -126,12 +130,14 @@ def check_volatility(df):
     return status, detail, norm
 
 
+def check_volatility(df):
+    return _volatility_from_row(df.iloc[-1])
+
+
 # ------------------------------------------------------------
 # CRITÉRIO 4 — SINAL TÉCNICO
 # ------------------------------------------------------------
-def check_technical_signal(df):
-    last = df.iloc[-1]
-
+def _technical_from_row(last):
     close = to_float(last["Close"])
     ma9   = to_float(last["MA9"])
     vwap  = to_float(last["VWAP"])
@@ -156,12 +162,14 @@ def check_technical_signal(df):
     return status, detail, norm
 
 
+def check_technical_signal(df):
+    return _technical_from_row(df.iloc[-1])
+
+
 # ------------------------------------------------------------
 # CRITÉRIO 5 — VOLUME
 # ------------------------------------------------------------
-def check_volume(df):
-    last = df.iloc[-1]
-
+def _volume_from_row(last):
     vol  = to_float(last["Volume"])
     mm14 = to_float(last["Volume_MM14"])
 
@@ -179,15 +187,19 @@ def check_volume(df):
     return status, detail, norm
 
 
+def check_volume(df):
+    return _volume_from_row(df.iloc[-1])
+
+
 # ------------------------------------------------------------
 # FUNÇÃO PRINCIPAL
 # ------------------------------------------------------------
-def evaluate_all_criteria(df):
-    c1, d1, n1 = check_trend(df)
-    c2, d2, n2 = check_momentum(df)
-    c3, d3, n3 = check_volatility(df)
-    c4, d4, n4 = check_technical_signal(df)
-    c5, d5, n5 = check_volume(df)
+def _pack_criteria(trend, momentum, volatility, technical, volume):
+    c1, d1, n1 = trend
+    c2, d2, n2 = momentum
+    c3, d3, n3 = volatility
+    c4, d4, n4 = technical
+    c5, d5, n5 = volume
 
     return {
         "tendencia":     {"status": c1, "detail": d1, "norm": n1},
@@ -195,4 +207,203 @@ def evaluate_all_criteria(df):
         "volatilidade":  {"status": c3, "detail": d3, "norm": n3},
         "sinal_tecnico": {"status": c4, "detail": d4, "norm": n4},
         "volume":        {"status": c5, "detail": d5, "norm": n5},
-    }
\ No newline at end of file
+    }
+
+
+def evaluate_all_criteria(df):
+    return _pack_criteria(
+        check_trend(df),
+        check_momentum(df),
+        check_volatility(df),
+        check_technical_signal(df),
+        check_volume(df),
+    )
+
+
+# ------------------------------------------------------------
+# AVALIAÇÃO A PARTIR DO ESTADO INCREMENTAL (sem DataFrame)
+# ------------------------------------------------------------
+def _flow_up(history):
+    """
+    Equivalente a serie.diff().tail(5).sum() > 0 sobre os 6 últimos valores.
+    """
+    return np.nansum(np.diff(np.asarray(history, dtype="float64")[-6:])) > 0
+
+
+def evaluate_state(state):
+    """
+    Mesmo resultado de evaluate_all_criteria(df), lendo a última linha
+    direto de um bp.core.indicator_state.IndicatorState.
+    """
+    if len(state) == 0:
+        insuf = (False, "Dados insuficientes", 0.10)
+        return _pack_criteria(insuf, insuf, insuf, insuf, insuf)
+
+    last = state.latest()
+
+    if len(state) < 6:
+        momentum = (False, "Dados insuficientes", 0.10)
+    else:
+        momentum = _momentum_from_row(
+            last, _flow_up(state.obv_history), _flow_up(state.ad_history)
+        )
+
+    return _pack_criteria(
+        _trend_from_row(last),
+        momentum,
+        _volatility_from_row(last),
+        _technical_from_row(last),
+        _volume_from_row(last),
+    )
+
+
+# ------------------------------------------------------------
+# AVALIAÇÃO VETORIZADA DO UNIVERSO (sem loop por ticker)
+# ------------------------------------------------------------
+CRITERIA_NAMES = ["tendencia", "momentum", "volatilidade", "sinal_tecnico", "volume"]
+
+MOMENTUM_MIN_ROWS = 6
+
+
+def _clamp_norm(x):
+    """
+    max(0.10, min(x, 1.0)) elemento a elemento, com a mesma regra do
+    Python para NaN (min devolve o NaN, max devolve 0.10).
+    """
+    x = np.where(1.0 < x, 1.0, x)
+    return np.where(x > 0.10, x, 0.10)
+
+
+def _safe_ratio(num, den):
+    """
+    num / den com den == 0 → NaN (onde o Python levantaria ZeroDivisionError).
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(den == 0, np.nan, num / np.where(den == 0, 1.0, den))
+
+
+def _criterion(status, norm, invalid, invalid_detail, detail_fn, want_details):
+    detail = None
+    if want_details:
+        if not isinstance(invalid_detail, list):
+            invalid_detail = [invalid_detail] * len(status)
+        detail = [
+            invalid_detail[j] if invalid[j] else detail_fn(j)
+            for j in range(len(status))
+        ]
+    return {
+        "status": status & ~invalid,
+        "norm": np.where(invalid, 0.10, norm),
+        "detail": detail,
+    }
+
+
+def evaluate_universe(
+    arrays,
+    counts=None,
+    details=True,
+    volume_tolerancia=VOLUME_TOLERANCIA,
+    atr_pct_max=ATR_PCT_MAX,
+):
+    """
+    Versão colunar de evaluate_all_criteria para todos os tickers de uma vez.
+
+    Entrada: {coluna: ndarray (n_linhas, n_tickers)} com as últimas linhas
+    de cada ticker (última linha = último candle), ex.: a saída de
+    universe_engine.last_rows. `counts` = nº de linhas reais por ticker
+    (padrão: todas).
+
+    Retorna {criterio: {"status": bool[], "norm": float[], "detail": list}},
+    com os mesmos valores que evaluate_all_criteria dá ticker a ticker
+    (`details=False` pula a montagem das strings).
+
+    `volume_tolerancia` / `atr_pct_max` só mudam para backtests e sweeps
+    (ver bp.core.sweep); o padrão é o das constantes do módulo.
+    """
+    a = {col: np.asarray(v, dtype="float64") for col, v in arrays.items()}
+    n_rows, n_tickers = a["Close"].shape
+    counts = np.full(n_tickers, n_rows) if counts is None else np.asarray(counts)
+
+    last = {col: v[-1] for col, v in a.items()}
+    close, ma9, ma21, ma200 = last["Close"], last["MA9"], last["MA21"], last["MA200"]
+
+    with np.errstate(invalid="ignore"):
+
+        # --- 1. TENDÊNCIA ---
+        invalid = np.isnan(close) | np.isnan(ma9) | np.isnan(ma21) | np.isnan(ma200)
+        status = (close > ma9) & (close > ma21) & (close > ma200)
+        norm = _clamp_norm(_safe_ratio(close - ma200, ma200))
+        trend = _criterion(
+            status, norm, invalid, "Valores inválidos para tendência",
+            lambda j: f"Close={close[j]:.2f}, MA9={ma9[j]:.2f}, MA21={ma21[j]:.2f}, MA200={ma200[j]:.2f}",
+            details,
+        )
+
+        # --- 2. MOMENTUM ---
+        rsi = last["RSI14"]
+        flows = slice(-MOMENTUM_MIN_ROWS, None)
+        obv_up = np.nansum(np.diff(a["OBV"][flows], axis=0), axis=0) > 0
+        ad_up = np.nansum(np.diff(a["AD"][flows], axis=0), axis=0) > 0
+
+        short = counts < MOMENTUM_MIN_ROWS
+        invalid = short | np.isnan(rsi)
+        status = (rsi > 50) & obv_up & ad_up
+        norm = _clamp_norm((rsi - 30) / 70)
+        momentum = _criterion(
+            status, norm, invalid,
+            ["Dados insuficientes" if s else "RSI inválido" for s in short],
+            lambda j: f"RSI14={rsi[j]:.2f} | OBV_up={obv_up[j]} | AD_up={ad_up[j]}",
+            details,
+        )
+
+        # --- 3. VOLATILIDADE ---
+        atr_pct = last["ATR_pct"]
+        invalid = np.isnan(atr_pct)
+        volatility = _criterion(
+            atr_pct <= atr_pct_max, _clamp_norm(1 - (atr_pct / 25)), invalid, "ATR% inválido",
+            lambda j: f"ATR%={atr_pct[j]:.2f}",
+            details,
+        )
+
+        # --- 4. SINAL TÉCNICO ---
+        vwap = last["VWAP"]
+        invalid = np.isnan(close) | np.isnan(ma9) | np.isnan(vwap)
+        status = (close > ma9) & (close > vwap)
+        norm = _clamp_norm(_safe_ratio(close - vwap, vwap))
+        technical = _criterion(
+            status, norm, invalid, "Valores inválidos para sinal técnico",
+            lambda j: f"Close={close[j]:.2f} | MA9={ma9[j]:.2f} | VWAP={vwap[j]:.2f}",
+            details,
+        )
+
+        # --- 5. VOLUME ---
+        vol, mm14 = last["Volume"], last["Volume_MM14"]
+        invalid = np.isnan(vol) | np.isnan(mm14) | (mm14 == 0)
+        deviation = _safe_ratio(vol - mm14, mm14)
+        ratio = _safe_ratio(vol, mm14)
+        norm = np.where(
+            mm14 <= 0, 0.1,
+            np.where(ratio >= 2, 1.0, _clamp_norm((ratio - 0.25) / (2 - 0.25))),
+        )
+        volume = _criterion(
+            deviation >= -volume_tolerancia, norm, invalid, "MM14 inválida",
+            lambda j: f"Volume={vol[j]:.0f} | MM14={mm14[j]:.0f} | Dev={deviation[j]*100:.2f}%",
+            details,
+        )
+
+    return dict(zip(CRITERIA_NAMES, [trend, momentum, volatility, technical, volume]))
+
+
+def criteria_at(universe, j):
+    """
+    Critérios do j-ésimo ticker de evaluate_universe no formato de
+    evaluate_all_criteria (bool / float do Python).
+    """
+    return {
+        name: {
+            "status": bool(c["status"][j]),
+            "detail": c["detail"][j] if c["detail"] is not None else "",
+            "norm": float(c["norm"][j]),
+        }
+        for name, c in universe.items()
+    }
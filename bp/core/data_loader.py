@@ -1,9 +1,9 @@
 import pandas as pd
-import yfinance as yf
-import requests
-import os
 
-CSV_PATH = "data/tickers_ibov.csv"
+from bp.core import candle_store, universe_store
+from bp.core.utils import yf_download
+
+CSV_PATH = universe_store.LEGACY_CSV_PATH
 
 
 # ------------------------------------------------------------
@@ -14,153 +14,142 @@ def fetch_ibov_from_b3():
     Captura a lista oficial de componentes do IBOV direto da B3.
     Totalmente compatível com Streamlit Cloud.
     """
-    url = "https://sistemaswebb3-listados.b3.com.br/indexProxy/indexCall/GetDetailIndex?language=pt-BR&index=IBOV"
+    tickers, _ = universe_store.fetch_index_from_b3("IBOV")
+    return tickers
 
-    headers = {
-        "User-Agent": "Mozilla/5.0",
-        "Accept": "application/json",
-    }
 
-    try:
-        r = requests.get(url, headers=headers, timeout=10)
-        data = r.json()
+# ------------------------------------------------------------
+# 2. Atualizar snapshot local de tickers
+# ------------------------------------------------------------
+def update_ticker_file(universe="IBOV"):
+    """
+    Força a atualização do snapshot do universo a partir da B3.
+    (O CSV legado não é mais reescrito — ele só serve de fallback.)
+    """
+    if universe_store.refresh_universe(universe) is None:
+        print(f"[!] {universe} não carregado — mantendo snapshot atual.")
 
-        tickers = [item["codNegociacao"].upper() + ".SA" for item in data["results"]]
-        tickers = sorted(list(set(tickers)))
 
-        return tickers
+# ------------------------------------------------------------
+# 3. Carregar universo (snapshot versionado, com fallback)
+# ------------------------------------------------------------
+def load_universe(universe="IBOV"):
+    """
+    Carrega a lista de tickers (.SA) do universo (IBOV, SMLL ou BDR)
+    com blindagem TOTAL. Nunca quebra.
 
+    Snapshot dentro do TTL → nenhuma chamada de rede (ver universe_store).
+    """
+    try:
+        return universe_store.get_universe(universe)
     except Exception as e:
-        print(f"[ERRO] Falha ao capturar IBOV da B3: {e}")
+        print(f"[ERRO] Falha ao carregar universo {universe} ({e}).")
         return []
 
 
-# ------------------------------------------------------------
-# 2. Atualizar CSV local de tickers
-# ------------------------------------------------------------
-def update_ticker_file():
-    # garantir que a pasta exista (Streamlit apaga no reboot)
-    os.makedirs(os.path.dirname(CSV_PATH), exist_ok=True)
-
-    tickers = fetch_ibov_from_b3()
 
-    if len(tickers) == 0:
-        print("[!] IBOV não carregado — usando CSV atual.")
-        return
 
-    df = pd.DataFrame({"ticker": tickers})
-    df.to_csv(CSV_PATH, index=False)
-
-    print(f"[OK] Lista do IBOV atualizada com {len(tickers)} ativos.")
+# ============================================================
+# 4. Blindagem comum dos candles (1 ticker ou universo)
+# ============================================================
+REQUIRED_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+MIN_CANDLES = 30
 
+# Motivos de rejeição (usados nos relatórios de falha do lote)
+FALHA_VAZIO = "dados_vazios"
+FALHA_COLUNA = "coluna_ausente"
+FALHA_POUCOS_CANDLES = "poucos_candles"
+FALHA_VOLUME_ZERADO = "volume_zerado"
+FALHA_DOWNLOAD = "erro_download"
 
 
-# ------------------------------------------------------------
-# 3. Carregar lista do IBOV (com fallback)
-# ------------------------------------------------------------
-def load_universe():
+def _clean_ohlcv(ticker, df):
     """
-    Carrega a lista de tickers do IBOV com blindagem TOTAL.
-    Nunca quebra.
+    Aplica a blindagem padrão do BP sobre os candles de UM ticker.
+
+    Retorna:
+        (DataFrame, None)  → dados válidos
+        (None, motivo)     → dados rejeitados (motivo = FALHA_*)
     """
+    if df is None or df.empty:
+        print(f"[!] Dados vazios para {ticker}")
+        return None, FALHA_VAZIO
 
-    # 1 — arquivo não existe
-    if not os.path.exists(CSV_PATH):
-        print("[!] CSV não encontrado — criando a lista do IBOV…")
-        update_ticker_file()
+    # --- Correção Maikinho: remover colunas multi-index (2D) ---
+    if isinstance(df.columns, pd.MultiIndex):
+        df.columns = df.columns.get_level_values(0)
 
-    # 2 — arquivo ainda não existe após tentativa
-    if not os.path.exists(CSV_PATH):
-        print("[ERRO] Falha ao criar CSV. Retornando lista vazia.")
-        return []
+    # --- Garantir OHLCV ---
+    for col in REQUIRED_COLUMNS:
+        if col not in df.columns:
+            print(f"[!] {ticker}: coluna ausente → {col}")
+            return None, FALHA_COLUNA
 
-    # 3 — arquivo existe mas pode estar vazio
-    if os.path.getsize(CSV_PATH) == 0:
-        print("[!] CSV está vazio — recriando…")
-        update_ticker_file()
+    # --- Coerção para 1D ---
+    for col in REQUIRED_COLUMNS:
+        df[col] = pd.to_numeric(df[col], errors="coerce")
 
-    try:
-        df = pd.read_csv(CSV_PATH)
+    # --- Remover linhas completamente inválidas mas sem apagar tudo ---
+    df = df[df["Close"].notna()]
 
-        if df.empty or "ticker" not in df.columns:
-            print("[!] CSV inválido — reconstruindo…")
-            update_ticker_file()
-            df = pd.read_csv(CSV_PATH)
+    # Se tiver poucos dados, rejeitar
+    if len(df) < MIN_CANDLES:
+        print(f"[!] {ticker}: poucos candles ({len(df)}).")
+        return None, FALHA_POUCOS_CANDLES
 
-        tickers = df["ticker"].dropna().unique().tolist()
+    # --- Garantir volume válido ---
+    if df["Volume"].sum() == 0:
+        print(f"[!] {ticker}: volume zerado, ignorado.")
+        return None, FALHA_VOLUME_ZERADO
 
-        if len(tickers) == 0:
-            print("[!] CSV sem tickers — reconstruindo…")
-            update_ticker_file()
-            df = pd.read_csv(CSV_PATH)
-            tickers = df["ticker"].dropna().unique().tolist()
+    return df, None
 
-        return tickers
-
-    except Exception as e:
-        print(f"[ERRO] Falha ao ler CSV ({e}) — reconstruindo…")
-        update_ticker_file()
-        if os.path.exists(CSV_PATH):
-            df = pd.read_csv(CSV_PATH)
-            return df["ticker"].dropna().unique().tolist()
-        return []
 
+# ============================================================
+# 5. Função CRUCIAL — baixar dados de um ticker
+# ============================================================
+def _download(ticker, period=None, start=None, interval="1d", **kwargs):
+    """
+    Chamada única ao yfinance usada por todo o loader (serializada no
+    processo, ver bp.core.utils.yf_download).
+    Com `start` baixa só a cauda (top-up do cache); senão usa `period`.
+    """
+    window = {"start": start} if start is not None else {"period": period}
 
+    return yf_download(
+        ticker,
+        interval=interval,
+        progress=False,
+        auto_adjust=False,
+        **window,
+        **kwargs,
+    )
 
 
-# ============================================================
-# 4. Função CRUCIAL — baixar dados de um ticker
-# ============================================================
-def get_ticker_data(ticker, period="2y", interval="1d"):
+def get_ticker_data(ticker, period="2y", interval="1d", use_cache=True):
     """
     Baixa dados do yfinance com BLINDAGEM TOTAL.
     Funciona para ações do Brasil e BDRs.
     Nunca retorna DataFrame 2D.
     Nunca retorna vazio.
+
+    Com `use_cache=True` passa pelo armazém local de candles
+    (bp.core.candle_store) e só baixa a cauda que falta.
     """
 
     try:
-        df = yf.download(
-            ticker,
-            period=period,
-            interval=interval,
-            progress=False,
-            auto_adjust=False,
-            threads=False,
-        )
-
-        if df is None or df.empty:
-            print(f"[!] Dados vazios para {ticker}")
-            return None
-
-        # --- Correção Maikinho: remover colunas multi-index (2D) ---
-        if isinstance(df.columns, pd.MultiIndex):
-            df.columns = df.columns.get_level_values(0)
-
-        # --- Garantir OHLCV ---
-        required = ["Open", "High", "Low", "Close", "Volume"]
-        for col in required:
-            if col not in df.columns:
-                print(f"[!] {ticker}: coluna ausente → {col}")
-                return None
-
-        # --- Coerção para 1D ---
-        for col in required:
-            df[col] = pd.to_numeric(df[col], errors="coerce")
-
-        # --- Remover linhas completamente inválidas mas sem apagar tudo ---
-        df = df[df["Close"].notna()]
-
-        # Se tiver poucos dados, rejeitar
-        if len(df) < 30:
-            print(f"[!] {ticker}: poucos candles ({len(df)}).")
-            return None
-
-        # --- Garantir volume válido ---
-        if df["Volume"].sum() == 0:
-            print(f"[!] {ticker}: volume zerado, ignorado.")
-            return None
-
+        if use_cache:
+            return candle_store.get_candles(
+                ticker,
+                download=lambda t, **kw: _download(t, threads=False, **kw),
+                clean=_clean_ohlcv,
+                period=period,
+                interval=interval,
+            )
+
+        df = _download(ticker, period=period, interval=interval, threads=False)
+
+        df, _ = _clean_ohlcv(ticker, df)
         return df
 
     except Exception as e:
@@ -169,7 +158,147 @@ def get_ticker_data(ticker, period="2y", interval="1d"):
 
 
 # ============================================================
-# 5. Função de validação final (mantida p/ compatibilidade)
+# 6. Download em lote — universo inteiro em poucas requisições
+# ============================================================
+UNIVERSE_CHUNK_SIZE = 30
+
+
+def _split_multi_ticker(raw, chunk):
+    """
+    Separa o resultado MultiIndex (ticker, campo) do yf.download em
+    um DataFrame por ticker. Tickers ausentes no retorno viram None.
+    """
+    frames = {}
+
+    if raw is None or raw.empty:
+        return {t: None for t in chunk}
+
+    if not isinstance(raw.columns, pd.MultiIndex):
+        # yfinance antigo devolve colunas simples quando o lote tem 1 ticker
+        if len(chunk) == 1:
+            return {chunk[0]: raw.copy()}
+        return {t: None for t in chunk}
+
+    level0 = set(raw.columns.get_level_values(0))
+    for t in chunk:
+        # linhas 100% NaN vêm do alinhamento de datas entre tickers do lote
+        frames[t] = raw[t].dropna(how="all").copy() if t in level0 else None
+
+    return frames
+
+
+def _download_batches(tickers, chunk_size, falhas, throttle=None, **window):
+    """
+    Baixa `tickers` em lotes multi-ticker e devolve {ticker: df_bruto}.
+    Lotes que falham inteiros são registrados em `falhas`.
+    `throttle(n)` (opcional) é chamado antes de cada lote de n tickers.
+    """
+    brutos = {}
+
+    for start in range(0, len(tickers), chunk_size):
+        chunk = tickers[start:start + chunk_size]
+
+        if throttle is not None:
+            throttle(len(chunk))
+
+        try:
+            raw = _download(chunk, group_by="ticker", threads=True, **window)
+        except Exception as e:
+            print(f"[ERRO] ao baixar lote {chunk[0]}…{chunk[-1]}: {e}")
+            for t in chunk:
+                falhas[t] = f"{FALHA_DOWNLOAD}: {e}"
+            continue
+
+        brutos.update(_split_multi_ticker(raw, chunk))
+
+    return brutos
+
+
+def get_universe_data(tickers, period="2y", interval="1d",
+                      chunk_size=UNIVERSE_CHUNK_SIZE, use_cache=True, throttle=None):
+    """
+    Baixa o universo inteiro em requisições multi-ticker (lotes de
+    `chunk_size`) e aplica em cada ticker a MESMA blindagem de
+    `get_ticker_data`.
+
+    Com `use_cache=True`, tickers frescos saem do armazém local e os
+    demais baixam só a cauda que falta (também em lote).
+
+    Uma falha (lote ou ticker) nunca aborta o restante do universo.
+    `throttle(n)` limita o ritmo: é chamado só antes de requisições reais.
+
+    Retorna:
+        (dados, falhas)
+        - dados:  {ticker: DataFrame válido}
+        - falhas: {ticker: motivo} com motivo = FALHA_* ou mensagem de erro
+    """
+    dados = {}
+    falhas = {}
+
+    tickers = list(dict.fromkeys(tickers))
+
+    # --- 1) cache: hits saem direto, top-ups baixam só a cauda ---
+    completos = tickers
+    if use_cache:
+        completos = []
+        topups = {}
+
+        for t in tickers:
+            acao, stored, start = candle_store.plan_fetch(t, period, interval)
+            if acao == "hit":
+                candle_store.count_stat("hits")
+                dados[t] = candle_store.trim_to_period(stored, period)
+            elif acao == "topup":
+                topups[t] = (stored, start)
+            else:
+                completos.append(t)
+
+        if topups:
+            inicio = min(start for _, start in topups.values())
+            brutos = _download_batches(
+                list(topups), chunk_size, {}, throttle, start=inicio, interval=interval
+            )
+
+            for t, (stored, _) in topups.items():
+                cauda, _ = candle_store.clean_tail(brutos.get(t))
+                merged = None
+                if cauda is not None:
+                    merged = candle_store.apply_topup(t, interval, period, stored, cauda, _clean_ohlcv)
+                if merged is None:
+                    completos.append(t)
+                    continue
+                dados[t] = merged
+
+        candle_store.count_stat("misses", len(completos))
+
+    # --- 2) download completo do restante ---
+    brutos = _download_batches(
+        completos, chunk_size, falhas, throttle, period=period, interval=interval
+    )
+
+    for t, df in brutos.items():
+        try:
+            df, motivo = _clean_ohlcv(t, df)
+        except Exception as e:
+            print(f"[ERRO] ao processar {t}: {e}")
+            df, motivo = None, f"{FALHA_DOWNLOAD}: {e}"
+
+        if df is None:
+            falhas[t] = motivo
+            continue
+
+        dados[t] = df
+        if use_cache:
+            candle_store.save_candles(t, interval, df, period, full=True)
+
+    # mesma ordem do universo de entrada
+    dados = {t: dados[t] for t in tickers if t in dados}
+
+    return dados, falhas
+
+
+# ============================================================
+# 7. Função de validação final (mantida p/ compatibilidade)
 # ============================================================
 def validate_data(df):
     """
@@ -181,8 +310,7 @@ def validate_data(df):
     if df.empty:
         return False
 
-    required = ["Open", "High", "Low", "Close", "Volume"]
-    for col in required:
+    for col in REQUIRED_COLUMNS:
         if col not in df.columns:
             return False
 
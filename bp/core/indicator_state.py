@@ -0,0 +1,362 @@
+# bp/core/indicator_state.py
+# -*- coding: utf-8 -*-
+
+"""
+Estado incremental (streaming) dos indicadores de UM ticker.
+
+Guarda as somas móveis de cada janela (MA9/21/50/200, ganhos/perdas do
+RSI14, TR do ATR14, Volume MM14) e os acumulados de OBV, AD e VWAP, para
+que o re-score intradiário não precise refazer o pipeline inteiro a cada
+15 minutos:
+
+    state = IndicatorState.from_frame(df_historico)
+    state.update(candle_novo)        # novo candle fechado/aberto    → O(1)
+    state.replace_last(candle_vivo)  # candle atual mudou de preço   → O(1)
+    state.latest()                   # última linha (mesmas colunas de
+                                     # apply_all_indicators), sem DataFrame
+
+As regras de NaN seguem o pandas (janela com NaN → NaN; cumsum pula NaN).
+
+Precisão vs apply_all_indicators (última linha): OHLCV, RSI14, OBV, AD e
+VWAP saem idênticos; as médias de janela (MA*, ATR, Volume_MM14 e
+derivados) diferem no máximo RTOL (1e-12, relativo) — a soma corrente
+arredonda em outra ordem que o rolling do pandas. Um critério só pode
+mudar quando o valor empata com o limiar dentro dessa margem.
+
+IndicatorStates guarda um estado por ticker entre os ciclos do
+scheduler (ver bp_runner.run_intraday_cycle).
+"""
+
+import math
+import threading
+from collections import deque
+
+import numpy as np
+
+MA_PERIODS = (9, 21, 50, 200)
+RSI_PERIOD = 14
+ATR_PERIOD = 14
+VOLUME_MM_PERIOD = 14
+
+# histórico curto de OBV/AD para o critério de momentum (diff().tail(5))
+FLOW_HISTORY = 6
+
+# recálculo periódico das somas móveis (limita o erro de arredondamento)
+_RESYNC_EVERY = 512
+
+# tolerância relativa garantida vs apply_all_indicators (ver docstring)
+RTOL = 1e-12
+
+_OHLCV = ("Open", "High", "Low", "Close", "Volume")
+
+_NAN = float("nan")
+
+
+def _f(x):
+    try:
+        return float(x)
+    except (TypeError, ValueError):
+        return _NAN
+
+
+# ------------------------------------------------------------
+# JANELA MÓVEL COM SOMA CORRENTE
+# ------------------------------------------------------------
+class _RollingWindow:
+    """
+    Janela de tamanho fixo com soma corrente dos valores válidos e
+    contagem de NaN (média = NaN se houver NaN ou janela incompleta).
+    """
+
+    __slots__ = ("period", "values", "total", "nans", "_ops")
+
+    def __init__(self, period):
+        self.period = period
+        self.values = deque()
+        self.total = 0.0
+        self.nans = 0
+        self._ops = 0
+
+    def _add(self, x):
+        if math.isnan(x):
+            self.nans += 1
+        else:
+            self.total += x
+
+    def _remove(self, x):
+        if math.isnan(x):
+            self.nans -= 1
+        else:
+            self.total -= x
+
+    def _tick(self):
+        self._ops += 1
+        if self._ops >= _RESYNC_EVERY:
+            self._ops = 0
+            self.total = math.fsum(v for v in self.values if not math.isnan(v))
+
+    def push(self, x):
+        self.values.append(x)
+        self._add(x)
+        if len(self.values) > self.period:
+            self._remove(self.values.popleft())
+        self._tick()
+
+    def replace_last(self, x):
+        self._remove(self.values[-1])
+        self.values[-1] = x
+        self._add(x)
+        self._tick()
+
+    def mean(self):
+        if len(self.values) < self.period or self.nans > 0:
+            return _NAN
+        return self.total / self.period
+
+
+# ------------------------------------------------------------
+# ACUMULADO (cumsum) COM DESFAZER DO ÚLTIMO CANDLE
+# ------------------------------------------------------------
+class _Cumulative:
+    """
+    Soma acumulada no estilo pandas cumsum(): valor NaN não entra na soma
+    e é exibido como NaN. Guarda a base SEM o último candle, então
+    replace_last é exato (base + novo, na mesma ordem do cumsum).
+    """
+
+    __slots__ = ("base", "last")
+
+    def __init__(self):
+        self.base = 0.0
+        self.last = _NAN
+
+    def push(self, x):
+        self.base = self.total()
+        self.last = x
+
+    def replace_last(self, x):
+        self.last = x
+
+    def total(self):
+        return self.base if math.isnan(self.last) else self.base + self.last
+
+    def value(self):
+        return _NAN if math.isnan(self.last) else self.base + self.last
+
+
+# ------------------------------------------------------------
+# ESTADO DO TICKER
+# ------------------------------------------------------------
+class IndicatorState:
+    """
+    Estado incremental de todos os indicadores do BP-Fênix para um ticker.
+    """
+
+    def __init__(self):
+        self.n_bars = 0
+        self.bar = None              # último candle (dict OHLCV)
+        self.prev_close = _NAN       # fechamento do candle ANTERIOR ao último
+
+        self._ma = {p: _RollingWindow(p) for p in MA_PERIODS}
+        self._gain = _RollingWindow(RSI_PERIOD)
+        self._loss = _RollingWindow(RSI_PERIOD)
+        self._tr = _RollingWindow(ATR_PERIOD)
+        self._vol = _RollingWindow(VOLUME_MM_PERIOD)
+
+        self._obv = _Cumulative()
+        self._ad = _Cumulative()
+        self._pv = _Cumulative()     # Σ preço típico × volume
+        self._v = _Cumulative()      # Σ volume
+
+        self.obv_history = deque(maxlen=FLOW_HISTORY)
+        self.ad_history = deque(maxlen=FLOW_HISTORY)
+
+    def __len__(self):
+        return self.n_bars
+
+    # --------------------------------------------------------
+    @classmethod
+    def from_frame(cls, df):
+        """
+        Semeia o estado a partir de um DataFrame OHLCV (histórico completo).
+        """
+        state = cls()
+        state.extend(df)
+        return state
+
+    def extend(self, df):
+        """
+        update() de cada candle de `df`, em ordem.
+        """
+        cols = [df[c].to_numpy(dtype="float64") for c in _OHLCV]
+        for o, h, l, c, v in zip(*cols):
+            self.update({"Open": o, "High": h, "Low": l, "Close": c, "Volume": v})
+
+    # --------------------------------------------------------
+    def update(self, bar):
+        """
+        Acrescenta um candle novo (Open/High/Low/Close/Volume). O(1).
+        """
+        if self.bar is not None:
+            self.prev_close = self.bar["Close"]
+        self._apply(bar, replace=False)
+        self.n_bars += 1
+
+    def replace_last(self, bar):
+        """
+        Substitui o último candle (candle em formação mudou). O(1).
+        """
+        if self.bar is None:
+            self.update(bar)
+            return
+        self._apply(bar, replace=True)
+
+    # --------------------------------------------------------
+    def _apply(self, bar, replace):
+        o = _f(bar["Open"])
+        h = _f(bar["High"])
+        l = _f(bar["Low"])
+        c = _f(bar["Close"])
+        v = _f(bar["Volume"])
+        pc = self.prev_close
+
+        delta = c - pc
+        gain = delta if delta > 0 else (_NAN if math.isnan(delta) else 0.0)
+        loss = -delta if delta < 0 else (_NAN if math.isnan(delta) else 0.0)
+
+        # TR = max(H-L, |H-Cprev|, |L-Cprev|) ignorando NaN
+        tr_parts = [x for x in (h - l, abs(h - pc), abs(l - pc)) if not math.isnan(x)]
+        tr = max(tr_parts) if tr_parts else _NAN
+
+        # OBV: direção NaN → 0
+        direction = 1.0 if delta > 0 else (-1.0 if delta < 0 else 0.0)
+        obv_flow = direction * v
+
+        # AD: spread zero → CLV NaN → 0
+        spread = h - l
+        clv = ((c - l) - (h - c)) / spread if spread != 0 else _NAN
+        if math.isnan(clv):
+            clv = 0.0
+        ad_flow = clv * v
+
+        typical = (h + l + c) / 3
+
+        op = "replace_last" if replace else "push"
+        for p in MA_PERIODS:
+            getattr(self._ma[p], op)(c)
+        getattr(self._gain, op)(gain)
+        getattr(self._loss, op)(loss)
+        getattr(self._tr, op)(tr)
+        getattr(self._vol, op)(v)
+        getattr(self._obv, op)(obv_flow)
+        getattr(self._ad, op)(ad_flow)
+        getattr(self._pv, op)(typical * v)
+        getattr(self._v, op)(v)
+
+        if replace:
+            self.obv_history[-1] = self._obv.value()
+            self.ad_history[-1] = self._ad.value()
+        else:
+            self.obv_history.append(self._obv.value())
+            self.ad_history.append(self._ad.value())
+
+        self.bar = {"Open": o, "High": h, "Low": l, "Close": c, "Volume": v}
+
+    # --------------------------------------------------------
+    def latest(self):
+        """
+        Última linha de indicadores, com as mesmas chaves das colunas de
+        apply_all_indicators (inf → NaN). Dict vazio se não houver candles.
+        """
+        if self.bar is None:
+            return {}
+
+        close = self.bar["Close"]
+        volume = self.bar["Volume"]
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            avg_gain = np.float64(self._gain.mean())
+            avg_loss = np.float64(self._loss.mean())
+            rsi = 100 - (100 / (1 + avg_gain / avg_loss))
+
+            atr = np.float64(self._tr.mean())
+            mm14 = np.float64(self._vol.mean())
+
+            row = dict(self.bar)
+            for p in MA_PERIODS:
+                row[f"MA{p}"] = self._ma[p].mean()
+            row[f"RSI{RSI_PERIOD}"] = rsi
+            row["OBV"] = self._obv.value()
+            row["AD"] = self._ad.value()
+            row["ATR"] = atr
+            row["ATR_pct"] = (atr / close) * 100
+            row["Volume_MM14"] = mm14
+            row["Volume_deviation"] = ((volume - mm14) / mm14) * 100
+            row["VWAP"] = np.float64(self._pv.value()) / np.float64(self._v.value())
+
+        return {k: (_NAN if np.isinf(x) else float(x)) for k, x in row.items()}
+
+
+# ------------------------------------------------------------
+# ESTADOS DO UNIVERSO (um por ticker, entre ciclos)
+# ------------------------------------------------------------
+class IndicatorStates:
+    """
+    Estado incremental de cada ticker, sincronizado com o histórico de
+    candles a cada ciclo:
+
+    - mesmo 1º candle e último candle aplicado ainda presente → o último
+      candle é refeito (replace_last, candle em formação) e só os novos
+      entram (update): O(candles novos)
+    - senão (1º ciclo, janela do `period` deslizou no dia seguinte,
+      histórico revisado) → estado semeado de novo: O(n)
+    """
+
+    def __init__(self):
+        self._states = {}            # ticker → (estado, 1º índice, último índice)
+        self._lock = threading.Lock()
+        self.stats = {"seeded": 0, "incremental": 0}
+
+    def __len__(self):
+        with self._lock:
+            return len(self._states)
+
+    def sync(self, ticker, df):
+        """
+        Leva o estado de `ticker` até o último candle de `df` (OHLCV
+        limpo, como sai do data_loader) e o devolve.
+        """
+        index = df.index
+
+        with self._lock:
+            entry = self._states.get(ticker)
+            pos = -1
+            if entry is not None and len(index) > 0 and index[0] == entry[1]:
+                state, _, last = entry
+                try:
+                    pos = index.get_loc(last)
+                except KeyError:
+                    pos = -1
+                if not isinstance(pos, int) or pos != len(state) - 1:
+                    pos = -1
+
+            if pos < 0:
+                state = IndicatorState.from_frame(df)
+                self.stats["seeded"] += 1
+            else:
+                bar = df.iloc[pos]
+                state.replace_last({c: bar[c] for c in _OHLCV})
+                state.extend(df.iloc[pos + 1:])
+                self.stats["incremental"] += 1
+
+            if len(index) > 0:
+                self._states[ticker] = (state, index[0], index[-1])
+            return state
+
+    def discard(self, ticker):
+        with self._lock:
+            self._states.pop(ticker, None)
+
+    def clear(self):
+        with self._lock:
+            self._states.clear()
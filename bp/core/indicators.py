@@ -1,22 +1,38 @@
 import pandas as pd
 import numpy as np
 
+_SEQUENCE_TYPES = (list, tuple, np.ndarray)
+
+
+def _is_sequence(x):
+    return isinstance(x, _SEQUENCE_TYPES)
+
+
 def force_1d(series):
     """
     Converte qualquer coluna para uma Series 1D REAL.
     Remove listas, tuplas, arrays, DataFrames e dtype object.
+
+    Caminho rápido: colunas já numéricas (float/int) voltam SEM CÓPIA.
+    Só colunas object passam pelo desembrulho vetorizado
+    (1º elemento de cada lista/tupla/array; vazio → NaN).
     """
     if isinstance(series, pd.DataFrame):
         series = series.iloc[:, 0]
 
-    cleaned = []
-    for x in series:
-        if isinstance(x, (list, tuple, np.ndarray)):
-            cleaned.append(x[0] if len(x) > 0 else np.nan)
-        else:
-            cleaned.append(x)
+    if series.dtype.kind in "fiu":
+        return series
+
+    values = series.to_numpy(dtype=object)
+
+    # máscara de sequências em uma passada C (map + fromiter)
+    is_seq = np.fromiter(map(_is_sequence, values), dtype=bool, count=len(values))
+
+    if is_seq.any():
+        values = values.copy()
+        values[is_seq] = [x[0] if len(x) > 0 else np.nan for x in values[is_seq]]
 
-    cleaned = pd.to_numeric(cleaned, errors="coerce")
+    cleaned = pd.to_numeric(values, errors="coerce")
     return pd.Series(cleaned, index=series.index)
 
 
@@ -27,7 +43,10 @@ def normalize_ohlcv(df):
     """
     for col in ["Open", "High", "Low", "Close", "Volume"]:
         if col in df.columns:
-            df[col] = force_1d(df[col])
+            raw = df[col]
+            cleaned = force_1d(raw)
+            if cleaned is not raw:
+                df[col] = cleaned
 
     return df
 
@@ -96,6 +115,21 @@ def calc_rsi(df, period=14):
 # ------------------------------------------------------------
 # OBV – On Balance Volume
 # ------------------------------------------------------------
+def _obv_flow(close, volume, prev_close=np.nan):
+    """
+    Fluxo de volume de cada candle: +volume (alta), -volume (queda), 0.
+    `prev_close` é o fechamento anterior ao 1º candle (NaN → direção 0).
+    """
+    diff = close.diff()
+    if len(diff) > 0:
+        diff.iloc[0] = close.iloc[0] - prev_close
+
+    # Direção: 1, -1, 0 (NaN → 0, como no critério original)
+    direction = np.sign(diff).fillna(0)
+
+    return direction * volume
+
+
 def calc_obv(df):
     """
     OBV blindado para o Streamlit Cloud.
@@ -111,15 +145,7 @@ def calc_obv(df):
     close = pd.Series(df["Close"].values.flatten(), index=df.index)
     volume = pd.Series(df["Volume"].values.flatten(), index=df.index)
 
-    # Diferença do fechamento
-    diff = close.diff()
-
-    # Direção: 1, -1, 0
-    direction = diff.apply(
-        lambda x: 1 if x > 0 else (-1 if x < 0 else 0)
-    )
-
-    obv = (direction * volume).cumsum()
+    obv = _obv_flow(close, volume).cumsum()
 
     df["OBV"] = obv
     return df
@@ -128,6 +154,17 @@ def calc_obv(df):
 # ------------------------------------------------------------
 # AD LINE – Acumulação / Distribuição
 # ------------------------------------------------------------
+def _ad_flow(high, low, close, volume):
+    """
+    Money flow volume de cada candle (CLV × volume).
+    """
+    spread = (high - low).replace(0, np.nan)
+    clv = ((close - low) - (high - close)) / spread
+    clv = clv.fillna(0)
+
+    return clv * volume
+
+
 def calc_ad_line(df):
     if df is None or df.empty:
         df["AD"] = np.nan
@@ -138,16 +175,66 @@ def calc_ad_line(df):
     close = force_1d(df["Close"])
     volume = force_1d(df["Volume"])
 
-    spread = (high - low).replace(0, np.nan)
-    clv = ((close - low) - (high - close)) / spread
-    clv = clv.fillna(0)
-
-    ad_line = (clv * volume).cumsum()
+    ad_line = _ad_flow(high, low, close, volume).cumsum()
     df["AD"] = ad_line
 
     return df
 
 
+# ------------------------------------------------------------
+# OBV / AD INCREMENTAIS (candles novos no fim da série)
+# ------------------------------------------------------------
+def _extend_cumsum(prev_total, flow):
+    """
+    Continua um cumsum a partir do acumulado anterior, somando na MESMA
+    ordem do cumsum completo (resultado bit a bit idêntico).
+    NaN no fluxo → NaN na saída, sem interromper o acumulado.
+    """
+    seeded = pd.concat([pd.Series([prev_total]), flow.reset_index(drop=True)])
+    return pd.Series(seeded.cumsum().to_numpy()[1:], index=flow.index)
+
+
+def last_cumulative(series):
+    """
+    Último valor acumulado válido de uma coluna OBV/AD
+    (o que deve ser passado como `prev_*` para as funções extend_*).
+    """
+    valid = series.dropna()
+    return float(valid.iloc[-1]) if len(valid) > 0 else np.nan
+
+
+def extend_obv(new_bars, prev_obv, prev_close):
+    """
+    OBV dos candles novos sem recalcular o histórico.
+
+    - new_bars:   DataFrame só com os candles acrescentados (Close, Volume)
+    - prev_obv:   último OBV acumulado (ver last_cumulative)
+    - prev_close: fechamento do último candle já processado
+
+    Retorna Series alinhada a new_bars.index, igual ao trecho final de
+    calc_obv sobre a série completa.
+    """
+    close = force_1d(new_bars["Close"])
+    volume = force_1d(new_bars["Volume"])
+
+    return _extend_cumsum(prev_obv, _obv_flow(close, volume, prev_close))
+
+
+def extend_ad_line(new_bars, prev_ad):
+    """
+    Linha AD dos candles novos sem recalcular o histórico.
+
+    - new_bars: DataFrame só com os candles acrescentados (High, Low, Close, Volume)
+    - prev_ad:  último AD acumulado (ver last_cumulative)
+    """
+    high = force_1d(new_bars["High"])
+    low = force_1d(new_bars["Low"])
+    close = force_1d(new_bars["Close"])
+    volume = force_1d(new_bars["Volume"])
+
+    return _extend_cumsum(prev_ad, _ad_flow(high, low, close, volume))
+
+
 
 
 # ------------------------------------------------------------
@@ -205,6 +292,16 @@ def calc_volume_deviation(df):
 # ------------------------------------------------------------
 # PIPELINE PRINCIPAL
 # ------------------------------------------------------------
+# Linhas devolvidas por apply_all_indicators.
+#
+# Os indicadores continuam rodando no histórico completo: o rolling do
+# pandas acumula a soma corrente desde o 1º candle, então uma janela
+# recortada no warm-up mínimo (ex.: 200+20 para a MA200) muda ~1/4 dos
+# valores das médias em 1 ulp — e a saída precisa ficar idêntica. Só a
+# blindagem final (inf → NaN, corte por Close) roda na cauda.
+TAIL_ROWS = 20
+
+
 def apply_all_indicators(df):
     """
     Aplica todos os indicadores necessários para o BP-Fênix,
@@ -269,28 +366,30 @@ def apply_all_indicators(df):
     # =========================================
 
     # Converter TODAS as colunas para Series 1D
+    # (colunas já float voltam do force_1d sem cópia → nada a reatribuir)
     for col in df.columns:
-        df[col] = force_1d(df[col])
+        raw = df[col]
+        cleaned = force_1d(raw)
+        if cleaned is not raw:
+            df[col] = cleaned
 
     # Blindagem final do fechamento
-    close = force_1d(df["Close"])
+    close = df["Close"]
 
     # Se todos NaN, não presta
     if close.isna().all():
         return pd.DataFrame()
 
-    df["Close"] = close
-
-    # Limpar infinitos
-    df = df.replace([np.inf, -np.inf], np.nan)
-
-    # Remover linhas sem fechamento
-    df = df[df["Close"].notna()]
-
     # =========================================
     # 🔥 SÓ AGORA cortamos para as últimas 20
     # =========================================
-    df = df.tail(20)
+    # linhas com fechamento válido (Close ±inf vira NaN na limpeza abaixo
+    # e também cai fora) — só as últimas TAIL_ROWS seguem
+    valid = np.isfinite(close.to_numpy(dtype="float64", na_value=np.nan))
+    df = df.iloc[np.flatnonzero(valid)[-TAIL_ROWS:]]
+
+    # Limpar infinitos (só na cauda)
+    df = df.replace([np.inf, -np.inf], np.nan)
 
     if len(df) == 0:
         return pd.DataFrame()
@@ -0,0 +1,188 @@
+# bp/core/market_calendar.py
+# -*- coding: utf-8 -*-
+
+"""
+Calendário de pregão da B3 (fuso America/Sao_Paulo).
+
+Feriados calculados por ano (fixos + móveis a partir da Páscoa), mais
+pregões com horário especial:
+    - late_opens:   abertura atrasada (ex.: Quarta-feira de Cinzas, 13h)
+    - early_closes: encerramento antecipado (ex.: dia de evento/ajuste B3)
+
+Tudo pode ser injetado (feriados extras, horários especiais, horário
+padrão) — o scheduler recebe o calendário pronto.
+"""
+
+from datetime import date, datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+from bp.core import configs
+
+B3_TZ = ZoneInfo(configs.MARKET_TZ)
+
+
+# ------------------------------------------------------------
+# PÁSCOA (algoritmo de Meeus/Jones/Butcher — calendário gregoriano)
+# ------------------------------------------------------------
+def easter(year):
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+# ------------------------------------------------------------
+# FERIADOS DA B3
+# ------------------------------------------------------------
+def b3_holidays(year):
+    """
+    Dias sem pregão na B3 em `year` → {date: nome}.
+    """
+    p = easter(year)
+
+    holidays = {
+        date(year, 1, 1): "Confraternização Universal",
+        p - timedelta(days=48): "Carnaval",
+        p - timedelta(days=47): "Carnaval",
+        p - timedelta(days=2): "Sexta-feira Santa",
+        date(year, 4, 21): "Tiradentes",
+        date(year, 5, 1): "Dia do Trabalho",
+        p + timedelta(days=60): "Corpus Christi",
+        date(year, 9, 7): "Independência",
+        date(year, 10, 12): "Nossa Senhora Aparecida",
+        date(year, 11, 2): "Finados",
+        date(year, 11, 15): "Proclamação da República",
+        date(year, 12, 24): "Véspera de Natal",
+        date(year, 12, 25): "Natal",
+    }
+
+    # Consciência Negra: feriado nacional a partir de 2024
+    if year >= 2024:
+        holidays[date(year, 11, 20)] = "Consciência Negra"
+
+    # Último dia útil do ano: sem pregão
+    last = date(year, 12, 31)
+    while last.weekday() >= 5 or last in holidays:
+        last -= timedelta(days=1)
+    holidays[last] = "Último dia útil do ano"
+
+    return holidays
+
+
+def _parse_time(value):
+    if isinstance(value, time):
+        return value
+    hour, minute = (int(x) for x in str(value).split(":"))
+    return time(hour, minute)
+
+
+# ------------------------------------------------------------
+# CALENDÁRIO
+# ------------------------------------------------------------
+class B3Calendar:
+    """
+    Calendário de sessões da B3.
+
+    Parâmetros (todos opcionais):
+        open_time / close_time → horário padrão do pregão (configs)
+        extra_holidays         → datas adicionais sem pregão
+        late_opens             → {date: horário de abertura}
+        early_closes           → {date: horário de encerramento}
+    """
+
+    def __init__(
+        self,
+        open_time=None,
+        close_time=None,
+        extra_holidays=(),
+        late_opens=None,
+        early_closes=None,
+        tz=B3_TZ,
+    ):
+        self.open_time = _parse_time(open_time or configs.MARKET_OPEN)
+        self.close_time = _parse_time(close_time or configs.MARKET_CLOSE)
+        self.extra_holidays = set(extra_holidays)
+        self.late_opens = {d: _parse_time(t) for d, t in (late_opens or {}).items()}
+        self.early_closes = {d: _parse_time(t) for d, t in (early_closes or {}).items()}
+        self.tz = tz
+        self._years = {}
+
+    # --------------------------------------------------------
+    def holidays(self, year):
+        if year not in self._years:
+            self._years[year] = b3_holidays(year)
+        return self._years[year]
+
+    def is_trading_day(self, day):
+        return (
+            day.weekday() < 5
+            and day not in self.holidays(day.year)
+            and day not in self.extra_holidays
+        )
+
+    def session(self, day):
+        """
+        (abertura, encerramento) do pregão de `day` (datetime com fuso),
+        ou None se não houver pregão.
+        """
+        if not self.is_trading_day(day):
+            return None
+
+        open_time = self.late_opens.get(day, self.open_time)
+
+        # Quarta-feira de Cinzas: pregão começa às 13h
+        if day == easter(day.year) - timedelta(days=46) and day not in self.late_opens:
+            open_time = max(open_time, time(13, 0))
+
+        close_time = self.early_closes.get(day, self.close_time)
+
+        return (
+            datetime.combine(day, open_time, tzinfo=self.tz),
+            datetime.combine(day, close_time, tzinfo=self.tz),
+        )
+
+    # --------------------------------------------------------
+    def now(self):
+        return datetime.now(self.tz)
+
+    def localize(self, moment=None):
+        """
+        Converte `moment` para o fuso da B3 (datetime ingênuo = já local).
+        """
+        if moment is None:
+            return self.now()
+        if moment.tzinfo is None:
+            return moment.replace(tzinfo=self.tz)
+        return moment.astimezone(self.tz)
+
+    def is_open(self, moment=None):
+        """
+        True se `moment` (padrão: agora) estiver dentro do pregão,
+        abertura e encerramento inclusos.
+        """
+        moment = self.localize(moment)
+        session = self.session(moment.date())
+        return session is not None and session[0] <= moment <= session[1]
+
+    def next_open(self, moment=None):
+        """
+        Próxima abertura de pregão estritamente depois de `moment`
+        (ou a abertura do dia, se ainda não abriu).
+        """
+        moment = self.localize(moment)
+        day = moment.date()
+
+        for _ in range(400):
+            session = self.session(day)
+            if session is not None and session[0] > moment:
+                return session[0]
+            day += timedelta(days=1)
+
+        raise RuntimeError("Nenhum pregão encontrado nos próximos 400 dias")
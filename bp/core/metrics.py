@@ -0,0 +1,335 @@
+# bp/core/metrics.py
+# -*- coding: utf-8 -*-
+
+"""
+Instrumentação leve do ciclo do BP-Fênix.
+
+    metrics = CycleMetrics("IBOV")
+    with metrics.stage("download", tickers=len(lote)):
+        ...
+    metrics.count_failures(falhas)
+    metrics.finish(tickers=..., scored=..., failed=..., selected=...)
+    export_cycle(metrics)      # acumula no REGISTRY e grava os arquivos
+
+Estágios por ticker (histograma de latência por ticker):
+    download (lote ÷ nº de tickers, sem filas), download_wait (fila no
+    lock do yfinance + token bucket), indicators, criteria, scoring,
+    selection
+Estágios de ciclo (tickers=0, só somam no total do ciclo):
+    universe, scan
+
+O snapshot vai para data/metrics/ em dois formatos:
+    bp_fenix.json → lido pelo painel administrativo
+    bp_fenix.prom → texto de exposição do Prometheus (node_exporter
+                    textfile collector ou qualquer scraper de arquivo)
+"""
+
+import bisect
+import json
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from functools import wraps
+
+from bp.core.utils import atomic_write
+
+METRICS_DIR = os.path.join("data", "metrics")
+JSON_PATH = os.path.join(METRICS_DIR, "bp_fenix.json")
+PROM_PATH = os.path.join(METRICS_DIR, "bp_fenix.prom")
+
+# limites superiores dos buckets (segundos)
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0,
+)
+
+PROM_PREFIX = "bp_fenix"
+
+
+def failure_reason(motivo):
+    """
+    Categoria da falha: "erro_download: timeout" → "erro_download".
+    """
+    return str(motivo).split(":", 1)[0].strip() or "desconhecido"
+
+
+# ------------------------------------------------------------
+# HISTOGRAMA
+# ------------------------------------------------------------
+class Histogram:
+    """
+    Histograma de buckets fixos (mesma semântica do Prometheus).
+    """
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)    # último = +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value, n=1):
+        self.counts[bisect.bisect_left(self.buckets, value)] += n
+        self.sum += value * n
+        self.count += n
+
+    def merge(self, other):
+        for i, c in enumerate(other.counts):
+            self.counts[i] += c
+        self.sum += other.sum
+        self.count += other.count
+
+    def quantile(self, q):
+        """
+        Limite superior do bucket que contém o quantil q (estimativa
+        conservadora). None se vazio.
+        """
+        if self.count == 0:
+            return None
+        rank = q * self.count
+        acc = 0
+        for i, c in enumerate(self.counts):
+            acc += c
+            if acc >= rank:
+                return self.buckets[i] if i < len(self.buckets) else float("inf")
+        return float("inf")
+
+    def cumulative(self):
+        out, acc = [], 0
+        for le, c in zip(list(self.buckets) + ["+Inf"], self.counts):
+            acc += c
+            out.append((le, acc))
+        return out
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else None,
+            "p50": self.quantile(0.50),
+            "p95": self.quantile(0.95),
+            "buckets": {str(le): c for le, c in self.cumulative()},
+        }
+
+
+# ------------------------------------------------------------
+# MÉTRICAS DE UM CICLO
+# ------------------------------------------------------------
+class CycleMetrics:
+    """
+    Coletor thread-safe de UM ciclo: latência por ticker e por estágio,
+    segundos somados por estágio, falhas por motivo e totais do ciclo.
+    """
+
+    def __init__(self, label="IBOV"):
+        self.label = label
+        self.started_at = time.time()
+        self.finished_at = None
+        self.duration = None
+        self.ticker_latency = {}        # estágio → Histogram (por ticker)
+        self.stage_seconds = Counter()  # estágio → segundos somados no ciclo
+        self.failures = Counter()       # motivo → nº de tickers
+        self.totals = {}
+        self._t0 = time.perf_counter()
+        self._lock = threading.Lock()
+
+    # --------------------------------------------------------
+    def observe(self, stage, seconds, tickers=1):
+        """
+        Registra `seconds` gastos em `stage` cobrindo `tickers` tickers
+        (0 = estágio de ciclo, sem histograma por ticker).
+        """
+        with self._lock:
+            self.stage_seconds[stage] += seconds
+            if tickers:
+                hist = self.ticker_latency.get(stage)
+                if hist is None:
+                    hist = self.ticker_latency[stage] = Histogram()
+                hist.observe(seconds / tickers, tickers)
+
+    def observe_many(self, timings, tickers=1):
+        """
+        {estágio: segundos} de uma vez (ex.: tempos devolvidos pelo pool).
+        """
+        for stage, seconds in timings.items():
+            self.observe(stage, seconds, tickers)
+
+    @contextmanager
+    def stage(self, name, tickers=1):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - t0, tickers)
+
+    def timed(self, name, tickers=1):
+        """
+        Decorador: cronometra cada chamada da função em `name`.
+        """
+        def decorator(fn):
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.stage(name, tickers):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def count_failures(self, falhas):
+        with self._lock:
+            self.failures.update(failure_reason(m) for m in falhas.values())
+
+    def finish(self, **totals):
+        self.duration = time.perf_counter() - self._t0
+        self.finished_at = time.time()
+        self.totals = dict(totals)
+        return self
+
+    # --------------------------------------------------------
+    def to_dict(self):
+        with self._lock:
+            return {
+                "label": self.label,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "duration": self.duration,
+                "totals": dict(self.totals),
+                "stage_seconds": dict(self.stage_seconds),
+                "failures": dict(self.failures),
+                "ticker_latency": {s: h.to_dict() for s, h in self.ticker_latency.items()},
+            }
+
+    def summary(self):
+        """
+        Linha de log: duração do ciclo e segundos por estágio.
+        """
+        parts = " | ".join(f"{s} {v:.2f}s" for s, v in self.stage_seconds.items())
+        return f"⏱️ Ciclo em {self.duration or 0:.1f}s — {parts}"
+
+
+# ------------------------------------------------------------
+# REGISTRO ACUMULADO DO PROCESSO + EXPORTAÇÃO
+# ------------------------------------------------------------
+class MetricsRegistry:
+    """
+    Acumula os ciclos do processo: histogramas por ticker somados,
+    histograma da duração de cada estágio por ciclo, falhas totais e o
+    último ciclo completo.
+    """
+
+    def __init__(self):
+        self.cycles_total = 0
+        self.ticker_latency = {}        # estágio → Histogram (todos os ciclos)
+        self.stage_latency = {}         # estágio → Histogram (1 obs. por ciclo)
+        self.failures_total = Counter()
+        self.last_cycle = None
+        self._lock = threading.Lock()
+
+    def record(self, cycle):
+        snap = cycle.to_dict()
+        with self._lock:
+            self.cycles_total += 1
+            for stage, hist in cycle.ticker_latency.items():
+                self.ticker_latency.setdefault(stage, Histogram()).merge(hist)
+
+            per_stage = dict(snap["stage_seconds"])
+            if snap["duration"] is not None:
+                per_stage["ciclo"] = snap["duration"]
+            for stage, seconds in per_stage.items():
+                self.stage_latency.setdefault(stage, Histogram()).observe(seconds)
+
+            self.failures_total.update(snap["failures"])
+            self.last_cycle = snap
+
+    # --------------------------------------------------------
+    def to_dict(self):
+        with self._lock:
+            return {
+                "generated_at": time.time(),
+                "cycles_total": self.cycles_total,
+                "failures_total": dict(self.failures_total),
+                "ticker_latency": {s: h.to_dict() for s, h in self.ticker_latency.items()},
+                "stage_latency": {s: h.to_dict() for s, h in self.stage_latency.items()},
+                "last_cycle": self.last_cycle,
+            }
+
+    def to_prometheus(self):
+        p = PROM_PREFIX
+        lines = []
+
+        def histogram(name, help_, series):
+            lines.append(f"# HELP {p}_{name} {help_}")
+            lines.append(f"# TYPE {p}_{name} histogram")
+            for stage, hist in series.items():
+                for le, acc in hist.cumulative():
+                    lines.append(f'{p}_{name}_bucket{{stage="{stage}",le="{le}"}} {acc}')
+                lines.append(f'{p}_{name}_sum{{stage="{stage}"}} {hist.sum:.6f}')
+                lines.append(f'{p}_{name}_count{{stage="{stage}"}} {hist.count}')
+
+        with self._lock:
+            histogram("ticker_latency_seconds", "Latência por ticker em cada estágio.", self.ticker_latency)
+            histogram("stage_seconds", "Segundos de cada estágio por ciclo.", self.stage_latency)
+
+            lines.append(f"# HELP {p}_failures_total Tickers rejeitados por motivo.")
+            lines.append(f"# TYPE {p}_failures_total counter")
+            for reason, n in sorted(self.failures_total.items()):
+                lines.append(f'{p}_failures_total{{reason="{reason}"}} {n}')
+
+            lines.append(f"# HELP {p}_cycles_total Ciclos concluídos.")
+            lines.append(f"# TYPE {p}_cycles_total counter")
+            lines.append(f"{p}_cycles_total {self.cycles_total}")
+
+            last = self.last_cycle
+            if last is not None:
+                lines.append(f"# HELP {p}_last_cycle_duration_seconds Duração do último ciclo.")
+                lines.append(f"# TYPE {p}_last_cycle_duration_seconds gauge")
+                lines.append(f"{p}_last_cycle_duration_seconds {last['duration'] or 0:.6f}")
+                lines.append(f"# HELP {p}_last_cycle_timestamp_seconds Fim do último ciclo (epoch).")
+                lines.append(f"# TYPE {p}_last_cycle_timestamp_seconds gauge")
+                lines.append(f"{p}_last_cycle_timestamp_seconds {last['finished_at'] or 0:.3f}")
+                lines.append(f"# HELP {p}_last_cycle_tickers Tickers do último ciclo por situação.")
+                lines.append(f"# TYPE {p}_last_cycle_tickers gauge")
+                for kind, n in last["totals"].items():
+                    lines.append(f'{p}_last_cycle_tickers{{kind="{kind}"}} {n}')
+
+        return "\n".join(lines) + "\n"
+
+    def export(self, json_path=JSON_PATH, prom_path=PROM_PATH):
+        """
+        Grava o snapshot JSON e o texto Prometheus (atômico: temp + rename).
+        """
+        snapshot = json.dumps(self.to_dict(), ensure_ascii=False, indent=1)
+        prom = self.to_prometheus()
+        atomic_write(json_path, lambda f: f.write(snapshot), text=True)
+        atomic_write(prom_path, lambda f: f.write(prom), text=True)
+
+
+REGISTRY = MetricsRegistry()
+
+
+def export_cycle(cycle, registry=REGISTRY, json_path=JSON_PATH, prom_path=PROM_PATH):
+    """
+    Acumula o ciclo no registro e grava os arquivos. Nunca levanta
+    exceção: falha de disco não pode derrubar o ciclo.
+    """
+    registry.record(cycle)
+    try:
+        registry.export(json_path, prom_path)
+    except Exception as e:
+        print(f"[!] Falha ao exportar métricas: {e}")
+
+
+def load_snapshot(path=JSON_PATH):
+    """
+    Último snapshot JSON gravado (o ciclo roda em outro processo), ou None.
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"[!] Snapshot de métricas ilegível ({e}).")
+        return None
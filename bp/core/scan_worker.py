@@ -0,0 +1,174 @@
+# bp/core/scan_worker.py
+# -*- coding: utf-8 -*-
+
+"""
+Worker de varredura do BP-Fênix em segundo plano, compartilhado por todas
+as sessões do dashboard (uma instância por processo — no Streamlit via
+st.cache_resource).
+
+    worker = ScanWorker()
+    worker.request_scan("IBOV", tickers)   # dispara (ou junta-se) a uma varredura
+    worker.progress()                      # estado atual p/ a página fazer polling
+    worker.latest("IBOV")                  # último snapshot publicado
+
+Cliques simultâneos no mesmo universo se fundem em UMA varredura; um
+pedido para outro universo durante a execução fica na fila (o mais
+recente vence) e roda logo em seguida.
+"""
+
+import threading
+import time
+from datetime import datetime
+
+from bp.bp_runner import run_scan
+from bp.core.selectors import select_top_assets
+
+
+def _api_ticker(ticker):
+    return ticker if ticker.endswith(".SA") else ticker + ".SA"
+
+
+class ScanWorker:
+    """
+    Executa varreduras em uma thread própria e publica o resultado de
+    cada universo como snapshot com horário.
+    """
+
+    def __init__(self, scan=run_scan):
+        self._scan = scan
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pending = None                 # (chave, tickers) aguardando
+        self._snapshots = {}                 # chave → snapshot publicado
+        self._progress = {"status": "idle", "key": None, "done": 0, "failed": 0, "total": 0,
+                          "started_at": None, "finished_at": None, "error": None}
+
+    # --------------------------------------------------------
+    def request_scan(self, key, tickers):
+        """
+        Pede uma varredura de `tickers` (chave = nome do universo/filtro).
+
+        Retorna:
+            "started"   → nova varredura iniciada
+            "joined"    → já havia uma varredura desse universo rodando
+            "queued"    → outra varredura roda agora; esta vem em seguida
+        """
+        with self._lock:
+            running = self._thread is not None and self._thread.is_alive()
+
+            if running and self._progress["key"] == key:
+                return "joined"
+
+            if running:
+                self._pending = (key, list(tickers))
+                return "queued"
+
+            self._start(key, list(tickers))
+            return "started"
+
+    def _start(self, key, tickers):
+        # chamado com self._lock adquirido
+        self._progress = {"status": "running", "key": key, "done": 0, "failed": 0, "total": len(tickers),
+                          "started_at": time.time(), "finished_at": None, "error": None}
+        self._thread = threading.Thread(
+            target=self._run, args=(key, tickers), name="bp-fenix-scan", daemon=True
+        )
+        self._thread.start()
+
+    # --------------------------------------------------------
+    # done = pontuados + falhas (chega a total); failed = só as falhas
+    def _on_score(self, ticker, info):
+        with self._lock:
+            self._progress["done"] += 1
+            self._progress["last_ticker"] = ticker
+
+    def _on_fail(self, ticker, motivo):
+        with self._lock:
+            self._progress["done"] += 1
+            self._progress["failed"] += 1
+            self._progress["last_ticker"] = ticker
+
+    def _run(self, key, tickers):
+        error = None
+        try:
+            api = {_api_ticker(t): t for t in tickers}
+            results, falhas = self._scan(
+                list(api), on_score=self._on_score, on_fail=self._on_fail, keep_frame=True
+            )
+
+            # chaves voltam ao formato da lista de origem (sem .SA no CSV)
+            results = {api[t]: info for t, info in results.items()}
+            for ticker, info in results.items():
+                info.ticker = ticker
+            falhas = {api.get(t, t): motivo for t, motivo in falhas.items()}
+
+            snapshot = {
+                "key": key,
+                "raw_results": results,
+                "top_assets": select_top_assets(results),
+                "falhas": falhas,
+                "total": len(tickers),
+                "finished_at": time.time(),
+            }
+        except Exception as e:
+            print(f"[ERRO] Varredura {key} falhou: {e}")
+            snapshot = None
+            error = str(e)
+
+        with self._lock:
+            if snapshot is not None:
+                self._snapshots[key] = snapshot
+            self._progress.update(
+                status="error" if error else "done",
+                finished_at=time.time(),
+                error=error,
+            )
+
+            pending, self._pending = self._pending, None
+            if pending is not None:
+                self._start(*pending)
+
+    # --------------------------------------------------------
+    def is_running(self):
+        with self._lock:
+            return self._thread is not None and self._thread.is_alive()
+
+    def progress(self):
+        """
+        Cópia do estado atual: status, key, done (pontuados + falhas),
+        failed, total, started_at, finished_at, error, pending (chave na
+        fila ou None).
+        """
+        with self._lock:
+            info = dict(self._progress)
+            info["pending"] = self._pending[0] if self._pending else None
+            return info
+
+    def latest(self, key):
+        """
+        Último snapshot publicado para `key` (ou None).
+        """
+        with self._lock:
+            return self._snapshots.get(key)
+
+    def wait(self, timeout=None):
+        """
+        Bloqueia até não haver varredura rodando (inclui a fila).
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            with self._lock:
+                thread = self._thread
+            if thread is None or not thread.is_alive():
+                with self._lock:
+                    if self._thread is thread:
+                        return True
+                continue
+            remaining = None if deadline is None else max(0.0, deadline - time.time())
+            thread.join(remaining)
+            if deadline is not None and time.time() >= deadline:
+                return not self.is_running()
+
+
+def format_timestamp(ts):
+    return datetime.fromtimestamp(ts).strftime("%d/%m/%Y %H:%M:%S") if ts else "—"
@@ -1,54 +1,137 @@
-import schedule
+import threading
 import time
-from datetime import datetime
-from bp.bp_runner import run_cycle
+from datetime import timedelta
+
+from bp.core import configs
+from bp.core.market_calendar import B3Calendar
+
+# Maior cochilo contínuo: o relógio é reconferido pelo menos de hora em
+# hora (suspensão da máquina, ajuste de relógio)
+MAX_SLEEP_SECONDS = 3600
 
 
 # ------------------------------------------------------------
 # Verificar se estamos no horário do pregão
 # ------------------------------------------------------------
-def market_is_open():
+def market_is_open(now=None, calendar=None):
     """
-    Retorna True se estiver dentro do horário do pregão.
-    Horário aproximado: 10h às 17h (Brasília).
+    Retorna True se estiver dentro do horário do pregão da B3
+    (fuso America/Sao_Paulo, feriados e horários especiais inclusos).
     """
-    now = datetime.now()
-    hour = now.hour
-    minute = now.minute
+    calendar = calendar or B3Calendar()
+    return calendar.is_open(now)
 
-    # Ajustável se quiser maior precisão
-    return (hour > 9 and hour < 17) or (hour == 17 and minute <= 0)
+
+# ------------------------------------------------------------
+# Cadência alinhada ao relógio
+# ------------------------------------------------------------
+def next_tick(now, interval_minutes=None):
+    """
+    Próximo múltiplo de `interval_minutes` no relógio (ex.: 10:15, 10:30…)
+    estritamente depois de `now`. Sem deriva: não depende de quanto o
+    ciclo anterior demorou.
+    """
+    interval_minutes = interval_minutes or configs.CYCLE_INTERVAL_MINUTES
+
+    base = now.replace(second=0, microsecond=0)
+    minutes = base.hour * 60 + base.minute
+    tick = base - timedelta(minutes=minutes % interval_minutes)
+
+    while tick <= now:
+        tick += timedelta(minutes=interval_minutes)
+    return tick
+
+
+def next_run(now, calendar, interval_minutes=None):
+    """
+    Próximo horário de ciclo: o próximo tick se ele cair dentro do pregão,
+    senão a abertura da próxima sessão.
+    """
+    tick = next_tick(now, interval_minutes)
+    if calendar.is_open(tick):
+        return tick
+    return calendar.next_open(now)
 
 
 # ------------------------------------------------------------
 # Função executada pelo agendador
 # ------------------------------------------------------------
-def scheduled_task():
+_cycle_lock = threading.Lock()
+
+
+def scheduled_task(run=None):
     """
-    Executa o ciclo do BP-Fênix somente se o mercado estiver aberto.
+    Executa o ciclo do BP-Fênix sem sobreposição: se o ciclo anterior
+    ainda estiver rodando, este tick é pulado.
+
+    Padrão: run_intraday_cycle (score incremental pelo IndicatorState de
+    cada ticker, semeado no 1º ciclo do dia).
+
+    Retorna True se o ciclo rodou.
     """
-    print("\n⏱️  Verificando horário do mercado...")
+    if run is None:
+        from bp.bp_runner import run_intraday_cycle
+        run = run_intraday_cycle
 
-    if market_is_open():
+    if not _cycle_lock.acquire(blocking=False):
+        print("⚠️ Ciclo anterior ainda em execução — tick pulado.")
+        return False
+
+    try:
         print("🟢 Mercado aberto — executando ciclo BP-Fênix.")
-        run_cycle()
-    else:
-        print("🔴 Mercado fechado — aguardando próximo horário.")
+        run()
+        return True
+    except Exception as e:
+        print(f"[ERRO] Ciclo BP-Fênix falhou: {e}")
+        return False
+    finally:
+        _cycle_lock.release()
+
+
+def _sleep_until(target, calendar, sleep):
+    while True:
+        remaining = (target - calendar.now()).total_seconds()
+        if remaining <= 0:
+            return
+        sleep(min(remaining, MAX_SLEEP_SECONDS))
 
 
 # ------------------------------------------------------------
-# Agendamento a cada 15 minutos
+# Agendamento alinhado ao relógio (padrão: a cada 15 minutos)
 # ------------------------------------------------------------
-def start_scheduler():
+def start_scheduler(calendar=None, interval_minutes=None, run=None, sleep=time.sleep, max_cycles=None):
     """
-    Inicia o scheduler para rodar o BP a cada 15 minutos.
+    Inicia o scheduler do BP-Fênix.
+
+    - ticks alinhados ao relógio (10:00, 10:15, …) no fuso da B3
+    - fora do pregão (noite, fim de semana, feriado) dorme direto até a
+      próxima abertura, sem polling
+    - cada ciclo roda em thread própria; tick que encontra o ciclo
+      anterior ainda rodando é pulado (sem sobreposição)
+
+    `calendar`, `run` e `sleep` podem ser injetados (testes / outro
+    mercado); `max_cycles` encerra após N ticks.
     """
+    calendar = calendar or B3Calendar()
+    interval_minutes = interval_minutes or configs.CYCLE_INTERVAL_MINUTES
+
     print("⏳ Iniciando scheduler do BP-Fênix...")
-    schedule.every(15).minutes.do(scheduled_task)
 
-    print("🟦 Scheduler ativo. Aguardando ciclo...")
+    # ciclo imediato se o pregão já estiver aberto
+    now = calendar.now()
+    target = now if calendar.is_open(now) else next_run(now, calendar, interval_minutes)
 
-    while True:
-        schedule.run_pending()
-        time.sleep(1)
+    ticks = 0
+    while max_cycles is None or ticks < max_cycles:
+        if target > calendar.now():
+            print(f"🟦 Próximo ciclo: {target:%d/%m %H:%M} ({calendar.tz.key})")
+            _sleep_until(target, calendar, sleep)
+
+        threading.Thread(
+            target=scheduled_task, args=(run,), name="bp-fenix-cycle", daemon=True
+        ).start()
+        ticks += 1
 
+        # a partir do relógio, não do tick anterior: depois de suspensão /
+        # sono longo os ticks perdidos são pulados, não disparados em rajada
+        target = next_run(max(target, calendar.now()), calendar, interval_minutes)
@@ -1,6 +1,9 @@
 # bp/core/scoring.py
 # -*- coding: utf-8 -*-
 
+import numpy as np
+
+
 def calculate_score(criteria_dict):
     """
     Calcula o score binário + o Fênix Strength (FS)
@@ -47,3 +50,35 @@ def calculate_score(criteria_dict):
         "volume_norm": volume_norm,
         "details": criteria_dict,
     }
+
+
+# ------------------------------------------------------------
+# SCORE VETORIZADO DO UNIVERSO
+# ------------------------------------------------------------
+def calculate_universe_score(universe_criteria):
+    """
+    calculate_score para todos os tickers de uma vez, sobre a saída de
+    criteria_engine.evaluate_universe. Mesmas contas e mesma ordem de soma
+    do FS → mesmos valores por ticker.
+    """
+    norms = {name: c["norm"] for name, c in universe_criteria.items()}
+
+    score = sum(c["status"].astype(np.int64) for c in universe_criteria.values())
+
+    fs = (
+        norms["tendencia"] +
+        norms["momentum"] +
+        norms["volatilidade"] +
+        norms["sinal_tecnico"] +
+        (2 * norms["volume"])      # <<<<<< PESO 2
+    )
+
+    return {
+        "score": score,
+        "fs": fs,
+        "tendencia_norm": norms["tendencia"],
+        "momentum_norm": norms["momentum"],
+        "volatilidade_norm": norms["volatilidade"],
+        "sinal_norm": norms["sinal_tecnico"],
+        "volume_norm": norms["volume"],
+    }
@@ -1,66 +1,113 @@
 # bp/core/selectors.py
 # -*- coding: utf-8 -*-
 
+import heapq
+import itertools
+
 from bp.core.trade_engine import generate_trade_setup
 
-def select_top_assets(results, score_min=3, top_n=5):
+
+# ------------------------------------------------------------
+# TOP-N EM STREAMING (heap limitado)
+# ------------------------------------------------------------
+class TopNSelector:
     """
-    Seleciona os melhores ativos usando o FS (com Volume PESO 2)
-    e gera o Setup Operacional (Modelo C).
+    Mantém os `top_n` melhores ativos enquanto a varredura ainda roda.
+
+    Chave do ranking: (fs, momentum_norm, tendencia_norm, volume_norm),
+    decrescente. Empate total → vence quem tem `seq` menor (ordem do
+    universo), igual ao sort estável da versão anterior.
+
+    O setup (Modelo C) só é gerado para quem entra no heap; ativo sem
+    setup válido é descartado e o ranking segue para o próximo.
     """
 
-    scored_assets = []
+    def __init__(self, score_min=3, top_n=5):
+        self.score_min = score_min
+        self.top_n = top_n
+        self._heap = []                  # min-heap: raiz = pior sobrevivente
+        self._counter = itertools.count()
 
-    for ticker, info in results.items():
+    def __len__(self):
+        return len(self._heap)
+
+    @staticmethod
+    def _key(info, seq):
+        details = info["details"]
+        return (
+            info.get("fs", 0),
+            details["momentum"]["norm"],
+            details["tendencia"]["norm"],
+            details["volume"]["norm"],
+            -seq,
+        )
+
+    def push(self, ticker, info, seq=None):
+        """
+        Oferece um ativo pontuado ao ranking.
+        Retorna True se ele entrou no top atual.
+        """
+        seq = next(self._counter) if seq is None else seq
 
         # filtro por score binário mínimo
-        if info.get("score", 0) < score_min:
-            continue
+        if info.get("score", 0) < self.score_min or self.top_n <= 0:
+            return False
 
         details = info.get("details", {})
         if not details:
-            continue
+            return False
 
+        key = self._key(info, seq)
+        if len(self._heap) >= self.top_n and key <= self._heap[0][0]:
+            return False
+
+        # df só é lido (ou remontado, no TickerScore) para quem pode entrar
         df = details.get("df")
         if df is None or df.empty:
-            continue
-
-        # Norms individuais
-        n_tend = details["tendencia"]["norm"]
-        n_mom  = details["momentum"]["norm"]
-        n_vol  = details["volatilidade"]["norm"]
-        n_sig  = details["sinal_tecnico"]["norm"]
-        n_volu = details["volume"]["norm"]
+            return False
 
-        # 🔥 FS já vem do SCORING (com Volume PESO 2)
+        # Setup só para quem sobrevive no heap
         fs = info.get("fs", 0)
-
-        # Monta setup operacional
         trade_setup = generate_trade_setup(df, fs)
         if trade_setup is None:
-            continue
+            return False
 
-        scored_assets.append({
+        asset = {
             "ticker": ticker,
             "score": info["score"],
             "fs": fs,
-            "tendencia_norm": n_tend,
-            "momentum_norm": n_mom,
-            "volatilidade_norm": n_vol,
-            "sinal_norm": n_sig,
-            "volume_norm": n_volu,
+            "tendencia_norm": details["tendencia"]["norm"],
+            "momentum_norm": details["momentum"]["norm"],
+            "volatilidade_norm": details["volatilidade"]["norm"],
+            "sinal_norm": details["sinal_tecnico"]["norm"],
+            "volume_norm": details["volume"]["norm"],
             "details": details,
             "trade": trade_setup,
-        })
+        }
 
-    # Ranking final oficial
-    scored_assets.sort(
-        key=lambda x: (
-            -x["fs"],
-            -x["momentum_norm"],
-            -x["tendencia_norm"],
-            -x["volume_norm"],
-        )
-    )
+        if len(self._heap) < self.top_n:
+            heapq.heappush(self._heap, (key, asset))
+        else:
+            heapq.heapreplace(self._heap, (key, asset))
+        return True
+
+    def snapshot(self):
+        """
+        Top atual, do melhor para o pior (pode ser chamado a qualquer
+        momento da varredura).
+        """
+        return [asset for _, asset in sorted(self._heap, key=lambda x: x[0], reverse=True)]
+
+
+def select_top_assets(results, score_min=3, top_n=5):
+    """
+    Seleciona os melhores ativos usando o FS (com Volume PESO 2)
+    e gera o Setup Operacional (Modelo C).
+    """
+    selector = TopNSelector(score_min=score_min, top_n=top_n)
+
+    for seq, (ticker, info) in enumerate(results.items()):
+        selector.push(ticker, info, seq)
 
-    return scored_assets[:top_n]
+    # Ranking final oficial
+    return selector.snapshot()
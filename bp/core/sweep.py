@@ -0,0 +1,413 @@
+# bp/core/sweep.py
+# -*- coding: utf-8 -*-
+
+"""
+Sweep de parâmetros do BP-Fênix sobre o histórico do candle store.
+
+Os limites hoje fixos no código viram parâmetros do backtest
+(bp.core.backtest):
+
+    volume_tolerancia   VOLUME_TOLERANCIA (criteria_engine)
+    atr_pct_max         corte de 6% do check_volatility
+    score_min           filtro do select_top_assets
+    max_lookback        MAX_LOOKBACK_SWINGS (trade_engine)
+    rr_max              RR_MAX
+    stop_base/stop_fs   StopDist   = ATR * (stop_base + (1 - fs_norm) * stop_fs)
+    target_base/target_fs TargetDist = ATR * (target_base + fs_norm * target_fs)
+
+Tudo que NÃO depende dos parâmetros (indicadores, janelas, norms, FS,
+máscaras de swing) é calculado UMA vez no processo principal e publicado
+em shared memory; os workers do pool só se anexam ao bloco (nada de
+pickle de arrays por tarefa) e cada tarefa recebe apenas um dict de
+parâmetros.
+
+Uso:
+    python -m bp.core.sweep IBOV --random 2000 --workers 8
+    python -m bp.core.sweep IBOV --grid
+"""
+
+import argparse
+import itertools
+import os
+import sys
+import time
+from multiprocessing import Pool, shared_memory
+
+import numpy as np
+import pandas as pd
+
+from bp.core import backtest as bt
+from bp.core.criteria_engine import (
+    ATR_PCT_MAX,
+    VOLUME_TOLERANCIA,
+    _safe_ratio,
+    evaluate_universe,
+)
+from bp.core.scoring import calculate_universe_score
+from bp.core.trade_engine import (
+    MAX_LOOKBACK_SWINGS,
+    RR_MAX,
+    STOP_ATR_BASE,
+    STOP_ATR_FS,
+    TARGET_ATR_BASE,
+    TARGET_ATR_FS,
+)
+from bp.core.universe_engine import (
+    UniverseBlock,
+    stack_universe,
+    compute_universe_indicators,
+    _finite_or_nan,
+)
+
+SWEEP_DIR = os.path.join("data", "sweeps")
+
+# valores em produção (linha de referência do sweep)
+DEFAULT_PARAMS = {
+    "volume_tolerancia": VOLUME_TOLERANCIA,
+    "atr_pct_max": ATR_PCT_MAX,
+    "score_min": bt.SCORE_MIN,
+    "max_lookback": MAX_LOOKBACK_SWINGS,
+    "rr_max": RR_MAX,
+    "stop_base": STOP_ATR_BASE,
+    "stop_fs": STOP_ATR_FS,
+    "target_base": TARGET_ATR_BASE,
+    "target_fs": TARGET_ATR_FS,
+}
+
+# espaço de busca: lista → valores discretos; tupla (min, max) → uniforme
+# (o grid só aceita listas)
+PARAM_SPACE = {
+    "volume_tolerancia": [0.0, 0.02, 0.05, 0.10],
+    "atr_pct_max": [4, 5, 6, 8],
+    "score_min": [3, 4, 5],
+    "max_lookback": [5, 10, 80],
+    "rr_max": [2.0, 2.5, 3.0, 4.0],
+    "stop_base": [0.8, 1.2, 1.6],
+    "stop_fs": [1.0, 1.8, 2.5],
+    "target_base": [1.5, 2.0, 3.0],
+    "target_fs": [2.0, 3.0, 4.0],
+}
+
+# colunas do bloco usadas pela simulação (matrizes barras × tickers)
+_BAR_COLUMNS = ["Open", "High", "Low", "Close", "ATR"]
+
+
+# ------------------------------------------------------------
+# ESPAÇO DE PARÂMETROS
+# ------------------------------------------------------------
+def grid(space=PARAM_SPACE):
+    """
+    Todas as combinações (produto cartesiano) do espaço.
+    """
+    names = list(space)
+    for values in itertools.product(*(space[n] for n in names)):
+        yield dict(DEFAULT_PARAMS, **dict(zip(names, values)))
+
+
+def sample(space=PARAM_SPACE, n=1000, seed=0):
+    """
+    `n` combinações sorteadas (random search).
+    """
+    rng = np.random.default_rng(seed)
+    out = []
+    for _ in range(n):
+        params = dict(DEFAULT_PARAMS)
+        for name, values in space.items():
+            if isinstance(values, tuple):
+                params[name] = float(rng.uniform(*values))
+            else:
+                params[name] = values[rng.integers(len(values))]
+        out.append(params)
+    return out
+
+
+# ------------------------------------------------------------
+# SHARED MEMORY — um segmento com vários arrays
+# ------------------------------------------------------------
+class SharedArrays:
+    """
+    Vários ndarrays em UM segmento de shared memory.
+
+    Processo principal: SharedArrays.create(arrays) → .spec
+    Workers:            SharedArrays.attach(spec)   → .arrays (views)
+    No fim, o dono chama .close() e .unlink().
+    """
+
+    def __init__(self, shm, layout, owner):
+        self.shm = shm
+        self.layout = layout
+        self.owner = owner
+        self.arrays = {
+            name: np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf, offset=offset)
+            for name, (offset, shape, dtype) in layout.items()
+        }
+
+    @classmethod
+    def create(cls, arrays):
+        layout, size = {}, 0
+        for name, arr in arrays.items():
+            arr = np.ascontiguousarray(arr)
+            size = -(-size // 64) * 64                    # alinhamento de 64 bytes
+            layout[name] = (size, arr.shape, arr.dtype.str)
+            size += arr.nbytes
+
+        shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        out = cls(shm, layout, owner=True)
+        for name, arr in arrays.items():
+            out.arrays[name][...] = arr
+        return out
+
+    @classmethod
+    def attach(cls, spec):
+        name, layout = spec
+        return cls(shared_memory.SharedMemory(name=name), layout, owner=False)
+
+    @property
+    def spec(self):
+        return self.shm.name, self.layout
+
+    def close(self):
+        self.arrays = {}
+        self.shm.close()
+
+    def unlink(self):
+        if self.owner:
+            self.shm.unlink()
+
+
+# ------------------------------------------------------------
+# PREPARAÇÃO (processo principal, uma vez)
+# ------------------------------------------------------------
+def prepare(frames):
+    """
+    Calcula tudo que independe dos parâmetros.
+
+    Retorna:
+        (arrays, meta) — arrays vão para a shared memory; meta (pequeno)
+        segue no initializer do pool.
+    """
+    block = compute_universe_indicators(stack_universe(frames))
+    if not block.tickers:
+        return None, None
+
+    windows, counts, valid, rows = bt.history_windows(block)
+    universe = evaluate_universe(windows, counts, details=False)
+    scores = calculate_universe_score(universe)
+
+    # parte do score que não depende de volume_tolerancia / atr_pct_max
+    fixed = (
+        universe["tendencia"]["status"].astype(np.int8)
+        + universe["momentum"]["status"]
+        + universe["sinal_tecnico"]["status"]
+    )
+
+    # entradas dos dois critérios parametrizados (NaN = inválido → False)
+    last = {col: v[-1] for col, v in windows.items()}
+    with np.errstate(invalid="ignore"):
+        deviation = _safe_ratio(last["Volume"] - last["Volume_MM14"], last["Volume_MM14"])
+
+    high_mask, low_mask = bt.swing_masks(block)
+
+    arrays = {col: block.arrays[col] for col in _BAR_COLUMNS}
+    arrays.update({
+        "dates": bt._date_matrix(block),
+        "swing_high": high_mask,
+        "swing_low": low_mask,
+        "rows": rows,
+        "valid": valid,
+        "score_fixed": fixed,
+        "atr_pct": _finite_or_nan(last["ATR_pct"]),
+        "vol_dev": deviation,
+        "fs": scores["fs"],
+        "momentum_norm": scores["momentum_norm"],
+        "tendencia_norm": scores["tendencia_norm"],
+        "volume_norm": scores["volume_norm"],
+    })
+
+    meta = {"tickers": block.tickers, "lengths": block.lengths}
+    return arrays, meta
+
+
+# ------------------------------------------------------------
+# AVALIAÇÃO DE UMA COMBINAÇÃO
+# ------------------------------------------------------------
+def score_items(a, volume_tolerancia, atr_pct_max):
+    """
+    Score binário de cada (dia, ticker) para os limites informados —
+    igual a evaluate_universe(..., volume_tolerancia, atr_pct_max).
+    """
+    with np.errstate(invalid="ignore"):
+        return (
+            a["score_fixed"]
+            + (a["atr_pct"] <= atr_pct_max)
+            + (a["vol_dev"] >= -volume_tolerancia)
+        )
+
+
+def metrics(trades):
+    """
+    Resumo compacto de um backtest (uma linha da tabela do sweep).
+    """
+    r = trades["r"].dropna().to_numpy() if len(trades) else np.array([])
+    gains, losses = r[r > 0].sum(), -r[r < 0].sum()
+    return {
+        "sinais": len(trades),
+        "trades": len(r),
+        "acerto_%": 100 * (r > 0).mean() if len(r) else np.nan,
+        "alvo_%": 100 * (trades["status"] == "alvo").sum() / len(r) if len(r) else np.nan,
+        "expectativa_R": r.mean() if len(r) else np.nan,
+        "R_total": r.sum(),
+        "profit_factor": gains / losses if losses > 0 else np.nan,
+        "rr_plan_medio": trades["rr_planejado"].mean() if len(trades) else np.nan,
+        "barras_medias": trades.loc[trades["r"].notna(), "barras"].mean() if len(r) else np.nan,
+    }
+
+
+def evaluate_params(a, block, params, top_n=bt.TOP_N):
+    """
+    Backtest de uma combinação sobre os arrays preparados.
+    """
+    scores = {
+        "valid": a["valid"],
+        "score": score_items(a, params["volume_tolerancia"], params["atr_pct_max"]),
+        "fs": a["fs"],
+        "momentum_norm": a["momentum_norm"],
+        "tendencia_norm": a["tendencia_norm"],
+        "volume_norm": a["volume_norm"],
+    }
+
+    signals = bt.select_signals(
+        block, scores, a["rows"], params["score_min"], top_n, dates=a["dates"]
+    )
+    setups = bt.build_setups(
+        block, signals,
+        max_lookback=params["max_lookback"],
+        masks=(a["swing_high"], a["swing_low"]),
+        rr_max=params["rr_max"],
+        stop_base=params["stop_base"],
+        stop_fs=params["stop_fs"],
+        target_base=params["target_base"],
+        target_fs=params["target_fs"],
+    )
+    trades = bt.simulate(block, signals, setups)
+    return dict(params, **metrics(trades))
+
+
+# ------------------------------------------------------------
+# WORKERS
+# ------------------------------------------------------------
+_WORKER = {}
+
+
+def _init_worker(spec, meta, top_n):
+    shared = SharedArrays.attach(spec)
+    _WORKER["shared"] = shared
+    _WORKER["top_n"] = top_n
+    _WORKER["block"] = UniverseBlock(
+        tickers=meta["tickers"],
+        frames={},
+        lengths=meta["lengths"],
+        arrays={col: shared.arrays[col] for col in _BAR_COLUMNS},
+    )
+
+
+def _run_task(params):
+    return evaluate_params(_WORKER["shared"].arrays, _WORKER["block"], params, _WORKER["top_n"])
+
+
+# ------------------------------------------------------------
+# API PRINCIPAL
+# ------------------------------------------------------------
+def run_sweep(frames, combos, workers=None, top_n=bt.TOP_N, chunksize=8):
+    """
+    Avalia cada dict de `combos` (ver grid / sample) sobre o histórico.
+
+    Retorna:
+        DataFrame com uma linha por combinação (parâmetros + métricas),
+        ordenado por expectativa em R (decrescente). A combinação de
+        produção (DEFAULT_PARAMS) é sempre incluída como referência.
+    """
+    combos = [DEFAULT_PARAMS] + [c for c in combos if c != DEFAULT_PARAMS]
+
+    arrays, meta = prepare(frames)
+    if arrays is None:
+        return pd.DataFrame()
+
+    shared = SharedArrays.create(arrays)
+    del arrays
+    try:
+        if workers == 0:
+            _init_worker(shared.spec, meta, top_n)
+            rows = [_run_task(params) for params in combos]
+            _WORKER["shared"].close()
+            _WORKER.clear()
+        else:
+            with Pool(workers, initializer=_init_worker, initargs=(shared.spec, meta, top_n)) as pool:
+                rows = pool.map(_run_task, combos, chunksize=chunksize)
+    finally:
+        shared.close()
+        shared.unlink()
+
+    table = pd.DataFrame(rows)
+    table["producao"] = [True] + [False] * (len(table) - 1)
+    return compact(table).sort_values("expectativa_R", ascending=False, ignore_index=True)
+
+
+def compact(table):
+    """
+    Métricas float64 → float32 e contagens → int32 (tabelas de milhares
+    de linhas). Colunas de parâmetros ficam como vieram.
+    """
+    out = table.copy()
+    for col in out.columns:
+        if col in DEFAULT_PARAMS:
+            continue
+        kind = out[col].dtype.kind
+        if kind == "f":
+            out[col] = out[col].astype(np.float32)
+        elif kind in "iu":
+            out[col] = out[col].astype(np.int32)
+    return out
+
+
+def save_results(table, universe="IBOV", directory=SWEEP_DIR):
+    """
+    Grava a tabela do sweep em parquet (data/sweeps/<universo>_<data>.parquet).
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{universe}_{time.strftime('%Y%m%d_%H%M%S')}.parquet")
+    table.to_parquet(path, index=False)
+    return path
+
+
+def main(argv=None):
+    from bp.core.universe_store import get_universe
+
+    parser = argparse.ArgumentParser(description="Sweep de parâmetros do BP-Fênix")
+    parser.add_argument("universe", nargs="?", default="IBOV")
+    parser.add_argument("--grid", action="store_true", help="grid completo de PARAM_SPACE")
+    parser.add_argument("--random", type=int, default=1000, help="nº de combinações sorteadas")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None, help="0 = sem pool")
+    parser.add_argument("--top", type=int, default=20, help="linhas exibidas")
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+
+    frames = bt.load_history(get_universe(args.universe))
+    if not frames:
+        print(f"[!] Nenhum candle em cache para {args.universe} — rode um ciclo antes.")
+        return
+
+    combos = list(grid()) if args.grid else sample(n=args.random, seed=args.seed)
+
+    t0 = time.perf_counter()
+    table = run_sweep(frames, combos, workers=args.workers)
+    elapsed = time.perf_counter() - t0
+
+    path = save_results(table, args.universe)
+    print(f"\n🟦 SWEEP BP-FÊNIX — {args.universe}: {len(table)} combinações, "
+          f"{len(frames)} tickers em {elapsed:.1f}s → {path}\n")
+    print(table.head(args.top).to_string(index=False, float_format=lambda x: f"{x:.3f}"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+# bp/core/ticker_score.py
+# -*- coding: utf-8 -*-
+
+"""
+Representação compacta do resultado de UM ticker.
+
+Em vez de guardar o DataFrame tail(20) inteiro em details["df"], o
+TickerScore guarda só o bloco numérico float64 (20 × colunas) e remonta
+o DataFrame sob demanda (gráficos / setup).
+
+É um Mapping completo com as mesmas chaves do dict de calculate_score
+(info["score"], info["details"]["tendencia"]["norm"],
+info["details"]["df"], info.get("fs"), dict(info), items()...), então
+substitui esse dict sem mudar os consumidores.
+
+Observação: o bloco fica em float64 — preços e ATR do df remontado
+alimentam generate_trade_setup, e entrada/stop/alvo precisam ser os
+mesmos do df original.
+"""
+
+from collections.abc import Mapping
+
+import numpy as np
+import pandas as pd
+
+_FIELDS = (
+    "score", "fs", "passed", "failed",
+    "tendencia_norm", "momentum_norm", "volatilidade_norm", "sinal_norm", "volume_norm",
+)
+_KEYS = _FIELDS + ("details",)
+
+
+class LazyDetails(dict):
+    """
+    details do score (critérios) com a chave "df" remontada sob demanda
+    por `frame()` (None → sem df: "df" não está em details).
+    """
+
+    __slots__ = ("_frame",)
+
+    def __init__(self, criteria, frame=None):
+        super().__init__(criteria)
+        self._frame = frame
+
+    def _lazy(self, key):
+        return key == "df" and self._frame is not None and not dict.__contains__(self, "df")
+
+    def __getitem__(self, key):
+        if self._lazy(key):
+            return self._frame()
+        return super().__getitem__(key)
+
+    def get(self, key, default=None):
+        if self._lazy(key):
+            return self._frame()
+        return super().get(key, default)
+
+    def __contains__(self, key):
+        return self._lazy(key) or super().__contains__(key)
+
+
+class TickerScore(Mapping):
+    """
+    Resultado compacto de um ticker: score, FS, norms, critérios e o
+    bloco numérico das últimas linhas (float64).
+    """
+
+    __slots__ = _FIELDS + ("ticker", "details", "block", "columns", "index", "index_name")
+
+    def __init__(self, score_info, df=None, ticker=None):
+        for field in _FIELDS:
+            setattr(self, field, score_info[field])
+
+        self.ticker = ticker
+
+        if df is None:
+            df = score_info["details"].get("df")
+        self._pack(df)
+
+        criteria = {k: v for k, v in score_info["details"].items() if k != "df"}
+        self.details = LazyDetails(criteria, self.frame if self.block is not None else None)
+
+    # --------------------------------------------------------
+    def _pack(self, df):
+        if df is None or len(df) == 0:
+            self.block = None
+            self.columns = ()
+            self.index = None
+            self.index_name = None
+            return
+
+        numeric = [c for c in df.columns if pd.api.types.is_numeric_dtype(df[c])]
+        self.columns = tuple(numeric)
+        self.block = np.ascontiguousarray(df[numeric].to_numpy(dtype=np.float64))
+        self.index = df.index.to_numpy().copy()   # sem referência ao histórico
+        self.index_name = df.index.name
+
+    def frame(self):
+        """
+        DataFrame (float64) remontado do bloco compacto — None se não houver.
+        """
+        if self.block is None:
+            return None
+        df = pd.DataFrame(
+            self.block.copy(),          # quem altera o df não altera o bloco
+            columns=list(self.columns),
+            index=pd.Index(self.index, name=self.index_name),
+        )
+        return df
+
+    # --------------------------------------------------------
+    # Mapping (mesmas chaves da saída de calculate_score)
+    # --------------------------------------------------------
+    def __getitem__(self, key):
+        if key in _KEYS:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(_KEYS)
+
+    def __len__(self):
+        return len(_KEYS)
+
+    def __contains__(self, key):
+        return key in _KEYS
+
+    def to_dict(self, with_frame=False):
+        """
+        dict no formato de calculate_score (df incluso se with_frame).
+        """
+        out = {field: getattr(self, field) for field in _FIELDS}
+        out["details"] = dict(self.details)
+        if with_frame:
+            out["details"]["df"] = self.frame()
+        return out
+
+    def __repr__(self):
+        return f"TickerScore({self.ticker!r}, score={self.score}, fs={self.fs:.3f})"
+
+    def nbytes(self):
+        """
+        Bytes do bloco numérico (para diagnóstico de memória).
+        """
+        return 0 if self.block is None else self.block.nbytes
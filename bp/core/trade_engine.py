@@ -7,6 +7,10 @@ Engine de geração de setups do Projeto Fênix (MODELO C).
 Função principal:
     generate_trade_setup(df, fs_score)
 
+Em lote (lista ranqueada inteira, sem chamada por ticker):
+    generate_trade_setups(frames, fs_scores)
+    generate_trade_setups_batch(close, high, low, atr, ...)  → arrays
+
 - df: DataFrame com candles + indicadores (inclui ATR real).
 - fs_score: Fênix Strength (0 a 5).
 
@@ -22,6 +26,7 @@ Retorna:
 """
 
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 
 # ============================================================
 # 🔧 PARÂMETROS GERAIS
@@ -30,17 +35,125 @@ import numpy as np
 MAX_LOOKBACK_SWINGS = 80  # máx. de candles para trás ao procurar o último swing
 RR_MAX = 3.0              # risco/retorno máximo permitido (ex.: 3:1)
 
+# multiplicadores de ATR do MODELO C (ver generate_trade_setup)
+STOP_ATR_BASE = 1.2       # StopDist   = ATR * (STOP_ATR_BASE + (1 - fs_norm) * STOP_ATR_FS)
+STOP_ATR_FS = 1.8
+TARGET_ATR_BASE = 2.0     # TargetDist = ATR * (TARGET_ATR_BASE + fs_norm * TARGET_ATR_FS)
+TARGET_ATR_FS = 3.0
+
+FS_DEFAULT = 2.5           # FS não informado (None) → fs_norm 0.5
+
 # ============================================================
 # 🔍 DETECÇÃO DE SWING HIGH / SWING LOW (5 candles)
 # ============================================================
 
-def _find_last_swing_high(df, max_lookback: int = MAX_LOOKBACK_SWINGS, min_price: float | None = None):
+def swing_mask(values, kind="high", axis=-1):
+    """
+    Marca TODOS os swings clássicos de 5 candles de uma vez (janela
+    deslizante NumPy, sem loop):
+
+        high: v[i-2] < v[i-1] < v[i] > v[i+1] > v[i+2]
+        low:  v[i-2] > v[i-1] > v[i] < v[i+1] < v[i+2]
+
+    Aceita 1-D (um ticker) ou 2-D (vários tickers; `axis` = eixo do tempo).
+    Retorna máscara bool do mesmo formato, True no candle central do swing.
+    NaN nunca forma swing (comparações com NaN são falsas).
+    """
+    values = np.asarray(values, dtype="float64")
+    values = np.moveaxis(values, axis, -1)
+    mask = np.zeros(values.shape, dtype=bool)
+
+    if values.shape[-1] >= 5:
+        w = sliding_window_view(values, 5, axis=-1)
+        m2, m1, c, p1, p2 = (w[..., k] for k in range(5))
+        with np.errstate(invalid="ignore"):
+            if kind == "high":
+                hit = (m2 < m1) & (m1 < c) & (c > p1) & (p1 > p2)
+            else:
+                hit = (m2 > m1) & (m1 > c) & (c < p1) & (p1 < p2)
+        mask[..., 2:-2] = hit
+
+    return np.moveaxis(mask, -1, axis)
+
+
+def build_swing_index(df):
+    """
+    Índice de swings de UM ticker (posições + preços de todos os swings),
+    calculado uma vez e reaproveitado por todas as buscas do setup.
+    """
+    highs = df["High"].to_numpy(dtype="float64")
+    lows = df["Low"].to_numpy(dtype="float64")
+
+    high_pos = np.flatnonzero(swing_mask(highs, "high"))
+    low_pos = np.flatnonzero(swing_mask(lows, "low"))
+
+    return {
+        "n": len(highs),
+        "high_pos": high_pos,
+        "high_price": highs[high_pos],
+        "low_pos": low_pos,
+        "low_price": lows[low_pos],
+    }
+
+
+def _last_swing(index, kind, max_lookback, limit):
+    """
+    Último swing dentro do lookback que respeita o limite de preço
+    (high → preço >= limit, low → preço <= limit).
+    """
+    pos = index[f"{kind}_pos"]
+    price = index[f"{kind}_price"]
+
+    # mesma janela do loop original: i ∈ [max(2, n-max_lookback-1), n-3]
+    ok = pos >= max(2, index["n"] - max_lookback - 1)
+    if limit is not None:
+        ok &= (price >= limit) if kind == "high" else (price <= limit)
+
+    hits = np.flatnonzero(ok)
+    if len(hits) == 0:
+        return None
+    return float(price[hits[-1]])
+
+
+def last_swing_prices(values, kind="high", limits=None, max_lookback: int = MAX_LOOKBACK_SWINGS):
+    """
+    Último swing de CADA coluna de uma matriz (barras × tickers), com os
+    tickers alinhados à direita (último candle na última linha, NaN no
+    topo — formato do universe_engine).
+
+    `limits` (um por ticker): high → swing >= limite; low → swing <= limite.
+
+    Retorna:
+        ndarray com o preço do swing de cada ticker (NaN se não houver).
+    """
+    values = np.asarray(values, dtype="float64")
+    n_bars, n_tickers = values.shape
+
+    ok = swing_mask(values, kind, axis=0)
+    # lookback contado a partir do último candle (o topo é só NaN)
+    ok[: max(2, n_bars - max_lookback - 1)] = False
+
+    if limits is not None:
+        limits = np.asarray(limits, dtype="float64")
+        with np.errstate(invalid="ignore"):
+            ok &= (values >= limits) if kind == "high" else (values <= limits)
+
+    found = ok.any(axis=0)
+    last_row = n_bars - 1 - np.argmax(ok[::-1], axis=0)
+
+    out = np.full(n_tickers, np.nan)
+    out[found] = values[last_row[found], np.flatnonzero(found)]
+    return out
+
+
+def _find_last_swing_high(df, max_lookback: int = MAX_LOOKBACK_SWINGS, min_price: float | None = None, swings=None):
     """
     Procura o último swing de resistência (Swing High clássico de 5 candles):
 
         High[i-2] < High[i-1] < High[i] > High[i+1] > High[i+2]
 
     Se min_price for informado, só aceita swings com High[i] >= min_price.
+    `swings`: índice pronto (build_swing_index).
 
     Retorna:
         float(preço do swing) ou None se não encontrar.
@@ -48,34 +161,18 @@ def _find_last_swing_high(df, max_lookback: int = MAX_LOOKBACK_SWINGS, min_price
     if df is None or len(df) < 5:
         return None
 
-    highs = df["High"].to_numpy(dtype="float64")
-    n = len(highs)
-
-    # índice i deve permitir i-2, i-1, i, i+1, i+2 → i ∈ [2, n-3]
-    start = n - 3
-    min_i = max(2, n - max_lookback - 1)
-
-    for i in range(start, min_i - 1, -1):
-        h_m2 = highs[i - 2]
-        h_m1 = highs[i - 1]
-        h_0  = highs[i]
-        h_p1 = highs[i + 1]
-        h_p2 = highs[i + 2]
+    swings = build_swing_index(df) if swings is None else swings
+    return _last_swing(swings, "high", max_lookback, min_price)
 
-        if h_m2 < h_m1 < h_0 > h_p1 > h_p2:
-            if (min_price is None) or (h_0 >= min_price):
-                return float(h_0)
 
-    return None
-
-
-def _find_last_swing_low(df, max_lookback: int = MAX_LOOKBACK_SWINGS, max_price: float | None = None):
+def _find_last_swing_low(df, max_lookback: int = MAX_LOOKBACK_SWINGS, max_price: float | None = None, swings=None):
     """
     Procura o último swing de suporte (Swing Low clássico de 5 candles):
 
         Low[i-2] > Low[i-1] > Low[i] < Low[i+1] < Low[i+2]
 
     Se max_price for informado, só aceita swings com Low[i] <= max_price.
+    `swings`: índice pronto (build_swing_index).
 
     Retorna:
         float(preço do swing) ou None se não encontrar.
@@ -83,37 +180,22 @@ def _find_last_swing_low(df, max_lookback: int = MAX_LOOKBACK_SWINGS, max_price:
     if df is None or len(df) < 5:
         return None
 
-    lows = df["Low"].to_numpy(dtype="float64")
-    n = len(lows)
-
-    start = n - 3
-    min_i = max(2, n - max_lookback - 1)
-
-    for i in range(start, min_i - 1, -1):
-        l_m2 = lows[i - 2]
-        l_m1 = lows[i - 1]
-        l_0  = lows[i]
-        l_p1 = lows[i + 1]
-        l_p2 = lows[i + 2]
-
-        if l_m2 > l_m1 > l_0 < l_p1 < l_p2:
-            if (max_price is None) or (l_0 <= max_price):
-                return float(l_0)
-
-    return None
+    swings = build_swing_index(df) if swings is None else swings
+    return _last_swing(swings, "low", max_lookback, max_price)
 
 
 # ============================================================
 # ⚙️ MODELO C – Setup Profissional Adaptativo Fênix
 # ============================================================
 
-def generate_trade_setup(df, fs_score):
+def generate_trade_setup(df, fs_score, swings=None):
     """
     MODELO C — Setup Profissional Adaptativo Fênix
 
     Entradas:
         df        → dataframe completo com indicadores (inclui ATR real)
         fs_score  → Fênix Strength (0 a 5)
+        swings    → índice de swings pronto (opcional, ver build_swing_index)
 
     Retorna:
         dict com operação, entrada, SL, TP, R/R e métricas auxiliares.
@@ -175,11 +257,11 @@ def generate_trade_setup(df, fs_score):
     #   SHORT → min(Low  último candle, Close)
 
     if operacao == "LONG":
-        entrada = _find_last_swing_high(df, min_price=close)
+        entrada = _find_last_swing_high(df, min_price=close, swings=swings)
         if entrada is None:
             entrada = max(high_last, close)
     else:
-        entrada = _find_last_swing_low(df, max_price=close)
+        entrada = _find_last_swing_low(df, max_price=close, swings=swings)
         if entrada is None:
             entrada = min(low_last, close)
 
@@ -201,7 +283,7 @@ def generate_trade_setup(df, fs_score):
     #   - FS alto  → stop mais apertado (confiança maior)
     #   - FS baixo → stop mais largo (mercado mais "sujo")
 
-    stop_mult = 1.2 + (1.0 - fs_norm) * 1.8
+    stop_mult = STOP_ATR_BASE + (1.0 - fs_norm) * STOP_ATR_FS
     stop_dist = atr * stop_mult
 
     if operacao == "LONG":
@@ -219,7 +301,7 @@ def generate_trade_setup(df, fs_score):
     #   - FS alto  → alvo bem mais longo (tendência forte)
     #   - FS baixo → alvo mais curto (mercado frágil)
 
-    target_mult = 2.0 + fs_norm * 3.0
+    target_mult = TARGET_ATR_BASE + fs_norm * TARGET_ATR_FS
     target_dist = atr * target_mult
 
     # 🔒 Cap de Risco/Retorno máximo
@@ -257,3 +339,197 @@ def generate_trade_setup(df, fs_score):
         # "momentum_norm_candle": momentum_norm_candle,
         # "fs_norm": fs_norm,
     }
+
+
+# ============================================================
+# 📦 SETUPS EM LOTE (lista ranqueada inteira)
+# ============================================================
+
+def _py_max(a, b):
+    """max(a, b) do Python elemento a elemento (NaN no 1º argumento fica)."""
+    return np.where(b > a, b, a)
+
+
+def _py_min(a, b):
+    """min(a, b) do Python elemento a elemento (NaN no 1º argumento fica)."""
+    return np.where(b < a, b, a)
+
+
+def generate_trade_setups_batch(
+    close,
+    high,
+    low,
+    atr,
+    tendencia_norm=None,
+    momentum_norm=None,
+    fs=None,
+    swing_high=None,
+    swing_low=None,
+    rr_max=RR_MAX,
+    stop_base=STOP_ATR_BASE,
+    stop_fs=STOP_ATR_FS,
+    target_base=TARGET_ATR_BASE,
+    target_fs=TARGET_ATR_FS,
+):
+    """
+    MODELO C vetorizado: mesmas fórmulas (e o mesmo cap de RR_MAX) de
+    generate_trade_setup, para todos os candidatos de uma vez.
+    Cap de R/R e multiplicadores de ATR podem ser trocados (sweeps).
+
+    Entradas (arrays do mesmo tamanho, um valor por ticker — último candle):
+        close, high, low, atr      → candle e ATR real
+        tendencia_norm, momentum_norm → direção (padrão 0.5, como no df)
+        fs                         → Fênix Strength (None = não informado →
+                                     fs_norm 0.5; NaN → fs_norm 0.0, como
+                                     no generate_trade_setup)
+        swing_high / swing_low     → último swing já filtrado pelo close
+                                     (ver last_swing_prices; NaN = sem swing)
+
+    Retorna:
+        dict de arrays: operacao ("LONG"/"SHORT"/None), valido, entrada,
+        stop, alvo, stop_dist_atr, target_dist_atr, rr.
+        Tickers com valido=False correspondem a setup None.
+    """
+    close = np.asarray(close, dtype="float64")
+    high = np.asarray(high, dtype="float64")
+    low = np.asarray(low, dtype="float64")
+    atr = np.asarray(atr, dtype="float64")
+
+    def _arr(x, default):
+        if x is None:
+            return np.full(close.shape, default)
+        return np.asarray(x, dtype="float64")
+
+    tend = _arr(tendencia_norm, 0.5)
+    mom = _arr(momentum_norm, 0.5)
+    fs = _arr(fs, FS_DEFAULT)
+    swing_high = _arr(swing_high, np.nan)
+    swing_low = _arr(swing_low, np.nan)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+
+        # ATR com fallback (1,5% do preço, no mínimo 0,10)
+        atr = np.where(atr <= 0, _py_max(np.abs(close) * 0.015, 0.10), atr)
+
+        # Direção LONG / SHORT
+        long_ = (tend >= 0.50) & (mom >= 0.50)
+        short = (tend < 0.50) & (mom < 0.50)
+        valido = long_ | short
+        operacao = np.where(long_, "LONG", np.where(short, "SHORT", None)).astype(object)
+        operacao[~valido] = None
+
+        # FS normalizado (0–1)
+        # clamp com semântica do Python: NaN → 0.0 (igual ao escalar)
+        fs_norm = _py_max(0.0, _py_min(fs / 5.0, 1.0))
+
+        # Entrada: swing ou fallback + trava de segurança
+        entrada = np.where(
+            long_,
+            np.where(np.isnan(swing_high), _py_max(high, close), swing_high),
+            np.where(np.isnan(swing_low), _py_min(low, close), swing_low),
+        )
+        entrada = np.where(long_ & (entrada < close), close, entrada)
+        entrada = np.where(short & (entrada > close), close, entrada)
+
+        # Stop Loss adaptativo
+        stop_dist = atr * (stop_base + (1.0 - fs_norm) * stop_fs)
+        stop = np.where(long_, entrada - stop_dist, entrada + stop_dist)
+
+        # Take Profit adaptativo + cap de R/R
+        target_dist = atr * (target_base + fs_norm * target_fs)
+        capped = (stop_dist > 0) & (target_dist / stop_dist > rr_max)
+        target_dist = np.where(capped, stop_dist * rr_max, target_dist)
+        target = np.where(long_, entrada + target_dist, entrada - target_dist)
+
+        rr = np.abs(target - entrada) / _py_max(np.abs(entrada - stop), 1e-8)
+
+        stop_dist_atr = np.where(atr != 0, stop_dist / atr, np.nan)
+        target_dist_atr = np.where(atr != 0, target_dist / atr, np.nan)
+
+    return {
+        "operacao": operacao,
+        "valido": valido,
+        "entrada": entrada,
+        "stop": stop,
+        "alvo": target,
+        "stop_dist_atr": stop_dist_atr,
+        "target_dist_atr": target_dist_atr,
+        "rr": rr,
+    }
+
+
+def _tail_columns(df, columns, n_rows):
+    """
+    Últimas `n_rows` linhas de `columns` como uma matriz float
+    (coluna ausente → None). Uma única conversão do df inteiro quando ele
+    é todo numérico — acessar coluna a coluna custa mais que o setup.
+    """
+    try:
+        values = df.to_numpy(dtype="float64")[-n_rows:]
+        locs = {c: df.columns.get_loc(c) for c in columns if c in df.columns}
+        return {c: values[:, locs[c]] if c in locs else None for c in columns}
+    except (TypeError, ValueError):
+        return {
+            c: df[c].to_numpy(dtype="float64")[-n_rows:] if c in df.columns else None
+            for c in columns
+        }
+
+
+def generate_trade_setups(frames, fs_scores, max_lookback: int = MAX_LOOKBACK_SWINGS):
+    """
+    generate_trade_setup para vários tickers em uma passada vetorizada
+    (swings via last_swing_prices + generate_trade_setups_batch).
+
+    Entradas:
+        frames    → {ticker: df com indicadores}
+        fs_scores → {ticker: FS}
+
+    Retorna:
+        {ticker: setup ou None} na ordem de `frames` — mesmos valores que
+        generate_trade_setup(df, fs) daria ticker a ticker.
+    """
+    setups = {t: None for t in frames}
+    tickers = [t for t, df in frames.items() if df is not None and len(df) > 0]
+    if not tickers:
+        return setups
+
+    # só as últimas max_lookback + 3 linhas alcançam a janela de swings;
+    # tickers com menos de 5 candles nunca formam swing (topo NaN)
+    n_rows = max_lookback + 3
+    columns = ("Close", "High", "Low", "ATR", "tendencia_norm", "momentum_norm")
+    defaults = {"ATR": 0.0, "tendencia_norm": 0.5, "momentum_norm": 0.5}
+
+    last = {c: np.empty(len(tickers)) for c in columns}
+    highs = np.full((n_rows, len(tickers)), np.nan)
+    lows = np.full((n_rows, len(tickers)), np.nan)
+
+    for j, ticker in enumerate(tickers):
+        cols = _tail_columns(frames[ticker], columns, n_rows)
+        for c in columns:
+            last[c][j] = defaults.get(c, np.nan) if cols[c] is None else cols[c][-1]
+        highs[n_rows - len(cols["High"]):, j] = cols["High"]
+        lows[n_rows - len(cols["Low"]):, j] = cols["Low"]
+
+    close = last["Close"]
+    fs = np.array([
+        FS_DEFAULT if fs_scores.get(t) is None else float(fs_scores[t]) for t in tickers
+    ])
+
+    swing_high = last_swing_prices(highs, "high", close, max_lookback)
+    swing_low = last_swing_prices(lows, "low", close, max_lookback)
+
+    batch = generate_trade_setups_batch(
+        close, last["High"], last["Low"], last["ATR"],
+        last["tendencia_norm"], last["momentum_norm"], fs,
+        swing_high, swing_low,
+    )
+
+    fields = ("entrada", "stop", "alvo", "stop_dist_atr", "target_dist_atr", "rr")
+    for j, ticker in enumerate(tickers):
+        if not batch["valido"][j]:
+            continue
+        setup = {"operacao": batch["operacao"][j]}
+        setup.update({f: float(batch[f][j]) for f in fields})
+        setups[ticker] = setup
+
+    return setups
@@ -0,0 +1,280 @@
+# bp/core/universe_engine.py
+# -*- coding: utf-8 -*-
+
+"""
+Engine colunar dos indicadores do BP-Fênix para o UNIVERSO inteiro.
+
+Em vez de N pipelines pandas (um por ticker), empilha todos os tickers em
+matrizes 2-D (barras × tickers) e calcula cada indicador em uma única
+passada NumPy.
+
+Alinhamento: cada ticker é alinhado pela DIREITA (último candle na última
+linha) e completado com NaN no topo. Assim as janelas móveis de cada
+coluna enxergam exatamente os mesmos candles que `apply_all_indicators`
+enxerga no DataFrame daquele ticker — inclusive quando os tickers têm
+históricos de tamanhos diferentes.
+
+As regras de NaN replicam o pandas:
+    - rolling(n).mean() → NaN se a janela tiver qualquer NaN
+    - cumsum()          → NaN nas posições NaN, sem interromper o acumulado
+    - max(axis=1)       → ignora NaN
+
+Saída principal: `apply_universe_indicators(frames)` → {ticker: tail(20)},
+no mesmo formato que `evaluate_all_criteria` consome. Para avaliar os
+critérios sem remontar DataFrames, `last_rows(block)` entrega só as últimas
+linhas de cada ticker (ver criteria_engine.evaluate_universe).
+"""
+
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from bp.core.indicators import normalize_ohlcv
+
+OHLCV = ["Open", "High", "Low", "Close", "Volume"]
+
+MA_PERIODS = (9, 21, 50, 200)
+RSI_PERIOD = 14
+ATR_PERIOD = 14
+VOLUME_MM_PERIOD = 14
+
+# mesma ordem em que apply_all_indicators cria as colunas
+INDICATOR_COLUMNS = [
+    "MA9", "MA21", "MA50", "MA200",
+    "RSI14", "OBV", "AD",
+    "ATR", "ATR_pct",
+    "Volume_MM14", "Volume_deviation",
+    "VWAP",
+]
+
+
+@dataclass
+class UniverseBlock:
+    """
+    Universo empilhado: uma matriz (barras × tickers) por coluna.
+
+    - tickers: ordem das colunas das matrizes
+    - frames:  DataFrame normalizado de cada ticker (índice e colunas extras)
+    - lengths: nº de candles reais de cada ticker (o resto é NaN no topo)
+    - arrays:  {coluna: ndarray float64 (n_barras, n_tickers)}
+    """
+    tickers: list
+    frames: dict
+    lengths: np.ndarray
+    arrays: dict = field(default_factory=dict)
+
+    @property
+    def n_bars(self):
+        return int(self.lengths.max()) if len(self.lengths) else 0
+
+
+# ------------------------------------------------------------
+# EMPILHAMENTO
+# ------------------------------------------------------------
+def stack_universe(frames):
+    """
+    Empilha {ticker: DataFrame OHLCV} em um UniverseBlock alinhado à direita.
+    Tickers sem OHLCV completo ou sem nenhum fechamento válido ficam de fora.
+    """
+    valid = {}
+    for ticker, df in frames.items():
+        if df is None or len(df) == 0:
+            continue
+        if any(col not in df.columns for col in OHLCV):
+            continue
+        df = normalize_ohlcv(df.copy())
+        if df["Close"].isna().all():
+            continue
+        valid[ticker] = df
+
+    tickers = list(valid)
+    lengths = np.array([len(valid[t]) for t in tickers], dtype=np.int64)
+    n_bars = int(lengths.max()) if len(lengths) else 0
+
+    block = UniverseBlock(tickers=tickers, frames=valid, lengths=lengths)
+
+    for col in OHLCV:
+        mat = np.full((n_bars, len(tickers)), np.nan)
+        for j, t in enumerate(tickers):
+            mat[n_bars - lengths[j]:, j] = valid[t][col].to_numpy(dtype="float64")
+        block.arrays[col] = mat
+
+    return block
+
+
+# ------------------------------------------------------------
+# PRIMITIVAS 2-D (eixo 0 = tempo)
+# ------------------------------------------------------------
+def rolling_mean(mat, window):
+    """
+    Média móvel simples por coluna; NaN se a janela estiver incompleta
+    ou tiver qualquer NaN (= pandas rolling(window).mean()).
+    """
+    out = np.full(mat.shape, np.nan)
+    if mat.shape[0] >= window:
+        out[window - 1:] = sliding_window_view(mat, window, axis=0).mean(axis=-1)
+    return out
+
+
+def nan_cumsum(mat):
+    """
+    Soma acumulada por coluna pulando NaN (= pandas cumsum()).
+    """
+    mask = np.isnan(mat)
+    out = np.cumsum(np.where(mask, 0.0, mat), axis=0)
+    out[mask] = np.nan
+    return out
+
+
+def shift_down(mat, periods=1):
+    """
+    Desloca as linhas para baixo (= pandas shift()).
+    """
+    out = np.full(mat.shape, np.nan)
+    out[periods:] = mat[:-periods]
+    return out
+
+
+# ------------------------------------------------------------
+# INDICADORES (todos os tickers de uma vez)
+# ------------------------------------------------------------
+def compute_universe_indicators(block):
+    """
+    Preenche block.arrays com todas as colunas de INDICATOR_COLUMNS,
+    replicando as fórmulas de bp.core.indicators.
+    """
+    a = block.arrays
+    close, high, low, volume = a["Close"], a["High"], a["Low"], a["Volume"]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+
+        # --- TENDÊNCIA ---
+        for period in MA_PERIODS:
+            a[f"MA{period}"] = rolling_mean(close, period)
+
+        # --- MOMENTUM ---
+        prev_close = shift_down(close)
+        delta = close - prev_close
+
+        avg_gain = rolling_mean(np.clip(delta, 0, None), RSI_PERIOD)
+        avg_loss = rolling_mean(np.clip(-delta, 0, None), RSI_PERIOD)
+        rs = avg_gain / avg_loss
+        a[f"RSI{RSI_PERIOD}"] = 100 - (100 / (1 + rs))
+
+        direction = np.nan_to_num(np.sign(delta), nan=0.0)
+        a["OBV"] = nan_cumsum(direction * volume)
+
+        spread = high - low
+        spread = np.where(spread == 0, np.nan, spread)
+        clv = ((close - low) - (high - close)) / spread
+        clv = np.nan_to_num(clv, nan=0.0, posinf=np.inf, neginf=-np.inf)
+        a["AD"] = nan_cumsum(clv * volume)
+
+        # --- VOLATILIDADE ---
+        tr1 = high - low
+        tr2 = np.abs(high - prev_close)
+        tr3 = np.abs(low - prev_close)
+        tr = np.fmax(np.fmax(tr1, tr2), tr3)
+
+        atr = rolling_mean(tr, ATR_PERIOD)
+        a["ATR"] = atr
+        a["ATR_pct"] = (atr / close) * 100
+
+        # --- VOLUME ---
+        mm14 = rolling_mean(volume, VOLUME_MM_PERIOD)
+        a["Volume_MM14"] = mm14
+        a["Volume_deviation"] = ((volume - mm14) / mm14) * 100
+
+        # --- VWAP ---
+        typical_price = (high + low + close) / 3
+        a["VWAP"] = nan_cumsum(typical_price * volume) / nan_cumsum(volume)
+
+    return block
+
+
+# ------------------------------------------------------------
+# SAÍDA POR TICKER (formato de apply_all_indicators)
+# ------------------------------------------------------------
+def _finite_or_nan(values):
+    """
+    inf/-inf → NaN (= df.replace([inf, -inf], nan)) sem tocar em colunas
+    não numéricas.
+    """
+    if values.dtype.kind == "f" and np.isinf(values).any():
+        values = np.where(np.isinf(values), np.nan, values)
+    return values
+
+
+def ticker_frame(block, ticker, tail=20):
+    """
+    Reconstrói o DataFrame de UM ticker com as últimas `tail` linhas de
+    fechamento válido — mesmo formato de apply_all_indicators(df).
+    """
+    j = block.tickers.index(ticker)
+    start = block.n_bars - int(block.lengths[j])
+
+    src = block.frames[ticker]
+
+    close = block.arrays["Close"][start:, j]
+    rows = np.flatnonzero(~np.isnan(close))[-tail:]
+    if len(rows) == 0:
+        return pd.DataFrame()
+
+    # DataFrame montado de uma vez (setitem coluna a coluna é o gargalo)
+    data = {col: _finite_or_nan(src[col].to_numpy()[rows]) for col in src.columns}
+    for col in INDICATOR_COLUMNS:
+        data[col] = _finite_or_nan(block.arrays[col][start + rows, j])
+
+    return pd.DataFrame(data, index=src.index[rows])
+
+
+def last_rows(block, n=6, columns=None):
+    """
+    Últimas `n` linhas de fechamento válido de TODOS os tickers, no formato
+    colunar que `criteria_engine.evaluate_universe` consome.
+
+    Retorna:
+        (arrays, counts)
+        - arrays: {coluna: ndarray (n, n_tickers)}, última linha = último
+                  candle válido; tickers com menos de `n` linhas têm NaN no
+                  topo; inf → NaN (como em apply_all_indicators)
+        - counts: nº de linhas reais de cada ticker (≤ n)
+    """
+    columns = OHLCV + INDICATOR_COLUMNS if columns is None else columns
+
+    valid = ~np.isnan(block.arrays["Close"])
+    # posição contada de baixo para cima: 1 = último fechamento válido
+    rank = np.cumsum(valid[::-1], axis=0)[::-1]
+    rows, cols = np.nonzero(valid & (rank <= n))
+    dest = n - rank[rows, cols]
+
+    arrays = {}
+    for col in columns:
+        out = np.full((n, len(block.tickers)), np.nan)
+        out[dest, cols] = block.arrays[col][rows, cols]
+        arrays[col] = _finite_or_nan(out)
+
+    counts = np.minimum(valid.sum(axis=0), n)
+    return arrays, counts
+
+
+def apply_universe_indicators(frames, tail=20):
+    """
+    Equivalente colunar de `apply_all_indicators` para o universo inteiro.
+
+    Entrada: {ticker: DataFrame OHLCV} (ex.: saída de get_universe_data)
+    Saída:   {ticker: DataFrame tail(20) com indicadores}; tickers
+             inválidos recebem DataFrame vazio, como no pipeline por ticker.
+    """
+    block = compute_universe_indicators(stack_universe(frames))
+
+    out = {}
+    for ticker in frames:
+        if ticker in block.frames:
+            out[ticker] = ticker_frame(block, ticker, tail)
+        else:
+            out[ticker] = pd.DataFrame()
+
+    return out
@@ -0,0 +1,342 @@
+# bp/core/universe_store.py
+# -*- coding: utf-8 -*-
+
+"""
+Composição dos universos do BP-Fênix (IBOV, SMLL, BDR) com snapshots
+versionados em disco.
+
+    data/universe/<UNIVERSO>/current.json          ← snapshot vigente
+    data/universe/<UNIVERSO>/v0003_2026-09-01.json ← histórico de versões
+
+Cada snapshot guarda a data de vigência, o instante do último fetch e a
+lista de tickers (com sufixo .SA). Uma nova versão só é criada quando a
+composição muda; senão apenas o instante do fetch é renovado.
+
+Política (`get_universe`) — nunca espera a B3 quando há o que servir:
+    - memo do processo ou snapshot em disco dentro do TTL → sem rede
+    - snapshot vencido → serve o vencido e atualiza pela B3 em segundo plano
+    - sem snapshot     → semeia o snapshot com o CSV legado
+                         (data/tickers_ibov.csv) e atualiza em segundo plano;
+                         só sem CSV a chamada espera a B3
+    Depois de uma falha na B3, novas tentativas esperam FETCH_RETRY_SECONDS.
+"""
+
+import glob
+import json
+import os
+import threading
+import time
+from datetime import date, datetime
+
+import pandas as pd
+import http_client
+
+from bp.core.utils import atomic_write
+
+UNIVERSE_DIR = os.path.join("data", "universe")
+LEGACY_CSV_PATH = os.path.join("data", "tickers_ibov.csv")
+
+UNIVERSE_TTL_SECONDS = 24 * 3600     # composição muda no máximo por quadrimestre
+FETCH_RETRY_SECONDS = 10 * 60        # após falha na B3, não tenta de novo antes disso
+
+# universo → índice na B3 / rótulo na coluna "indice" do CSV legado
+UNIVERSES = {
+    "IBOV": {"b3_index": "IBOV", "csv_label": "IBOV"},
+    "SMLL": {"b3_index": "SMLL", "csv_label": "SMALL CAPS"},
+    "BDR":  {"b3_index": "BDRX", "csv_label": "BDR"},
+}
+
+B3_INDEX_URL = (
+    "https://sistemaswebb3-listados.b3.com.br/indexProxy/indexCall/"
+    "GetDetailIndex?language=pt-BR&index={index}"
+)
+
+# memo do processo: universo → snapshot
+_MEMO = {}
+
+# universo → instante (time.time) liberado para nova tentativa na B3
+_RETRY_AT = {}
+
+# universos com atualização em segundo plano em andamento
+_REFRESHING = set()
+
+# guarda _RETRY_AT e _REFRESHING (thread de fundo × chamada em primeiro plano)
+_REFRESH_LOCK = threading.Lock()
+
+
+# ------------------------------------------------------------
+# HELPERS
+# ------------------------------------------------------------
+def _universe_key(universe):
+    key = str(universe).upper()
+    if key not in UNIVERSES:
+        raise ValueError(f"Universo desconhecido: {universe} (use {', '.join(UNIVERSES)})")
+    return key
+
+
+def _dir(universe):
+    return os.path.join(UNIVERSE_DIR, universe)
+
+
+def _current_path(universe):
+    return os.path.join(_dir(universe), "current.json")
+
+
+def _atomic_write_json(path, payload):
+    # temporário exclusivo: a atualização em segundo plano e outro
+    # processo podem gravar o mesmo snapshot ao mesmo tempo
+    atomic_write(path, lambda f: json.dump(payload, f, ensure_ascii=False, indent=1), text=True)
+
+
+def is_fresh(snapshot, now=None, ttl=UNIVERSE_TTL_SECONDS):
+    now = time.time() if now is None else now
+    return snapshot is not None and now - snapshot.get("fetched_at", 0) < ttl
+
+
+# ------------------------------------------------------------
+# B3 — composição oficial
+# ------------------------------------------------------------
+def _effective_date(data):
+    """
+    Data de vigência informada pela B3 (cabeçalho da carteira), ou hoje.
+    """
+    raw = (data.get("header") or {}).get("date")
+    if raw:
+        try:
+            return pd.to_datetime(raw, dayfirst=True).date().isoformat()
+        except (ValueError, TypeError):
+            pass
+    return date.today().isoformat()
+
+
+def fetch_index_from_b3(universe="IBOV", timeout=10):
+    """
+    Captura a composição oficial de um universo direto da B3.
+
+    Retorna:
+        (tickers, data_de_vigencia) — ([], None) em caso de falha.
+    """
+    universe = _universe_key(universe)
+    url = B3_INDEX_URL.format(index=UNIVERSES[universe]["b3_index"])
+
+    headers = {
+        "User-Agent": "Mozilla/5.0",
+        "Accept": "application/json",
+    }
+
+    try:
+        r = http_client.get(url, headers=headers, timeout=timeout)
+        data = r.json()
+
+        tickers = [item["codNegociacao"].upper() + ".SA" for item in data["results"]]
+        tickers = sorted(list(set(tickers)))
+
+        return tickers, _effective_date(data)
+
+    except Exception as e:
+        print(f"[ERRO] Falha ao capturar {universe} da B3: {e}")
+        return [], None
+
+
+# ------------------------------------------------------------
+# SNAPSHOTS
+# ------------------------------------------------------------
+def load_snapshot(universe="IBOV"):
+    """
+    Snapshot vigente em disco, ou None (ausente/corrompido).
+    """
+    universe = _universe_key(universe)
+    path = _current_path(universe)
+
+    if not os.path.exists(path):
+        return None
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            snapshot = json.load(f)
+        if not snapshot.get("tickers"):
+            raise ValueError("snapshot sem tickers")
+        return snapshot
+    except Exception as e:
+        print(f"[!] Snapshot de {universe} corrompido ({e}) — ignorando.")
+        return None
+
+
+def save_snapshot(universe, tickers, effective_date=None, source="b3", now=None):
+    """
+    Grava a composição como snapshot vigente (atômico: temp + rename).
+    Composição diferente da atual → nova versão também no histórico.
+    """
+    universe = _universe_key(universe)
+    now = time.time() if now is None else now
+    tickers = sorted(set(tickers))
+    current = load_snapshot(universe)
+
+    if current is not None and current["tickers"] == tickers:
+        snapshot = dict(current, fetched_at=now)
+    else:
+        version = (current or {}).get("version", 0) + 1
+        snapshot = {
+            "universe": universe,
+            "version": version,
+            "effective_date": effective_date or date.today().isoformat(),
+            "fetched_at": now,
+            "source": source,
+            "tickers": tickers,
+        }
+        history = os.path.join(
+            _dir(universe), f"v{version:04d}_{snapshot['effective_date']}.json"
+        )
+        _atomic_write_json(history, snapshot)
+
+    _atomic_write_json(_current_path(universe), snapshot)
+    _MEMO[universe] = snapshot
+    return snapshot
+
+
+def list_versions(universe="IBOV"):
+    """
+    Histórico de versões gravadas (mais antiga primeiro).
+    """
+    universe = _universe_key(universe)
+    return sorted(
+        os.path.basename(p)[:-5]
+        for p in glob.glob(os.path.join(_dir(universe), "v*.json"))
+    )
+
+
+def refresh_universe(universe="IBOV"):
+    """
+    Força a atualização a partir da B3. Retorna o snapshot novo ou None.
+    """
+    universe = _universe_key(universe)
+    tickers, effective = fetch_index_from_b3(universe)
+
+    if len(tickers) == 0:
+        return None
+
+    snapshot = save_snapshot(universe, tickers, effective)
+    print(f"[OK] {universe} atualizado: {len(tickers)} ativos (versão {snapshot['version']}).")
+    return snapshot
+
+
+# ------------------------------------------------------------
+# FALLBACK — CSV legado (ticker;nome;indice, sem sufixo .SA)
+# ------------------------------------------------------------
+def load_legacy_csv(universe="IBOV", path=LEGACY_CSV_PATH):
+    universe = _universe_key(universe)
+
+    try:
+        df = pd.read_csv(path, sep=";")
+        label = UNIVERSES[universe]["csv_label"]
+        df = df[df["indice"].astype(str).str.strip().str.upper() == label]
+        tickers = df["ticker"].dropna().astype(str).str.strip().str.upper()
+        return sorted({t if t.endswith(".SA") else t + ".SA" for t in tickers if t})
+    except Exception as e:
+        print(f"[ERRO] Falha ao ler CSV legado ({e}).")
+        return []
+
+
+# ------------------------------------------------------------
+# API PRINCIPAL
+# ------------------------------------------------------------
+def _can_retry(universe, now):
+    with _REFRESH_LOCK:
+        return now >= _RETRY_AT.get(universe, 0)
+
+
+def _record_attempt(universe, ok, now):
+    """
+    Registra o resultado de uma ida à B3: sucesso libera novas tentativas,
+    falha adia a próxima por FETCH_RETRY_SECONDS.
+    """
+    with _REFRESH_LOCK:
+        if ok:
+            _RETRY_AT.pop(universe, None)
+        else:
+            _RETRY_AT[universe] = now + FETCH_RETRY_SECONDS
+
+
+def _refresh_in_background(universe, now):
+    """
+    refresh_universe em uma thread daemon (uma por universo), respeitando
+    a espera de FETCH_RETRY_SECONDS após falha.
+    """
+    with _REFRESH_LOCK:
+        if universe in _REFRESHING or now < _RETRY_AT.get(universe, 0):
+            return
+        _REFRESHING.add(universe)
+
+    def _run():
+        try:
+            ok = refresh_universe(universe) is not None
+            _record_attempt(universe, ok, time.time())
+        finally:
+            with _REFRESH_LOCK:
+                _REFRESHING.discard(universe)
+
+    threading.Thread(target=_run, name=f"universe-refresh-{universe}", daemon=True).start()
+
+
+def get_universe(universe="IBOV", now=None, background=True):
+    """
+    Tickers (.SA) do universo, seguindo a política do módulo.
+    Nunca levanta exceção: no pior caso retorna lista vazia.
+
+    `background=False` faz a atualização pela B3 na própria chamada
+    (scripts / testes).
+    """
+    universe = _universe_key(universe)
+    now = time.time() if now is None else now
+
+    memo = _MEMO.get(universe)
+    if is_fresh(memo, now):
+        return list(memo["tickers"])
+
+    snapshot = load_snapshot(universe)
+    if is_fresh(snapshot, now):
+        _MEMO[universe] = snapshot
+        return list(snapshot["tickers"])
+
+    if snapshot is None:
+        legacy = load_legacy_csv(universe)
+        if legacy:
+            # partida a frio: o CSV vira a versão inicial, vencida de
+            # propósito (fetched_at=0) para a B3 substituí-la assim que responder
+            print(f"[!] Sem snapshot de {universe} — semeando com o CSV legado.")
+            snapshot = save_snapshot(universe, legacy, source="csv", now=0)
+
+    if snapshot is None or not background:
+        if _can_retry(universe, now):
+            fresh = refresh_universe(universe)
+            _record_attempt(universe, fresh is not None, now)
+            if fresh is not None:
+                return list(fresh["tickers"])
+    else:
+        _refresh_in_background(universe, now)
+
+    if snapshot is None:
+        return []
+
+    _MEMO[universe] = snapshot
+    return list(snapshot["tickers"])
+
+
+def snapshot_info(universe="IBOV"):
+    """
+    Metadados do snapshot vigente (sem a lista), p/ exibição/diagnóstico.
+    """
+    snapshot = _MEMO.get(_universe_key(universe)) or load_snapshot(universe)
+    if snapshot is None:
+        return None
+
+    info = {k: v for k, v in snapshot.items() if k != "tickers"}
+    info["size"] = len(snapshot["tickers"])
+    info["fetched_at_str"] = datetime.fromtimestamp(snapshot["fetched_at"]).strftime("%d/%m/%Y %H:%M")
+    return info
+
+
+def clear_memo():
+    _MEMO.clear()
+    with _REFRESH_LOCK:
+        _RETRY_AT.clear()
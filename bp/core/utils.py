@@ -1 +1,146 @@
+# bp/core/utils.py
+# -*- coding: utf-8 -*-
 
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+import yfinance as yf
+
+
+# ------------------------------------------------------------
+# TOKEN BUCKET — limitador de ritmo thread-safe
+# ------------------------------------------------------------
+class TokenBucket:
+    """
+    Limitador de taxa clássico: `rate` fichas por segundo, acumulando
+    no máximo `capacity` fichas (rajada).
+
+    `acquire(n)` bloqueia a thread chamadora até haver `n` fichas.
+    """
+
+    def __init__(self, rate, capacity, clock=time.monotonic, sleep=time.sleep):
+        if rate <= 0 or capacity <= 0:
+            raise ValueError("rate e capacity precisam ser positivos")
+
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._clock = clock
+        self._sleep = sleep
+        self._last = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def acquire(self, tokens=1):
+        """
+        Consome `tokens` fichas, esperando o necessário.
+        Pedidos maiores que a capacidade são atendidos em parcelas.
+        """
+        restante = float(tokens)
+
+        while restante > 0:
+            parcela = min(restante, self.capacity)
+
+            with self._lock:
+                self._refill()
+                if self._tokens >= parcela:
+                    self._tokens -= parcela
+                    restante -= parcela
+                    continue
+                espera = (parcela - self._tokens) / self.rate
+
+            self._sleep(espera)
+
+
+# ------------------------------------------------------------
+# yf.download SERIALIZADO NO PROCESSO
+# ------------------------------------------------------------
+# yf.download junta os resultados em globais do módulo (shared._DFS /
+# shared._ERRORS): duas chamadas simultâneas trocam frames e erros entre
+# si. Todo download do processo (data_loader, quote_service) passa por
+# aqui — uma chamada por vez; o lote multi-ticker já dá a vazão.
+YF_DOWNLOAD_LOCK = threading.Lock()
+
+_DOWNLOAD_TIMING = threading.local()
+
+
+@contextmanager
+def download_timing():
+    """
+    Acumula, para os yf_download feitos NESTA thread dentro do bloco, os
+    segundos na fila do lock ("wait") e dentro do yf.download ("fetch").
+    Quem chama pode somar outras esperas (ex.: token bucket) em "wait".
+
+        with download_timing() as t:
+            ...
+        t["fetch"], t["wait"]
+    """
+    timing = {"wait": 0.0, "fetch": 0.0}
+    previous = getattr(_DOWNLOAD_TIMING, "current", None)
+    _DOWNLOAD_TIMING.current = timing
+    try:
+        yield timing
+    finally:
+        _DOWNLOAD_TIMING.current = previous
+
+
+def yf_download(*args, **kwargs):
+    """
+    yf.download com o lock do processo (mesma assinatura do yfinance).
+    """
+    t0 = time.perf_counter()
+    with YF_DOWNLOAD_LOCK:
+        t1 = time.perf_counter()
+        try:
+            return yf.download(*args, **kwargs)
+        finally:
+            timing = getattr(_DOWNLOAD_TIMING, "current", None)
+            if timing is not None:
+                timing["wait"] += t1 - t0
+                timing["fetch"] += time.perf_counter() - t1
+
+
+# ------------------------------------------------------------
+# GRAVAÇÃO ATÔMICA (temporário exclusivo + rename)
+# ------------------------------------------------------------
+def atomic_write(path, write, text=False):
+    """
+    write(f) em um temporário EXCLUSIVO no mesmo diretório de `path` e
+    os.replace no final: quem lê nunca vê arquivo pela metade, e duas
+    gravações simultâneas (scheduler + dashboard, dois processos) não
+    pisam no temporário uma da outra — vence a última.
+
+    `text=True` abre o temporário em texto UTF-8 (senão, binário).
+    Retorna o os.stat_result do arquivo gravado (o rename mantém o inode).
+    """
+    folder = os.path.dirname(os.path.abspath(path))
+    os.makedirs(folder, exist_ok=True)
+
+    tmp = tempfile.NamedTemporaryFile(
+        "w" if text else "wb",
+        encoding="utf-8" if text else None,
+        dir=folder,
+        prefix=os.path.basename(path) + ".",
+        suffix=".tmp",
+        delete=False,
+    )
+    try:
+        with tmp:
+            write(tmp)
+            tmp.flush()
+            st = os.fstat(tmp.fileno())
+        os.replace(tmp.name, path)
+    except BaseException:
+        try:
+            os.remove(tmp.name)
+        except OSError:
+            pass
+        raise
+    return st
@@ -0,0 +1,149 @@
+# bp/tests/test_candle_store.py
+# -*- coding: utf-8 -*-
+
+"""
+Armazém de candles: top-up (cauda + merge) × download completo, top-up
+rejeitado pela blindagem e gravação atômica concorrente.
+"""
+
+import os
+import threading
+
+import pandas as pd
+import pytest
+
+from bp.benchmarks.fixtures import make_ohlcv
+from bp.core import candle_store
+from bp.core.data_loader import _clean_ohlcv
+
+TICKER = "SYN.SA"
+
+
+def _history(n_bars=600, seed=0):
+    df = make_ohlcv(n_bars, seed=seed)
+    df.index = pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=n_bars, name="Date")
+    return df
+
+
+class FakeDownload:
+    """
+    download(ticker, period=..., start=..., interval=...) sobre um
+    histórico fixo, como o yfinance devolveria.
+    """
+
+    def __init__(self, history):
+        self.history = history
+        self.calls = []
+
+    def __call__(self, ticker, period=None, start=None, interval="1d"):
+        self.calls.append({"period": period, "start": start})
+        if start is not None:
+            return self.history[self.history.index >= start].copy()
+        return candle_store.trim_to_period(self.history, period).copy()
+
+
+@pytest.fixture(autouse=True)
+def candle_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr(candle_store, "CANDLE_DIR", str(tmp_path))
+    candle_store.reset_cache_stats()
+    return tmp_path
+
+
+def _expire_cache(monkeypatch):
+    monkeypatch.setattr(candle_store, "CACHE_TTL_SECONDS", 0)
+
+
+def test_merge_candles_prefers_fresh_rows():
+    stored = _history(40)
+    novo = stored.iloc[-1:] * 0 + 7.0
+    novo.index = novo.index + pd.offsets.BDay(1)
+    fresh = pd.concat([stored.iloc[-3:] * 1.5, novo])      # 3 revisados + 1 novo
+
+    merged = candle_store.merge_candles(stored, fresh)
+
+    assert merged.index.is_monotonic_increasing
+    assert not merged.index.has_duplicates
+    pd.testing.assert_frame_equal(merged.loc[fresh.index], fresh[stored.columns], check_freq=False)
+    pd.testing.assert_frame_equal(merged.iloc[:-4], stored.iloc[:-3], check_freq=False)
+
+
+def test_merge_candles_keeps_columns_missing_from_the_tail():
+    stored = _history(40)
+    stored["Adj Close"] = stored["Close"] * 0.9
+    novo = stored.iloc[-1:] * 0 + 7.0
+    novo.index = novo.index + pd.offsets.BDay(1)
+    fresh = pd.concat([stored.iloc[-3:] * 1.5, novo]).drop(columns="Adj Close")
+
+    merged = candle_store.merge_candles(stored, fresh)
+
+    assert list(merged.columns) == list(stored.columns)
+    pd.testing.assert_frame_equal(merged.loc[fresh.index, fresh.columns], fresh, check_freq=False)
+    # datas repetidas: "Adj Close" salvo; data nova: a cauda não tem o valor
+    pd.testing.assert_series_equal(
+        merged["Adj Close"].iloc[-4:-1], stored["Adj Close"].iloc[-3:], check_freq=False
+    )
+    assert pd.isna(merged["Adj Close"].iloc[-1])
+    pd.testing.assert_frame_equal(merged.iloc[:-4], stored.iloc[:-3], check_freq=False)
+
+
+@pytest.mark.parametrize("missing_bars", [1, 5, 15])
+def test_topup_matches_full_download(monkeypatch, missing_bars):
+    history = _history()
+
+    # cache com o último candle "em formação" (revisto no top-up)
+    stored = history.iloc[:-missing_bars].copy()
+    stored.iloc[-1, stored.columns.get_loc("Close")] += 0.5
+    stored = candle_store.trim_to_period(stored, "2y")
+    candle_store.save_candles(TICKER, "1d", stored, "2y", full=True)
+    _expire_cache(monkeypatch)
+
+    download = FakeDownload(history)
+    got = candle_store.get_candles(TICKER, download, _clean_ohlcv, period="2y")
+
+    assert download.calls == [{"period": None, "start": stored.index[-1]}]
+    assert candle_store.get_cache_stats()["topups"] == 1
+
+    expected, _ = _clean_ohlcv(TICKER, FakeDownload(history)(TICKER, period="2y"))
+    pd.testing.assert_frame_equal(got, expected, check_freq=False)
+
+    # o que ficou em disco serve o próximo hit sem rede
+    monkeypatch.setattr(candle_store, "CACHE_TTL_SECONDS", 3600)
+    again = candle_store.get_candles(TICKER, FakeDownload(history.iloc[:0]), _clean_ohlcv, period="2y")
+    pd.testing.assert_frame_equal(again, expected, check_freq=False)
+    assert candle_store.get_cache_stats()["hits"] == 1
+
+
+def test_rejected_topup_falls_back_to_full_download(monkeypatch):
+    history = _history()
+
+    # histórico salvo curto demais: o merge não passa em _clean_ohlcv
+    candle_store.save_candles(TICKER, "1d", history.iloc[-25:-2], "2y", full=True)
+    _expire_cache(monkeypatch)
+
+    download = FakeDownload(history)
+    got = candle_store.get_candles(TICKER, download, _clean_ohlcv, period="2y")
+
+    assert [c["start"] is not None for c in download.calls] == [True, False]
+    assert candle_store.get_cache_stats()["topups"] == 0
+    assert candle_store.get_cache_stats()["misses"] == 1
+
+    expected, _ = _clean_ohlcv(TICKER, FakeDownload(history)(TICKER, period="2y"))
+    pd.testing.assert_frame_equal(got, expected, check_freq=False)
+
+
+def test_concurrent_saves_leave_a_readable_file(candle_dir):
+    frames = [_history(300, seed=s) for s in range(6)]
+
+    threads = [
+        threading.Thread(target=candle_store.save_candles, args=(TICKER, "1d", df, "2y", True))
+        for df in frames
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert not [f for f in os.listdir(candle_dir) if f.endswith(".tmp")]
+    stored, meta = candle_store.load_candles(TICKER)
+    assert meta["rows"] == 300
+    assert any(stored.equals(df) for df in frames)
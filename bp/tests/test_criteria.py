@@ -1 +1,99 @@
+# bp/tests/test_criteria.py
+# -*- coding: utf-8 -*-
 
+"""
+Critérios colunares (evaluate_universe) × evaluate_all_criteria ticker
+a ticker.
+"""
+
+import numpy as np
+import pytest
+
+from bp.benchmarks.fixtures import make_ohlcv
+from bp.core.criteria_engine import (
+    MOMENTUM_MIN_ROWS,
+    criteria_at,
+    evaluate_all_criteria,
+    evaluate_universe,
+)
+from bp.core.indicators import apply_all_indicators
+from bp.core.universe_engine import compute_universe_indicators, last_rows, stack_universe
+
+
+def _universe():
+    frames = {f"T{k:02d}.SA": make_ohlcv(n, seed=k) for k, n in enumerate(
+        (500, 500, 500, 500, 400, 320, 260, 210, 199, 150, 40, 5, 3)
+    )}
+
+    # volume zerado no fim → MM14 == 0 (critério de volume inválido)
+    zero = make_ohlcv(300, seed=50)
+    zero.iloc[-14:, zero.columns.get_loc("Volume")] = 0.0
+    frames["ZERO.SA"] = zero
+
+    # mercado lateral (ATR% baixo, RSI perto de 50)
+    flat = make_ohlcv(300, seed=51)
+    for col in ("Open", "High", "Low", "Close", "Adj Close"):
+        flat[col] = 100 + (flat[col] - flat[col].mean()) * 0.01
+    frames["LATERAL.SA"] = flat
+    return frames
+
+
+def _stack_tails(tails, n=MOMENTUM_MIN_ROWS):
+    """
+    Últimas `n` linhas de cada df (alinhadas à direita, NaN no topo) —
+    o formato de entrada de evaluate_universe.
+    """
+    columns = list(next(iter(tails.values())).columns)
+    arrays = {c: np.full((n, len(tails)), np.nan) for c in columns}
+    counts = np.empty(len(tails), dtype=np.int64)
+    for j, df in enumerate(tails.values()):
+        rows = df.tail(n)
+        counts[j] = len(rows)
+        for c in columns:
+            arrays[c][n - len(rows):, j] = rows[c].to_numpy(dtype="float64")
+    return arrays, counts
+
+
+@pytest.fixture(scope="module")
+def tails():
+    out = {}
+    for ticker, df in _universe().items():
+        tail = apply_all_indicators(df.copy())
+        if not tail.empty:
+            out[ticker] = tail
+    return out
+
+
+def test_evaluate_universe_matches_per_ticker(tails):
+    arrays, counts = _stack_tails(tails)
+    universe = evaluate_universe(arrays, counts)
+
+    for j, (ticker, df) in enumerate(tails.items()):
+        assert criteria_at(universe, j) == evaluate_all_criteria(df), ticker
+
+
+def test_evaluate_universe_without_details(tails):
+    arrays, counts = _stack_tails(tails)
+    full = evaluate_universe(arrays, counts)
+    fast = evaluate_universe(arrays, counts, details=False)
+
+    for name, c in full.items():
+        assert fast[name]["detail"] is None
+        np.testing.assert_array_equal(fast[name]["status"], c["status"])
+        np.testing.assert_array_equal(fast[name]["norm"], c["norm"])
+
+
+def test_engine_criteria_match_per_ticker(tails):
+    frames = {t: df for t, df in _universe().items() if t in tails}
+    block = compute_universe_indicators(stack_universe({t: df.copy() for t, df in frames.items()}))
+    arrays, counts = last_rows(block, n=MOMENTUM_MIN_ROWS)
+    universe = evaluate_universe(arrays, counts)
+
+    for ticker in frames:
+        j = block.tickers.index(ticker)
+        got = criteria_at(universe, j)
+        expected = evaluate_all_criteria(tails[ticker])
+        for name in expected:
+            # médias móveis do engine diferem ~1 ulp do rolling do pandas
+            assert got[name]["status"] == expected[name]["status"], (ticker, name)
+            assert got[name]["norm"] == pytest.approx(expected[name]["norm"], rel=1e-12), (ticker, name)
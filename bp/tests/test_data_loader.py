@@ -0,0 +1,190 @@
+# bp/tests/test_data_loader.py
+# -*- coding: utf-8 -*-
+
+"""
+Download em lote (get_universe_data) × download ticker a ticker
+(get_ticker_data), com um yf.download falso que devolve os mesmos
+formatos do yfinance (MultiIndex por ticker no lote, (Price, Ticker) no
+download de 1 ticker).
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from bp.benchmarks.fixtures import as_multiindex, make_ohlcv
+from bp.core import candle_store, data_loader, utils
+
+
+def _dated(df):
+    # candles terminando hoje: period / top-up do cache dependem da data
+    df = df.copy()
+    df.index = pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=len(df), name="Date")
+    return df
+
+
+def _history():
+    frames = {f"T{k}.SA": make_ohlcv(600, seed=k) for k in range(7)}
+
+    frames["NOVO.SA"] = make_ohlcv(300, seed=20).iloc[-120:]         # listado há pouco
+    frames["CURTO.SA"] = make_ohlcv(300, seed=21).iloc[-20:]         # poucos candles
+    sem_volume = make_ohlcv(300, seed=22)
+    sem_volume["Volume"] = 0.0
+    frames["ZERADO.SA"] = sem_volume
+    buracos = make_ohlcv(300, seed=23)
+    buracos.iloc[[5, 70, 71], buracos.columns.get_loc("Close")] = np.nan
+    frames["BURACOS.SA"] = buracos
+    return {t: _dated(df) for t, df in frames.items()}
+
+
+class FakeYF:
+    """
+    yf.download falso: lote → colunas (Ticker, Price) com datas unidas
+    (ticker sem dados = colunas só NaN); 1 ticker → colunas (Price, Ticker).
+    Respeita `period` (recorte do yfinance) e `start` (top-up do cache).
+    """
+
+    def __init__(self, history, broken=()):
+        self.history = history
+        self.broken = set(broken)
+        self.calls = []
+
+    def _window(self, ticker, period=None, start=None):
+        df = self.history.get(ticker)
+        if df is None:
+            return None
+        if start is not None:
+            return df[df.index >= start]
+        return candle_store.trim_to_period(df, period)
+
+    def download(self, tickers, group_by=None, period=None, start=None, **kwargs):
+        self.calls.append((tickers, start))
+        window = {"period": period, "start": start}
+
+        if isinstance(tickers, str):
+            df = self._window(tickers, **window)
+            return pd.DataFrame() if df is None else as_multiindex(df, tickers)
+
+        if self.broken & set(tickers):
+            raise RuntimeError("No objects to concatenate")
+
+        frames = {t: self._window(t, **window) for t in tickers}
+        index = pd.DatetimeIndex([])
+        for df in frames.values():
+            if df is not None:
+                index = index.union(df.index)
+        index = index.rename("Date")
+        columns = next(iter(self.history.values())).columns
+
+        parts = {}
+        for t, df in frames.items():
+            parts[t] = (
+                pd.DataFrame(np.nan, index=index, columns=columns) if df is None
+                else df.reindex(index)
+            )
+        return pd.concat(parts, axis=1, names=["Ticker", "Price"])
+
+
+@pytest.fixture
+def fake_yf(monkeypatch):
+    fake = FakeYF(_history())
+    monkeypatch.setattr(utils.yf, "download", fake.download)
+    return fake
+
+
+TICKERS = list(_history()) + ["SUMIU.SA"]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 30])
+def test_batched_download_matches_per_ticker(fake_yf, chunk_size):
+    dados, falhas = data_loader.get_universe_data(TICKERS, chunk_size=chunk_size, use_cache=False)
+
+    per_ticker = {t: data_loader.get_ticker_data(t, use_cache=False) for t in TICKERS}
+    validos = {t: df for t, df in per_ticker.items() if df is not None}
+
+    assert list(dados) == list(validos)
+    assert set(falhas) == set(TICKERS) - set(validos)
+    for t, df in validos.items():
+        pd.testing.assert_frame_equal(dados[t], df, check_freq=False, obj=t)
+
+
+def test_batched_download_failure_reasons(fake_yf):
+    _, falhas = data_loader.get_universe_data(TICKERS, chunk_size=4, use_cache=False)
+
+    assert falhas == {
+        "CURTO.SA": data_loader.FALHA_POUCOS_CANDLES,
+        "ZERADO.SA": data_loader.FALHA_VOLUME_ZERADO,
+        "SUMIU.SA": data_loader.FALHA_VAZIO,
+    }
+
+
+def test_failed_batch_does_not_abort_the_universe(monkeypatch):
+    fake = FakeYF(_history(), broken={"T0.SA"})
+    monkeypatch.setattr(utils.yf, "download", fake.download)
+
+    dados, falhas = data_loader.get_universe_data(TICKERS, chunk_size=3, use_cache=False)
+
+    lote_quebrado = TICKERS[:3]
+    for t in lote_quebrado:
+        assert falhas[t].startswith(data_loader.FALHA_DOWNLOAD)
+    assert set(dados) == {
+        t for t in TICKERS[3:] if t not in ("CURTO.SA", "ZERADO.SA", "SUMIU.SA")
+    }
+
+
+# ------------------------------------------------------------
+# COM CACHE (candle_store): hit / top-up × download completo
+# ------------------------------------------------------------
+@pytest.fixture
+def candle_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr(candle_store, "CANDLE_DIR", str(tmp_path))
+    candle_store.reset_cache_stats()
+    return tmp_path
+
+
+def test_cached_universe_matches_fresh_download(monkeypatch, candle_dir):
+    history = _history()
+
+    # 1ª rodada grava o cache com a história até 5 pregões atrás, com o
+    # último candle ainda "em formação" (Close diferente do definitivo)
+    velha = {t: df.iloc[:-5].copy() for t, df in history.items()}
+    for df in velha.values():
+        df.iloc[-1, df.columns.get_loc("Close")] += 0.37
+    monkeypatch.setattr(utils.yf, "download", FakeYF(velha).download)
+    data_loader.get_universe_data(TICKERS, chunk_size=4)
+
+    # 2ª rodada, cache vencido → só a cauda é baixada e mesclada
+    monkeypatch.setattr(candle_store, "CACHE_TTL_SECONDS", 0)
+    candle_store.reset_cache_stats()
+    fake = FakeYF(history)
+    monkeypatch.setattr(utils.yf, "download", fake.download)
+    dados, falhas = data_loader.get_universe_data(TICKERS, chunk_size=4)
+
+    assert candle_store.get_cache_stats()["topups"] > 0
+    assert any(start is not None for _, start in fake.calls)
+
+    esperado = {t: data_loader.get_ticker_data(t, use_cache=False) for t in TICKERS}
+    esperado = {t: df for t, df in esperado.items() if df is not None}
+
+    assert list(dados) == list(esperado)
+    assert set(falhas) == set(TICKERS) - set(esperado)
+    for t, df in esperado.items():
+        pd.testing.assert_frame_equal(dados[t], df, check_freq=False, obj=t)
+
+
+def test_downloads_hold_the_process_lock(monkeypatch):
+    # data_loader e quote_service dividem o mesmo lock do yfinance
+    from quote_service import QuoteService
+
+    locked = []
+
+    def download(*args, **kwargs):
+        locked.append(utils.YF_DOWNLOAD_LOCK.locked())
+        return pd.DataFrame()
+
+    monkeypatch.setattr(utils.yf, "download", download)
+
+    data_loader.get_ticker_data("T0.SA", use_cache=False)
+    QuoteService().get_quotes(["PETR4"])
+
+    assert locked == [True, True, True]      # loader, intraday, fechamento diário
@@ -0,0 +1,148 @@
+# bp/tests/test_indicator_state.py
+# -*- coding: utf-8 -*-
+
+"""
+Estado incremental (IndicatorState / IndicatorStates) × apply_all_indicators
+e evaluate_all_criteria, dentro da tolerância declarada em
+bp.core.indicator_state (RTOL nas médias de janela, o resto idêntico).
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from bp import bp_runner
+from bp.benchmarks.fixtures import make_ohlcv, make_universe
+from bp.core.criteria_engine import evaluate_all_criteria, evaluate_state
+from bp.core.indicator_state import RTOL, IndicatorState, IndicatorStates
+from bp.core.indicators import apply_all_indicators
+
+OHLCV = ["Open", "High", "Low", "Close", "Volume"]
+WINDOW_COLUMNS = {"MA9", "MA21", "MA50", "MA200", "ATR", "ATR_pct", "Volume_MM14", "Volume_deviation"}
+
+
+def _bar(row):
+    return {c: row[c] for c in OHLCV}
+
+
+def _dated(df):
+    df = df.copy()
+    df.index = pd.bdate_range("2024-01-02", periods=len(df), name="Date")
+    return df
+
+
+def _assert_latest_matches(state, df):
+    expected = apply_all_indicators(df.copy()).iloc[-1]
+    latest = state.latest()
+
+    for col, value in latest.items():
+        if col in WINDOW_COLUMNS:
+            assert value == pytest.approx(expected[col], rel=RTOL, nan_ok=True), col
+        else:
+            np.testing.assert_equal(value, float(expected[col]), err_msg=col)
+
+
+def _assert_criteria_match(state, df):
+    expected = evaluate_all_criteria(apply_all_indicators(df.copy()))
+    got = evaluate_state(state)
+
+    for name in expected:
+        assert got[name]["status"] == expected[name]["status"], name
+        assert got[name]["norm"] == pytest.approx(expected[name]["norm"], rel=RTOL), name
+
+
+# ------------------------------------------------------------
+# IndicatorState
+# ------------------------------------------------------------
+@pytest.mark.parametrize("n_bars", [5, 30, 250, 500])
+@pytest.mark.parametrize("seed", range(3))
+def test_from_frame_matches_apply_all_indicators(n_bars, seed):
+    df = make_ohlcv(n_bars, seed=seed)
+    state = IndicatorState.from_frame(df)
+
+    _assert_latest_matches(state, df)
+    _assert_criteria_match(state, df)
+
+
+def test_volume_gaps_follow_pandas():
+    df = make_ohlcv(300, seed=7)
+    df.iloc[[100, 290], df.columns.get_loc("Volume")] = np.nan
+    df.iloc[150, df.columns.get_loc("High")] = df["Low"].iloc[150]
+
+    _assert_latest_matches(IndicatorState.from_frame(df), df)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_intraday_updates_match_full_recompute(seed):
+    df = make_ohlcv(460, seed=seed)
+    rng = np.random.default_rng(seed)
+    state = IndicatorState.from_frame(df.iloc[:400])
+
+    # 60 pregões, cada um com 26 revisões do candle em formação
+    for i in range(400, 460):
+        final = _bar(df.iloc[i])
+        state.update({c: v * rng.uniform(0.95, 1.05) for c, v in final.items()})
+        for _ in range(26):
+            state.replace_last({c: v * rng.uniform(0.95, 1.05) for c, v in final.items()})
+        state.replace_last(final)
+
+    assert len(state) == len(df)
+    _assert_latest_matches(state, df)
+    _assert_criteria_match(state, df)
+
+
+# ------------------------------------------------------------
+# IndicatorStates (sincronização entre ciclos)
+# ------------------------------------------------------------
+def test_sync_is_incremental_within_the_day():
+    history = _dated(make_ohlcv(400, seed=3))
+    states = IndicatorStates()
+
+    states.sync("SYN.SA", history.iloc[:-2])
+
+    # candle em formação revisado + 2 candles novos
+    live = history.copy()
+    live.iloc[-3, live.columns.get_loc("Close")] *= 1.01
+    state = states.sync("SYN.SA", live)
+
+    assert states.stats == {"seeded": 1, "incremental": 1}
+    assert len(state) == len(live)
+    _assert_latest_matches(state, live)
+
+
+def test_sync_reseeds_when_the_window_slides():
+    history = _dated(make_ohlcv(400, seed=4))
+    states = IndicatorStates()
+
+    states.sync("SYN.SA", history.iloc[:-1])
+    state = states.sync("SYN.SA", history.iloc[1:])      # dia seguinte: 2y deslizou
+
+    assert states.stats == {"seeded": 2, "incremental": 0}
+    _assert_latest_matches(state, history.iloc[1:])
+
+
+def test_intraday_cycle_matches_run_cycle(monkeypatch):
+    universe = {t: _dated(df) for t, df in make_universe(40, n_bars=300).items()}
+
+    def _get_universe_data(tickers, chunk_size=None, throttle=None):
+        return {t: universe[t].copy() for t in tickers}, {}
+
+    monkeypatch.setattr(bp_runner, "load_universe", lambda: list(universe))
+    monkeypatch.setattr(bp_runner, "get_universe_data", _get_universe_data)
+    monkeypatch.setattr(bp_runner, "export_cycle", lambda metrics: None)
+
+    expected = bp_runner.run_cycle(score_workers=0)
+    states = IndicatorStates()
+    first = bp_runner.run_intraday_cycle(states=states)
+    again = bp_runner.run_intraday_cycle(states=states)
+
+    assert states.stats == {"seeded": 40, "incremental": 40}
+    for out in (first, again):
+        assert list(out["raw_results"]) == list(expected["raw_results"])
+        for ticker, info in out["raw_results"].items():
+            assert info["score"] == expected["raw_results"][ticker]["score"], ticker
+            assert info["fs"] == pytest.approx(expected["raw_results"][ticker]["fs"], rel=RTOL), ticker
+        assert [a["ticker"] for a in out["top_assets"]] == [a["ticker"] for a in expected["top_assets"]]
+        for got, exp in zip(out["top_assets"], expected["top_assets"]):
+            # FS entra nas distâncias do setup → mesma tolerância
+            assert got["trade"] == pytest.approx(exp["trade"], rel=RTOL), got["ticker"]
@@ -1 +1,234 @@
+# bp/tests/test_indicators.py
+# -*- coding: utf-8 -*-
 
+"""
+Equivalência dos caminhos rápidos de indicadores com as versões
+originais: force_1d, OBV/AD (e os incrementais) e o engine colunar do
+universo × apply_all_indicators por ticker.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from bp.benchmarks.fixtures import SHAPES, make_ohlcv, make_shape
+from bp.core.indicators import (
+    apply_all_indicators,
+    calc_ad_line,
+    calc_atr_pct,
+    calc_ma,
+    calc_obv,
+    calc_rsi,
+    calc_volume_deviation,
+    calc_volume_mm14,
+    calc_vwap,
+    extend_ad_line,
+    extend_obv,
+    force_1d,
+    last_cumulative,
+    normalize_ohlcv,
+)
+from bp.core.universe_engine import INDICATOR_COLUMNS, apply_universe_indicators
+
+
+# ------------------------------------------------------------
+# VERSÕES ORIGINAIS (laço por elemento)
+# ------------------------------------------------------------
+def loop_force_1d(series):
+    if isinstance(series, pd.DataFrame):
+        series = series.iloc[:, 0]
+
+    cleaned = []
+    for x in series:
+        if isinstance(x, (list, tuple, np.ndarray)):
+            cleaned.append(x[0] if len(x) > 0 else np.nan)
+        else:
+            cleaned.append(x)
+
+    cleaned = pd.to_numeric(cleaned, errors="coerce")
+    return pd.Series(cleaned, index=series.index)
+
+
+def loop_obv(df):
+    close = pd.Series(df["Close"].values.flatten(), index=df.index)
+    volume = pd.Series(df["Volume"].values.flatten(), index=df.index)
+    direction = close.diff().apply(lambda x: 1 if x > 0 else (-1 if x < 0 else 0))
+    return (direction * volume).cumsum()
+
+
+def loop_ad(df):
+    high, low, close, volume = (force_1d(df[c]) for c in ("High", "Low", "Close", "Volume"))
+    spread = (high - low).replace(0, np.nan)
+    clv = (((close - low) - (high - close)) / spread).fillna(0)
+    return (clv * volume).cumsum()
+
+
+def _messy_ohlcv(n_bars=300, seed=0):
+    """
+    Candles com os casos de borda: fechamento repetido, NaN no meio,
+    candle sem amplitude (High == Low) e volume zero.
+    """
+    df = make_ohlcv(n_bars, seed=seed)
+    df.iloc[50, df.columns.get_loc("Close")] = df["Close"].iloc[49]
+    df.iloc[[80, 81], df.columns.get_loc("Close")] = np.nan
+    df.iloc[120, df.columns.get_loc("Volume")] = np.nan
+    df.iloc[150, df.columns.get_loc("High")] = df["Low"].iloc[150]
+    df.iloc[200, df.columns.get_loc("Volume")] = 0.0
+    return df
+
+
+# ------------------------------------------------------------
+# force_1d
+# ------------------------------------------------------------
+@pytest.mark.parametrize("shape", SHAPES)
+def test_force_1d_matches_loop(shape):
+    df = make_shape(make_ohlcv(200, seed=1), shape)
+    for col in ("Open", "High", "Low", "Close", "Volume"):
+        pd.testing.assert_series_equal(force_1d(df[col]), loop_force_1d(df[col]), check_names=False)
+
+
+@pytest.mark.parametrize("values, dtype", [
+    ([1, 2, 3], "int64"),
+    ([1.5, np.nan, 3.0], "float64"),
+    ([[1.0], [], (2.0, 9.0), np.array([3.0]), None, "4.5", "x", 7], object),
+    (["1", "2", "3"], object),
+    ([], object),
+])
+def test_force_1d_edge_cells_match_loop(values, dtype):
+    series = pd.Series(values, dtype=dtype)
+    pd.testing.assert_series_equal(force_1d(series), loop_force_1d(series))
+
+
+def test_force_1d_fast_path_returns_numeric_column_as_is():
+    series = make_ohlcv(50)["Close"]
+    assert force_1d(series) is series
+
+
+# ------------------------------------------------------------
+# OBV / AD
+# ------------------------------------------------------------
+@pytest.mark.parametrize("seed", range(4))
+def test_obv_ad_match_loop(seed):
+    df = _messy_ohlcv(seed=seed)
+    out = calc_ad_line(calc_obv(df.copy()))
+
+    pd.testing.assert_series_equal(out["OBV"], loop_obv(df), check_names=False)
+    pd.testing.assert_series_equal(out["AD"], loop_ad(df), check_names=False)
+
+
+@pytest.mark.parametrize("n_new", [1, 3, 40])
+def test_extend_obv_ad_match_full_recompute(n_new):
+    df = _messy_ohlcv(seed=5)
+    old, new = df.iloc[:-n_new], df.iloc[-n_new:]
+    full = calc_ad_line(calc_obv(df.copy()))
+    prev = calc_ad_line(calc_obv(old.copy()))
+
+    obv = extend_obv(new, last_cumulative(prev["OBV"]), prev["Close"].iloc[-1])
+    ad = extend_ad_line(new, last_cumulative(prev["AD"]))
+
+    pd.testing.assert_series_equal(obv, full["OBV"].iloc[-n_new:], check_names=False)
+    pd.testing.assert_series_equal(ad, full["AD"].iloc[-n_new:], check_names=False)
+
+
+# ------------------------------------------------------------
+# apply_all_indicators × pipeline original (blindagem no df completo)
+# ------------------------------------------------------------
+def loop_apply_all_indicators(df):
+    if df is None or len(df) == 0:
+        return pd.DataFrame()
+    for col in ["Open", "High", "Low", "Close", "Volume"]:
+        if col not in df.columns:
+            return pd.DataFrame()
+
+    df = normalize_ohlcv(df)
+    for period in (9, 21, 50, 200):
+        df = calc_ma(df, period)
+    df = calc_vwap(calc_volume_deviation(calc_volume_mm14(calc_atr_pct(calc_ad_line(calc_obv(calc_rsi(df)))))))
+
+    for col in df.columns:
+        df[col] = loop_force_1d(df[col])
+    if df["Close"].isna().all():
+        return pd.DataFrame()
+
+    df = df.replace([np.inf, -np.inf], np.nan)
+    df = df[df["Close"].notna()]
+    df = df.tail(20)
+    return pd.DataFrame() if len(df) == 0 else df
+
+
+def _edge_frames():
+    inf_close = make_ohlcv(260, seed=12)
+    inf_close.iloc[[-1, -7], inf_close.columns.get_loc("Close")] = [np.inf, -np.inf]
+    nan_tail = _messy_ohlcv(260, seed=13)
+    nan_tail.iloc[-5:, nan_tail.columns.get_loc("Close")] = np.nan
+    all_inf = make_ohlcv(40, seed=14)
+    all_inf["Close"] = np.inf
+    return {
+        "long": make_ohlcv(500, seed=2),
+        "short": make_ohlcv(12, seed=3),
+        "messy": _messy_ohlcv(300, seed=4),
+        "object": make_shape(make_ohlcv(230, seed=10), "object"),
+        "inf_close": inf_close,
+        "nan_tail": nan_tail,
+        "all_inf": all_inf,
+    }
+
+
+@pytest.mark.filterwarnings("ignore:invalid value encountered:RuntimeWarning")   # Close ±inf
+@pytest.mark.parametrize("name", list(_edge_frames()))
+def test_apply_all_indicators_matches_full_frame_cleanup(name):
+    df = _edge_frames()[name]
+    # freq do índice é só metadado: o filtro booleano do df completo a
+    # perde quando há buraco em qualquer ponto do histórico
+    pd.testing.assert_frame_equal(
+        apply_all_indicators(df.copy()), loop_apply_all_indicators(df.copy()), check_freq=False
+    )
+
+
+# ------------------------------------------------------------
+# ENGINE DO UNIVERSO × apply_all_indicators
+# ------------------------------------------------------------
+# médias móveis: sliding_window_view soma em outra ordem que o rolling do
+# pandas (diferença de ~1 ulp); o resto é idêntico
+RTOL = 1e-12
+
+
+def _universe():
+    frames = {f"T{k}.SA": make_ohlcv(n, seed=k) for k, n in enumerate((500, 320, 210, 150, 40))}
+    frames["SUJO.SA"] = _messy_ohlcv(260, seed=9)
+    frames["OBJ.SA"] = make_shape(make_ohlcv(230, seed=10), "object")
+    frames["VAZIO.SA"] = pd.DataFrame()
+    frames["SEM_COL.SA"] = make_ohlcv(100, seed=11).drop(columns=["Volume"])
+    return frames
+
+
+def test_universe_engine_matches_apply_all_indicators():
+    frames = _universe()
+    got = apply_universe_indicators({t: df.copy() for t, df in frames.items()})
+
+    assert list(got) == list(frames)
+    for ticker, df in frames.items():
+        expected = apply_all_indicators(df.copy())
+        frame = got[ticker]
+
+        if expected.empty:
+            assert frame.empty, ticker
+            continue
+
+        assert frame.index.equals(expected.index), ticker
+        assert set(frame.columns) == set(expected.columns), ticker
+        for col in expected.columns:
+            a = frame[col].to_numpy(dtype="float64")
+            b = expected[col].to_numpy(dtype="float64")
+            if col in INDICATOR_COLUMNS:
+                np.testing.assert_allclose(a, b, rtol=RTOL, atol=0, equal_nan=True, err_msg=f"{ticker} {col}")
+            else:
+                np.testing.assert_array_equal(a, b, err_msg=f"{ticker} {col}")
+
+
+def test_normalize_ohlcv_keeps_numeric_columns():
+    df = make_ohlcv(30)
+    before = {c: df[c] for c in df.columns}
+    out = normalize_ohlcv(df)
+    for c in ("Open", "High", "Low", "Close", "Volume"):
+        assert out[c].equals(before[c])
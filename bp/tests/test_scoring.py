@@ -1 +1,32 @@
+# bp/tests/test_scoring.py
+# -*- coding: utf-8 -*-
 
+"""
+Score vetorizado (calculate_universe_score) × calculate_score por ticker.
+"""
+
+import numpy as np
+
+from bp.core.criteria_engine import CRITERIA_NAMES, criteria_at
+from bp.core.scoring import calculate_score, calculate_universe_score
+
+
+def _random_criteria(n_tickers, seed=0):
+    rng = np.random.default_rng(seed)
+    universe = {}
+    for name in CRITERIA_NAMES:
+        # norms repetidos de propósito (empates de FS entre tickers)
+        norm = rng.choice(np.round(rng.uniform(0.1, 1.0, 8), 2), n_tickers)
+        universe[name] = {"status": rng.random(n_tickers) < 0.5, "norm": norm, "detail": None}
+    return universe
+
+
+def test_universe_score_matches_per_ticker():
+    universe = _random_criteria(200)
+    scores = calculate_universe_score(universe)
+
+    for j in range(200):
+        expected = calculate_score(criteria_at(universe, j))
+        for field in ("score", "fs", "tendencia_norm", "momentum_norm", "volatilidade_norm",
+                      "sinal_norm", "volume_norm"):
+            assert scores[field][j] == expected[field], (j, field)
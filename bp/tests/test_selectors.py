@@ -0,0 +1,172 @@
+# bp/tests/test_selectors.py
+# -*- coding: utf-8 -*-
+
+"""
+Top-N em streaming (TopNSelector / run_cycle) × seleção original
+(sort completo + corte), sobre um universo sintético.
+"""
+
+import pytest
+
+from bp import bp_runner
+from bp.benchmarks.fixtures import make_universe
+from bp.core.criteria_engine import evaluate_all_criteria
+from bp.core.indicators import apply_all_indicators
+from bp.core.scoring import calculate_score
+from bp.core.selectors import TopNSelector, select_top_assets
+from bp.core.ticker_score import TickerScore
+from bp.core.trade_engine import generate_trade_setup
+
+N_TICKERS = 60
+
+
+def baseline_select_top_assets(results, score_min=3, top_n=5):
+    """
+    select_top_assets original: setup para todos, sort estável, corte.
+    """
+    scored_assets = []
+    for ticker, info in results.items():
+        if info.get("score", 0) < score_min:
+            continue
+        details = info.get("details", {})
+        df = details.get("df")
+        if df is None or df.empty:
+            continue
+        fs = info.get("fs", 0)
+        trade_setup = generate_trade_setup(df, fs)
+        if trade_setup is None:
+            continue
+        scored_assets.append({
+            "ticker": ticker,
+            "score": info["score"],
+            "fs": fs,
+            "tendencia_norm": details["tendencia"]["norm"],
+            "momentum_norm": details["momentum"]["norm"],
+            "volume_norm": details["volume"]["norm"],
+            "trade": trade_setup,
+        })
+
+    scored_assets.sort(
+        key=lambda x: (-x["fs"], -x["momentum_norm"], -x["tendencia_norm"], -x["volume_norm"])
+    )
+    return scored_assets[:top_n]
+
+
+def _baseline_results(universe):
+    # como no dashboard: score_info com o df de indicadores em details["df"]
+    results = {}
+    for ticker, df in universe.items():
+        df = apply_all_indicators(df)
+        info = calculate_score(evaluate_all_criteria(df))
+        info["details"]["df"] = df
+        results[ticker] = info
+    return results
+
+
+def _summary(top):
+    return [(a["ticker"], a["score"], a["fs"]) for a in top]
+
+
+@pytest.fixture(scope="module")
+def universe():
+    return make_universe(N_TICKERS, n_bars=300)
+
+
+@pytest.fixture
+def fake_scan(monkeypatch, universe):
+    def _get_universe_data(tickers, chunk_size=None, throttle=None):
+        return {t: universe[t].copy() for t in tickers}, {}
+
+    monkeypatch.setattr(bp_runner, "load_universe", lambda: list(universe))
+    monkeypatch.setattr(bp_runner, "get_universe_data", _get_universe_data)
+    monkeypatch.setattr(bp_runner, "export_cycle", lambda metrics: None)
+
+
+@pytest.mark.parametrize("top_n", [1, 5, 12])
+def test_select_top_assets_matches_baseline(universe, top_n):
+    results = _baseline_results(universe)
+
+    expected = baseline_select_top_assets(results, top_n=top_n)
+    got = select_top_assets(results, top_n=top_n)
+
+    assert expected, "universo sintético sem nenhum ativo selecionado"
+    assert _summary(got) == _summary(expected)
+    assert [a["trade"] for a in got] == [a["trade"] for a in expected]
+
+
+def test_streaming_order_does_not_matter(universe):
+    results = _baseline_results(universe)
+    position = {t: i for i, t in enumerate(results)}
+
+    selector = TopNSelector()
+    for ticker in reversed(list(results)):
+        selector.push(ticker, results[ticker], position[ticker])
+
+    assert _summary(selector.snapshot()) == _summary(baseline_select_top_assets(results))
+
+
+def test_run_cycle_top_matches_baseline(universe, fake_scan):
+    expected = baseline_select_top_assets(_baseline_results(universe))
+
+    out = bp_runner.run_cycle(score_workers=0)
+
+    assert expected
+    assert _summary(out["top_assets"]) == _summary(expected)
+    # df remontado do TickerScore → mesmo setup do df original
+    assert [a["trade"] for a in out["top_assets"]] == [a["trade"] for a in expected]
+
+
+def test_run_scan_with_selector_matches_baseline(universe, fake_scan):
+    expected = baseline_select_top_assets(_baseline_results(universe))
+
+    position = {t: i for i, t in enumerate(universe)}
+    selector = TopNSelector()
+    results, falhas = bp_runner.run_scan(
+        list(universe),
+        score_workers=0,
+        keep_frame=True,
+        on_score=lambda t, info: selector.push(t, info, position[t]),
+    )
+
+    assert not falhas
+    assert list(results) == list(universe)
+    assert _summary(selector.snapshot()) == _summary(expected)
+    assert [a["trade"] for a in selector.snapshot()] == [a["trade"] for a in expected]
+
+
+def test_ticker_score_frame_is_exact(universe):
+    df = apply_all_indicators(universe["SYN000.SA"])
+    packed = TickerScore(calculate_score(evaluate_all_criteria(df)), df)
+
+    frame = packed.details["df"]
+    numeric = [c for c in df.columns if c in frame.columns]
+    assert (frame[numeric].to_numpy() == df[numeric].to_numpy(dtype="float64")).all()
+
+
+def test_ticker_score_without_frame_has_no_df(universe):
+    df = apply_all_indicators(universe["SYN000.SA"])
+    info = calculate_score(evaluate_all_criteria(df))
+    info["details"] = {k: v for k, v in info["details"].items() if k != "df"}
+    packed = TickerScore(info)
+
+    assert "df" not in packed.details
+    assert packed.details.get("df") is None
+    assert "df" in TickerScore(info, df).details
+
+
+def test_run_scan_records_know_their_ticker(universe, fake_scan):
+    results, _ = bp_runner.run_scan(list(universe), score_workers=0, keep_frame=True)
+    assert [info.ticker for info in results.values()] == list(results)
+
+
+def test_ticker_score_is_a_full_mapping(universe):
+    df = apply_all_indicators(universe["SYN001.SA"])
+    info = calculate_score(evaluate_all_criteria(df))
+    packed = TickerScore(info, df)
+
+    assert list(packed) == list(info)
+    assert len(packed) == len(info)
+    for key, value in packed.items():
+        if key != "details":
+            assert value == info[key], key
+    assert {k: v for k, v in packed["details"].items()} == {k: v for k, v in info["details"].items()}
@@ -0,0 +1,156 @@
+# bp/tests/test_trade_engine.py
+# -*- coding: utf-8 -*-
+
+"""
+Swings vetorizados × laço original de 5 candles, e setups em lote
+(generate_trade_setups) × setup escalar (generate_trade_setup).
+"""
+
+import math
+
+import numpy as np
+import pytest
+
+from bp.benchmarks.fixtures import make_ohlcv
+from bp.core.indicators import apply_all_indicators
+from bp.core.trade_engine import (
+    _find_last_swing_high,
+    _find_last_swing_low,
+    build_swing_index,
+    generate_trade_setup,
+    generate_trade_setups,
+    last_swing_prices,
+)
+
+FIELDS = ("entrada", "stop", "alvo", "stop_dist_atr", "target_dist_atr", "rr")
+
+
+# ------------------------------------------------------------
+# SWINGS
+# ------------------------------------------------------------
+def loop_last_swing(values, kind, max_lookback, limit=None):
+    """
+    Laço original de _find_last_swing_high / _find_last_swing_low.
+    """
+    n = len(values)
+    if n < 5:
+        return None
+    for i in range(n - 3, max(2, n - max_lookback - 1) - 1, -1):
+        m2, m1, c, p1, p2 = values[i - 2:i + 3]
+        if kind == "high":
+            hit = m2 < m1 < c > p1 > p2 and (limit is None or c >= limit)
+        else:
+            hit = m2 > m1 > c < p1 < p2 and (limit is None or c <= limit)
+        if hit:
+            return float(c)
+    return None
+
+
+def _swing_frames():
+    frames = [make_ohlcv(n, seed=seed) for seed, n in enumerate((3, 5, 6, 40, 90, 300))]
+    with_nan = make_ohlcv(120, seed=7)
+    with_nan.iloc[[10, 60, 115], with_nan.columns.get_loc("High")] = np.nan
+    with_nan.iloc[[20, 100], with_nan.columns.get_loc("Low")] = np.nan
+    flat = make_ohlcv(60, seed=8)
+    flat["High"] = flat["High"].round(0)        # empates (nunca são swing)
+    flat["Low"] = flat["Low"].round(0)
+    return frames + [with_nan, flat]
+
+
+@pytest.mark.parametrize("max_lookback", [1, 5, 20, 80, 500])
+def test_find_last_swing_matches_loop(max_lookback):
+    for k, df in enumerate(_swing_frames()):
+        highs = df["High"].to_numpy(dtype="float64")
+        lows = df["Low"].to_numpy(dtype="float64")
+        close = float(df["Close"].iloc[-1])
+
+        for limit in (None, close, close + 2.0, close - 2.0):
+            swings = build_swing_index(df)
+            assert _find_last_swing_high(df, max_lookback, limit) == loop_last_swing(highs, "high", max_lookback, limit)
+            assert _find_last_swing_low(df, max_lookback, limit) == loop_last_swing(lows, "low", max_lookback, limit)
+            assert _find_last_swing_high(df, max_lookback, limit, swings=swings) == loop_last_swing(highs, "high", max_lookback, limit)
+            assert _find_last_swing_low(df, max_lookback, limit, swings=swings) == loop_last_swing(lows, "low", max_lookback, limit)
+
+
+def _or_none(price):
+    return None if np.isnan(price) else float(price)
+
+
+@pytest.mark.parametrize("max_lookback", [1, 20, 80])
+def test_last_swing_prices_matches_loop(max_lookback):
+    frames = _swing_frames()
+    n_rows = max(len(df) for df in frames)
+    highs = np.full((n_rows, len(frames)), np.nan)
+    lows = np.full((n_rows, len(frames)), np.nan)
+    limits = np.empty(len(frames))
+    for j, df in enumerate(frames):
+        highs[n_rows - len(df):, j] = df["High"].to_numpy()
+        lows[n_rows - len(df):, j] = df["Low"].to_numpy()
+        limits[j] = df["Close"].iloc[-1]
+
+    for limit in (None, limits):
+        got_high = last_swing_prices(highs, "high", limit, max_lookback)
+        got_low = last_swing_prices(lows, "low", limit, max_lookback)
+        for j, df in enumerate(frames):
+            lim = None if limit is None else limit[j]
+            expected_high = loop_last_swing(df["High"].to_numpy(dtype="float64"), "high", max_lookback, lim)
+            expected_low = loop_last_swing(df["Low"].to_numpy(dtype="float64"), "low", max_lookback, lim)
+            assert _or_none(got_high[j]) == expected_high
+            assert _or_none(got_low[j]) == expected_low
+
+
+# ------------------------------------------------------------
+# SETUPS EM LOTE
+# ------------------------------------------------------------
+def _frames():
+    frames = {}
+    for seed in range(12):
+        df = apply_all_indicators(make_ohlcv(300, seed=seed))
+        # direção variada: LONG, SHORT e sem operação (norms discordantes)
+        if seed % 3 == 1:
+            df["tendencia_norm"] = 0.2
+            df["momentum_norm"] = 0.3
+        elif seed % 3 == 2:
+            df["tendencia_norm"] = 0.7
+            df["momentum_norm"] = 0.1 if seed % 2 else 0.9
+        if seed == 5:
+            df["ATR"] = 0.0            # fallback de ATR
+        frames[f"T{seed:02d}.SA"] = df
+    frames["CURTO.SA"] = apply_all_indicators(make_ohlcv(300, seed=99)).tail(3)
+    frames["VAZIO.SA"] = None
+    return frames
+
+
+@pytest.mark.parametrize("fs", [None, float("nan"), 0.0, 1.3, 3.0, 5.0, 7.5, -1.0])
+def test_batch_equals_scalar(fs):
+    frames = _frames()
+    fs_scores = {t: fs for t in frames}
+
+    batch = generate_trade_setups(frames, fs_scores)
+
+    for ticker, df in frames.items():
+        expected = generate_trade_setup(df, fs)
+        got = batch[ticker]
+        if expected is None:
+            assert got is None, ticker
+            continue
+        assert got["operacao"] == expected["operacao"], ticker
+        for field in FIELDS:
+            a, b = got[field], expected[field]
+            assert (math.isnan(a) and math.isnan(b)) or a == b, (ticker, field, a, b)
+
+
+def test_batch_mixed_fs():
+    frames = _frames()
+    rng = np.random.default_rng(1)
+    fs_scores = {t: float(rng.uniform(0, 5)) for t in frames}
+    fs_scores["T00.SA"] = None
+    fs_scores["T03.SA"] = float("nan")
+
+    batch = generate_trade_setups(frames, fs_scores)
+
+    for ticker, df in frames.items():
+        expected = generate_trade_setup(df, fs_scores[ticker])
+        assert (batch[ticker] is None) == (expected is None), ticker
+        if expected is not None:
+            assert batch[ticker] == expected, ticker
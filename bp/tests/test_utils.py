@@ -0,0 +1,101 @@
+# bp/tests/test_utils.py
+# -*- coding: utf-8 -*-
+
+"""
+Gravação atômica compartilhada (atomic_write) e exportação de métricas
+com gravações simultâneas.
+"""
+
+import json
+import os
+import threading
+
+from bp.core.metrics import CycleMetrics, MetricsRegistry
+from bp.core.utils import atomic_write
+
+
+def _run_all(targets):
+    threads = [threading.Thread(target=t) for t in targets]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+def test_concurrent_atomic_writes_never_mix(tmp_path):
+    path = str(tmp_path / "sub" / "out.json")
+    payloads = [{"writer": k, "rows": list(range(2000))} for k in range(8)]
+
+    _run_all([
+        (lambda p=p: atomic_write(path, lambda f: json.dump(p, f), text=True))
+        for p in payloads
+    ])
+
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f) in payloads
+    assert os.listdir(tmp_path / "sub") == ["out.json"]
+
+
+def test_failed_write_keeps_the_old_file(tmp_path):
+    path = str(tmp_path / "out.bin")
+    atomic_write(path, lambda f: f.write(b"old"))
+
+    def broken(f):
+        f.write(b"half")
+        raise RuntimeError("disco cheio")
+
+    try:
+        atomic_write(path, broken)
+    except RuntimeError:
+        pass
+
+    with open(path, "rb") as f:
+        assert f.read() == b"old"
+    assert os.listdir(tmp_path) == ["out.bin"]
+
+
+def test_concurrent_metrics_exports(tmp_path):
+    json_path = str(tmp_path / "bp_fenix.json")
+    prom_path = str(tmp_path / "bp_fenix.prom")
+
+    registries = []
+    for k in range(6):
+        registry = MetricsRegistry()
+        cycle = CycleMetrics(f"U{k}")
+        cycle.observe("download", 0.1 * (k + 1), tickers=10)
+        registry.record(cycle.finish(tickers=10))
+        registries.append(registry)
+
+    _run_all([(lambda r=r: r.export(json_path, prom_path)) for r in registries])
+
+    with open(json_path, encoding="utf-8") as f:
+        assert json.load(f)["last_cycle"]["label"] in {f"U{k}" for k in range(6)}
+    assert sorted(os.listdir(tmp_path)) == ["bp_fenix.json", "bp_fenix.prom"]
+
+
+def test_download_timing_splits_lock_wait_from_fetch(monkeypatch):
+    import time
+
+    from bp.core import utils
+
+    monkeypatch.setattr(utils.yf, "download", lambda *a, **kw: time.sleep(0.05))
+    queued = {}
+
+    def worker():
+        with utils.download_timing() as timing:
+            utils.yf_download("X")
+        queued.update(timing)
+
+    with utils.download_timing() as own:
+        with utils.YF_DOWNLOAD_LOCK:
+            thread = threading.Thread(target=worker)
+            thread.start()
+            time.sleep(0.1)                 # o worker fica na fila do lock
+        thread.join()
+        utils.yf_download("Y")              # esta thread: sem fila
+
+    assert queued["wait"] >= 0.09
+    assert 0.05 <= queued["fetch"] < 0.1
+    # cada bloco mede só a própria thread
+    assert own["wait"] < 0.05
+    assert 0.05 <= own["fetch"] < 0.1
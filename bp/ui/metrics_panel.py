@@ -0,0 +1,108 @@
+# bp/ui/metrics_panel.py
+# -*- coding: utf-8 -*-
+
+"""
+Painel de métricas do ciclo BP-Fênix (página administrativa).
+
+Lê o snapshot que o ciclo grava em data/metrics/bp_fenix.json — o ciclo
+roda no processo do scheduler, o dashboard só lê o arquivo.
+"""
+
+import pandas as pd
+import streamlit as st
+
+from bp.core.metrics import JSON_PATH, PROM_PATH, load_snapshot
+from bp.core.scan_worker import format_timestamp
+
+STAGE_LABELS = {
+    "universe": "Universo",
+    "download": "Download",
+    "download_wait": "Fila do download",
+    "indicators": "Indicadores",
+    "criteria": "Critérios",
+    "scoring": "Score",
+    "selection": "Seleção",
+    "scan": "Varredura (total)",
+    "ciclo": "Ciclo (total)",
+}
+
+
+def _ms(value):
+    return None if value is None else value * 1000
+
+
+def show_metrics_panel(path=JSON_PATH):
+    st.subheader("⏱️ Métricas do Ciclo BP-Fênix")
+
+    snapshot = load_snapshot(path)
+    if not snapshot or not snapshot.get("last_cycle"):
+        st.info("Nenhum ciclo instrumentado ainda — as métricas aparecem após o primeiro ciclo.")
+        return
+
+    last = snapshot["last_cycle"]
+    totals = last.get("totals", {})
+
+    st.caption(
+        f"Último ciclo ({last.get('label')}) em {format_timestamp(last.get('finished_at'))} — "
+        f"{snapshot.get('cycles_total', 0)} ciclo(s) desde o início do processo"
+    )
+
+    c1, c2, c3, c4, c5 = st.columns(5)
+    c1.metric("Duração", f"{last.get('duration') or 0:.1f}s")
+    c2.metric("Tickers", totals.get("tickers", 0))
+    c3.metric("Pontuados", totals.get("scored", 0))
+    c4.metric("Falhas", totals.get("failed", 0))
+    c5.metric("Selecionados", totals.get("selected", 0))
+
+    # --- estágios: segundos no ciclo + latência por ticker ---
+    rows = []
+    for stage, seconds in last.get("stage_seconds", {}).items():
+        hist = last.get("ticker_latency", {}).get(stage, {})
+        rows.append({
+            "Estágio": STAGE_LABELS.get(stage, stage),
+            "Segundos no ciclo": seconds,
+            "Tickers": hist.get("count"),
+            "Média/ticker (ms)": _ms(hist.get("mean")),
+            "p50/ticker (≤ ms)": _ms(hist.get("p50")),
+            "p95/ticker (≤ ms)": _ms(hist.get("p95")),
+        })
+    st.markdown("**Estágios do último ciclo**")
+    st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+    st.caption("Indicadores, critérios e score somam o tempo de CPU de todos os workers; "
+               "o download por ticker é a latência do lote dividida pelo tamanho do lote, "
+               "sem a fila (lock do yfinance + limite de ritmo), que aparece à parte.")
+
+    # --- falhas por motivo ---
+    col_a, col_b = st.columns(2)
+    with col_a:
+        st.markdown("**Falhas do último ciclo**")
+        failures = last.get("failures", {})
+        if failures:
+            st.bar_chart(pd.Series(failures, name="tickers"))
+        else:
+            st.write("Nenhuma falha. ✅")
+    with col_b:
+        st.markdown("**Falhas acumuladas (processo)**")
+        total = snapshot.get("failures_total", {})
+        if total:
+            st.dataframe(
+                pd.DataFrame({"Motivo": list(total), "Tickers": list(total.values())}),
+                use_container_width=True, hide_index=True,
+            )
+        else:
+            st.write("—")
+
+    # --- histórico de duração por estágio (todos os ciclos do processo) ---
+    with st.expander("📈 Duração por estágio — todos os ciclos do processo"):
+        rows = [
+            {
+                "Estágio": STAGE_LABELS.get(stage, stage),
+                "Ciclos": hist["count"],
+                "Média (s)": hist["mean"],
+                "p50 (≤ s)": hist["p50"],
+                "p95 (≤ s)": hist["p95"],
+            }
+            for stage, hist in snapshot.get("stage_latency", {}).items()
+        ]
+        st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+        st.caption(f"Exportação Prometheus: `{PROM_PATH}`")
@@ -1,14 +1,12 @@
 import streamlit as st
-import time
 import pandas as pd
 import os
-import requests
+import http_client
 
-from bp.core.data_loader import get_ticker_data, validate_data
-from bp.core.indicators import apply_all_indicators
-from bp.core.criteria_engine import evaluate_all_criteria
-from bp.core.scoring import calculate_score
-from bp.core.selectors import select_top_assets
+from streamlit_autorefresh import st_autorefresh
+
+from bp.core.scan_worker import ScanWorker, format_timestamp
+from bp.core.universe_store import UNIVERSES, get_universe
 from bp.ui.visual_blocks import criteria_block
 from bp.ui.radar_chart import plot_radar
 
@@ -90,7 +88,7 @@ def inserir_ativo_na_supabase(
     try:
         # 1) Ler estado atual existente
         url_get = f"{SUPABASE_URL}/rest/v1/{SUPABASE_TABLE}?k=eq.{STATE_KEY}&select=v"
-        r = requests.get(url_get, headers=_sb_headers(), timeout=15)
+        r = http_client.get(url_get, headers=_sb_headers(), timeout=15)
         r.raise_for_status()
 
         data = r.json()
@@ -127,7 +125,7 @@ def inserir_ativo_na_supabase(
         url_patch = f"{SUPABASE_URL}/rest/v1/{SUPABASE_TABLE}?k=eq.{STATE_KEY}"
         payload = {"v": novo_estado}
 
-        r2 = requests.patch(url_patch, headers=_sb_headers(), json=payload, timeout=15)
+        r2 = http_client.patch(url_patch, headers=_sb_headers(), json=payload, timeout=15)
         r2.raise_for_status()
 
         return True, None
@@ -145,7 +143,7 @@ def limpar_tabela_supabase():
         url = f"{SUPABASE_URL}/rest/v1/{SUPABASE_TABLE}?k=eq.{STATE_KEY}"
         payload = {"v": {"ativos": []}}
 
-        r = requests.patch(url, headers=_sb_headers(), json=payload, timeout=15)
+        r = http_client.patch(url, headers=_sb_headers(), json=payload, timeout=15)
         r.raise_for_status()
         return True, None
     except Exception as e:
@@ -153,11 +151,34 @@ def limpar_tabela_supabase():
 
 
 # ------------------------------------------------------------
-# LOCALIZAÇÃO DO CSV
+# LOCALIZAÇÃO DO CSV (cadastro: nome da empresa e rótulo do índice)
 # ------------------------------------------------------------
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
 CSV_PATH = os.path.join(BASE_DIR, "data", "tickers_ibov.csv")
 
+# rótulo do índice no CSV → universo versionado (bp.core.universe_store)
+UNIVERSE_BY_LABEL = {cfg["csv_label"]: name for name, cfg in UNIVERSES.items()}
+
+
+def tickers_do_indice(df_tickers, indice):
+    """
+    Tickers (sem .SA) de um rótulo do CSV. Índices com universo
+    versionado (IBOV, SMALL CAPS, BDR) vêm de get_universe — composição
+    oficial da B3 —; os demais (ex.: ETF) continuam vindo do CSV.
+    """
+    universe = UNIVERSE_BY_LABEL.get(indice)
+    if universe is not None:
+        tickers = get_universe(universe)
+        if tickers:
+            return [t[:-3] if t.endswith(".SA") else t for t in tickers]
+
+    return (
+        df_tickers[df_tickers["indice"] == indice]["ticker"]
+        .dropna()
+        .unique()
+        .tolist()
+    )
+
 
 # ------------------------------------------------------------
 # CONFIGURAÇÃO DA PÁGINA
@@ -177,54 +198,41 @@ def setup_page():
 
 
 # ------------------------------------------------------------
-# CICLO PRINCIPAL
+# CICLO PRINCIPAL — worker único em segundo plano
 # ------------------------------------------------------------
-def run_full_cycle_with_logs(tickers):
-
-    st.info(f"🔍 Total de ativos carregados: **{len(tickers)}**")
-
-    progress = st.progress(0)
-    status_box = st.status("🚀 Iniciando varredura do BP-Fênix...", expanded=False)
-
-    results = {}
-    total = len(tickers)
-
-    with status_box:
-        st.write("### 📡 LOG DA EXECUÇÃO")
-
-        for i, ticker in enumerate(tickers):
-            ticker_api = ticker + ".SA"
-
-            st.write(f"🔵 **Processando {ticker}...**")
-
-            df = get_ticker_data(ticker_api)
-            if not validate_data(df):
-                st.write(f"⚠️ Dados inválidos para {ticker}. Pulando...")
-                continue
-
-            df = apply_all_indicators(df)
-            if df is None or df.empty:
-                st.write(f"⚠️ Indicadores retornaram dataframe vazio para {ticker}.")
-                continue
-
-            criteria = evaluate_all_criteria(df)
-            score_info = calculate_score(criteria)
+PROGRESS_REFRESH_MS = 2000
 
-            score_info["details"]["df"] = df
-            results[ticker] = score_info
 
-            st.write(f"✔️ Score de {ticker}: **{score_info['score']} / 5**")
-            st.write("—")
+@st.cache_resource
+def get_scan_worker():
+    """
+    Um worker por processo, compartilhado entre todas as sessões:
+    cliques simultâneos no mesmo universo viram UMA varredura.
+    """
+    return ScanWorker()
 
-            progress.progress((i + 1) / total)
-            time.sleep(0.10)
 
-        st.success("🟩 Varredura concluída!")
+def show_scan_progress(worker, key):
+    """
+    Barra de progresso da varredura em andamento (a página só faz polling).
+    """
+    info = worker.progress()
+
+    if info["status"] == "running":
+        total = max(info["total"], 1)
+        st.progress(
+            min(info["done"] / total, 1.0),
+            text=(
+                f"🚀 Varredura {info['key']}: {info['done']}/{info['total']} ativos processados"
+                f" ({info.get('failed', 0)} falhas)…"
+            ),
+        )
+        if info.get("pending"):
+            st.caption(f"Na fila: {info['pending']}")
+        st_autorefresh(interval=PROGRESS_REFRESH_MS, key="bp-scan-progress")
 
-    return {
-        "raw_results": results,
-        "top_assets": select_top_assets(results)
-    }
+    elif info["status"] == "error" and info["key"] == key:
+        st.error(f"Falha na última varredura: {info['error']}")
 
 
 # ------------------------------------------------------------
@@ -374,11 +382,30 @@ O **Fênix Strength (FS)** é a média normalizada dos 5 pilares:
 # TABELA COMPLETA
 # ------------------------------------------------------------
 def show_results_table(results):
+    from bp.core.trade_engine import generate_trade_setups
+
+    # setups de TODOS os tickers pontuados em uma única passada vetorizada
+    frames = {
+        ticker: item.get("details", {}).get("df")
+        for ticker, item in results.items()
+    }
+    setups = generate_trade_setups(
+        {t: df for t, df in frames.items() if df is not None},
+        {t: item.get("fs") for t, item in results.items()},
+    )
+
     rows = []
     for ticker, item in results.items():
+        trade = setups.get(ticker)
         rows.append({
             "Ticker": ticker,
             "Score": item["score"],
+            "FS": round(item.get("fs", 0), 2),
+            "Operação": trade["operacao"] if trade else "—",
+            "Entrada": round(trade["entrada"], 2) if trade else None,
+            "Stop": round(trade["stop"], 2) if trade else None,
+            "Alvo": round(trade["alvo"], 2) if trade else None,
+            "R/R": round(trade["rr"], 2) if trade else None,
             "Passaram": ", ".join(item["passed"]),
             "Falharam": ", ".join(item["failed"]),
         })
@@ -410,19 +437,11 @@ def render_dashboard():
     # --- Seleção dos tickers ---
     if indice_escolhido == "TODOS":
         # junta todos os índices
-        tickers_filtrados = (
-            df_tickers["ticker"]
-            .dropna()
-            .unique()
-            .tolist()
-        )
+        tickers_filtrados = list(dict.fromkeys(
+            t for indice in indices[1:] for t in tickers_do_indice(df_tickers, indice)
+        ))
     else:
-        tickers_filtrados = (
-            df_tickers[df_tickers["indice"] == indice_escolhido]["ticker"]
-            .dropna()
-            .unique()
-            .tolist()
-        )
+        tickers_filtrados = tickers_do_indice(df_tickers, indice_escolhido)
     
     st.sidebar.markdown(f"**Ativos carregados:** {len(tickers_filtrados)}")
 
@@ -436,20 +455,30 @@ def render_dashboard():
             st.sidebar.error(f"Erro: {erro}")
 
     # --- BOTÃO RODAR ---
+    worker = get_scan_worker()
+
     if st.button("🌀 Rodar Varredura Agora"):
-        with st.spinner("Executando ciclo do BP-Fênix..."):
-            output = run_full_cycle_with_logs(tickers_filtrados)
+        estado = worker.request_scan(indice_escolhido, tickers_filtrados)
+        if estado == "joined":
+            st.info("Já existe uma varredura deste índice em andamento — acompanhando.")
+        elif estado == "queued":
+            st.info("Outra varredura está rodando — esta entra logo em seguida.")
 
-        st.session_state["fenix_output"] = output
-        st.success("Ciclo concluído!")
+    show_scan_progress(worker, indice_escolhido)
 
     # --- MOSTRAR RESULTADOS OU AVISO ---
-    output = st.session_state.get("fenix_output", None)
+    output = worker.latest(indice_escolhido)
 
     if not output:
-        st.info("◀️ Escolha um índice no sidebar e clique no botão acima para iniciar a varredura.")
+        if not worker.is_running():
+            st.info("◀️ Escolha um índice no sidebar e clique no botão acima para iniciar a varredura.")
         return
 
+    st.caption(
+        f"🕒 Snapshot de {format_timestamp(output['finished_at'])} — "
+        f"{len(output['raw_results'])}/{output['total']} ativos pontuados"
+    )
+
 
 
     # --- TOP ASSETS ---
@@ -461,8 +490,9 @@ def render_dashboard():
     else:
         for asset in output["top_assets"]:
     
-            # Nome da empresa
-            nome_empresa = df_tickers[df_tickers["ticker"] == asset["ticker"]]["nome"].values[0]
+            # Nome da empresa (ativo novo na B3 pode ainda não estar no CSV)
+            nomes = df_tickers[df_tickers["ticker"] == asset["ticker"]]["nome"].values
+            nome_empresa = nomes[0] if len(nomes) else asset["ticker"]
     
             # Valor FS
             fs_value = asset.get("fs", None)
@@ -11,7 +11,7 @@ from fenix_opcoes.operacoes import (
     OperacaoOpcao
 )
 
-import requests
+import http_client
 import os
 
 
@@ -40,7 +40,7 @@ def obter_preco_opcao(symbol: str) -> float:
     url = f"{OPLAB_BASE_URL}/market/options/{symbol}"
 
     try:
-        r = requests.get(url, headers=_headers(), timeout=20)
+        r = http_client.get(url, headers=_headers(), timeout=20)
         r.raise_for_status()
         data = r.json()
 
@@ -1,4 +1,4 @@
-import requests
+import http_client
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
@@ -22,7 +22,7 @@ def enviar_telegram(text: str):
         "disable_web_page_preview": True
     }
 
-    resp = requests.post(url, json=payload, timeout=10)
+    resp = http_client.post(url, json=payload, timeout=10)
 
     print("=== DEBUG TELEGRAM ===")
     print("Status:", resp.status_code)
@@ -1,4 +1,4 @@
-import requests
+import http_client
 from datetime import datetime
 from typing import Dict, Any, List
 
@@ -57,7 +57,7 @@ def _row_to_operacao(row: Dict[str, Any]) -> OperacaoOpcao:
 def carregar_operacoes_abertas() -> List[OperacaoOpcao]:
     params = {"status": "eq.aberta"}
 
-    resp = requests.get(REST_ENDPOINT, headers=HEADERS, params=params).json()
+    resp = http_client.get(REST_ENDPOINT, headers=HEADERS, params=params).json()
 
     if not resp:
         return []
@@ -76,7 +76,7 @@ def inserir_operacao(data: Dict[str, Any]) -> str:
     headers = HEADERS.copy()
     headers["Prefer"] = "return=representation"
 
-    resp = requests.post(REST_ENDPOINT, headers=headers, json=data)
+    resp = http_client.post(REST_ENDPOINT, headers=headers, json=data)
 
     # DEBUG
     print("==== SUPABASE DEBUG (INSERT) ====")
@@ -115,7 +115,7 @@ def atualizar_operacao(op: OperacaoOpcao) -> None:
     }
 
     url = f"{REST_ENDPOINT}?id=eq.{op.id}"
-    requests.patch(url, headers=HEADERS, json=update_data)
+    http_client.patch(url, headers=HEADERS, json=update_data)
 
 
 # ==========================================================
@@ -140,4 +140,4 @@ def encerrar_operacao(op: OperacaoOpcao, preco_saida: float, motivo: str) -> Non
     }
 
     url = f"{REST_ENDPOINT}?id=eq.{op.id}"
-    requests.patch(url, headers=HEADERS, json=update_data)
+    http_client.patch(url, headers=HEADERS, json=update_data)
@@ -0,0 +1,102 @@
+# =========================================================
+# 🌐 CLIENTE HTTP COMPARTILHADO — FÊNIX
+# =========================================================
+"""
+Cliente HTTP único do projeto (Supabase, Oplab, Telegram…), no lugar de
+requests.get/post/patch soltos.
+
+    import http_client
+    r = http_client.get(url, headers=headers, params=params)
+    r = http_client.patch(url, headers=headers, json=payload, timeout=15)
+
+O que muda em relação ao requests "puro":
+    - uma requests.Session por host (esquema + domínio), com pool de
+      conexões keep-alive: a segunda chamada ao mesmo Supabase reaproveita
+      a conexão TCP+TLS em vez de abrir outra
+    - timeout padrão DEFAULT_TIMEOUT (conexão, leitura) em toda chamada
+      que não informar o seu — nenhuma requisição fica pendurada
+    - novas tentativas com backoff exponencial: erro de conexão em
+      qualquer método; leitura/HTTP 429/5xx só em métodos idempotentes
+      (GET/HEAD/PUT/DELETE/OPTIONS), para não duplicar INSERT/PATCH
+    - Accept-Encoding gzip/deflate em todas as sessões
+
+As sessões são compartilhadas por todas as threads do processo (o pool
+do urllib3 é thread-safe); nenhuma chamada do projeto depende de cookies.
+"""
+
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_TIMEOUT = (5, 20)       # segundos: (conexão, leitura)
+POOL_MAXSIZE = 20               # conexões keep-alive por host
+RETRY_TOTAL = 3
+RETRY_BACKOFF = 0.5             # 0.5s, 1s, 2s…
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+_sessions = {}                  # "https://host" → requests.Session
+_lock = threading.Lock()
+
+
+def _new_session():
+    retry = Retry(
+        total=RETRY_TOTAL,
+        connect=RETRY_TOTAL,
+        read=RETRY_TOTAL,
+        status=RETRY_TOTAL,
+        backoff_factor=RETRY_BACKOFF,
+        status_forcelist=RETRY_STATUS,
+        allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,
+        raise_on_status=False,      # última resposta volta ao chamador (raise_for_status decide)
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_MAXSIZE, max_retries=retry)
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["Accept-Encoding"] = "gzip, deflate"
+    return session
+
+
+def session_for(url: str) -> requests.Session:
+    """
+    Sessão (pool keep-alive) do host de `url`, criada na primeira chamada.
+    """
+    parts = urlsplit(url)
+    host = f"{parts.scheme}://{parts.netloc}"
+    session = _sessions.get(host)
+    if session is None:
+        with _lock:
+            session = _sessions.get(host)
+            if session is None:
+                session = _sessions[host] = _new_session()
+    return session
+
+
+def request(method: str, url: str, timeout=DEFAULT_TIMEOUT, **kwargs) -> requests.Response:
+    return session_for(url).request(method, url, timeout=timeout, **kwargs)
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return request("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return request("POST", url, **kwargs)
+
+
+def patch(url: str, **kwargs) -> requests.Response:
+    return request("PATCH", url, **kwargs)
+
+
+def close_all():
+    """
+    Fecha todas as sessões (testes / encerramento do processo).
+    """
+    with _lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
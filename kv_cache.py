@@ -0,0 +1,154 @@
+# =========================================================
+# 🗄️ CACHE DE LEITURAS KV DO SUPABASE — FÊNIX
+# =========================================================
+"""
+Leitura compartilhada do estado dos robôs (tabelas kv_state_* do
+Supabase), usada por todas as páginas de carteira e pelo Dash_Acoes.
+
+    from kv_cache import begin_run, read_kv
+    begin_run()                                   # no topo da página
+    v = read_kv(url, key, "kv_state_curto", "curto_przo_v1")
+
+Duas camadas, ambas chaveadas por (url, tabela, k):
+    - memória da rodada: dentro de UMA execução da página a mesma linha
+      é lida uma única vez (resumo, histórico, cards e load_state_*
+      enxergam o mesmo valor, inclusive a mesma falha — um timeout não
+      se repete a cada chamada)
+    - cache do processo (todas as sessões): linha lida há menos de
+      KV_TTL_SECONDS é servida da memória; leituras simultâneas da mesma
+      linha esperam a requisição em andamento (single flight)
+
+Falhas ficam só na memória da rodada: a próxima rodada tenta de novo.
+Cada chamada recebe uma cópia — quem normaliza o dict (setdefault)
+não altera o cache.
+"""
+
+import copy
+import threading
+import time
+
+import http_client
+
+KV_TTL_SECONDS = 30        # idade máxima de uma linha servida para outra sessão/rodada
+KV_TIMEOUT_SECONDS = 12
+
+
+class KVCache:
+    """
+    Cache de linhas KV com TTL + single flight por chave.
+    Thread-safe; uma instância por processo (ver get_kv_cache).
+    """
+
+    def __init__(self, ttl=KV_TTL_SECONDS, get=http_client.get, clock=time.time):
+        self.ttl = ttl
+        self._get = get
+        self._clock = clock
+
+        self._rows = {}            # (url, tabela, k) → (v, instante da leitura)
+        self._flights = {}         # (url, tabela, k) → lock da requisição em andamento
+        self._lock = threading.Lock()
+        self._run = threading.local()          # memória da rodada (thread do script)
+
+        self.stats = {"requests": 0, "served_from_run": 0, "served_from_cache": 0, "upstream_calls": 0}
+
+    # -----------------------------------------------------
+    def begin_run(self):
+        """
+        Abre uma rodada nova na thread atual (o Streamlit executa cada
+        rodada do script em uma thread): esquece a memória da anterior.
+        """
+        self._run.memo = {}
+
+    def read(self, url, key, tabela, chave_k, timeout=KV_TIMEOUT_SECONDS):
+        """
+        Valor `v` da linha k=chave_k de `tabela` ({} se não houver ou falhar).
+        """
+        if not url or not key:
+            return {}
+
+        ck = (url, tabela, chave_k)
+        memo = getattr(self._run, "memo", None)
+
+        with self._lock:
+            self.stats["requests"] += 1
+            if memo is not None and ck in memo:
+                self.stats["served_from_run"] += 1
+                return copy.deepcopy(memo[ck])
+
+        value = self._shared(ck, key, timeout)
+        if memo is not None:
+            memo[ck] = value
+        return copy.deepcopy(value)
+
+    def _fresh(self, ck):
+        # chamado com self._lock adquirido
+        hit = self._rows.get(ck)
+        if hit is not None and self._clock() - hit[1] < self.ttl:
+            return hit
+        return None
+
+    def _shared(self, ck, key, timeout):
+        with self._lock:
+            hit = self._fresh(ck)
+            if hit is not None:
+                self.stats["served_from_cache"] += 1
+                return hit[0]
+            flight = self._flights.setdefault(ck, threading.Lock())
+
+        with flight:
+            with self._lock:
+                # outra sessão pode ter lido enquanto esperávamos
+                hit = self._fresh(ck)
+                if hit is not None:
+                    self.stats["served_from_cache"] += 1
+                    return hit[0]
+
+            value, ok = self._fetch(ck, key, timeout)
+            if ok:
+                with self._lock:
+                    self._rows[ck] = (value, self._clock())
+            return value
+
+    # -----------------------------------------------------
+    def _fetch(self, ck, key, timeout):
+        url, tabela, chave_k = ck
+        with self._lock:
+            self.stats["upstream_calls"] += 1
+        try:
+            endpoint = f"{url}/rest/v1/{tabela}?select=v&k=eq.{chave_k}"
+            headers = {
+                "apikey": key,
+                "Authorization": f"Bearer {key}",
+                "Content-Type": "application/json",
+            }
+            r = self._get(endpoint, headers=headers, timeout=timeout)
+            r.raise_for_status()
+            data = r.json()
+            return (data[0].get("v", {}) if data else {}) or {}, True
+        except Exception as e:
+            print(f"[!] Falha ao ler {tabela}/{chave_k}: {e}")
+            return {}, False
+
+    def clear(self):
+        with self._lock:
+            self._rows.clear()
+        self._run.memo = {}
+
+
+_CACHE = KVCache()
+
+
+def get_kv_cache() -> KVCache:
+    return _CACHE
+
+
+def begin_run():
+    _CACHE.begin_run()
+
+
+def read_kv(url, key, tabela, chave_k, timeout=KV_TIMEOUT_SECONDS):
+    """
+    Lê o estado de um robô (compartilhado entre leituras da rodada,
+    páginas e sessões).
+    """
+    return _CACHE.read(url, key, tabela, chave_k, timeout)
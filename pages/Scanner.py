@@ -81,7 +81,7 @@ from datetime import datetime, timedelta, date
 
 import numpy as np
 import pandas as pd
-import requests, yfinance as yf
+import http_client, yfinance as yf
 
 import plotly.graph_objects as go
 
@@ -253,7 +253,7 @@ def fetch_candles(symbol: str, days: int = 180) -> pd.DataFrame:
 def fetch_options_snapshot(symbol: str) -> pd.DataFrame:
     url = f"{OPLAB_BASE_URL}/market/options/{symbol}"
     try:
-        r = requests.get(url, headers=_headers(), timeout=45)
+        r = http_client.get(url, headers=_headers(), timeout=45)
         r.raise_for_status()
         raw = r.json()
         data = raw if isinstance(raw, list) else raw.get("data", [])
@@ -1139,7 +1139,7 @@ def obter_underlying_opcao(symbol: str) -> str:
     """
     url = f"{OPLAB_BASE_URL}/market/options/details/{symbol}"
     try:
-        r = requests.get(url, headers=_headers(), timeout=10)
+        r = http_client.get(url, headers=_headers(), timeout=10)
         r.raise_for_status()
         data = r.json()
 
@@ -1189,7 +1189,7 @@ else:
                 # Buscar LAST do endpoint correto /details
                 try:
                     url = f"{OPLAB_BASE_URL}/market/options/details/{symbol}"
-                    r = requests.get(url, headers=_headers(), timeout=10)
+                    r = http_client.get(url, headers=_headers(), timeout=10)
                     r.raise_for_status()
                     d = r.json()
                     last_snap = float(d.get("close", 0) or 0)
@@ -1301,7 +1301,7 @@ def _carregar_operacoes_abertas():
         "indice": "eq.OPCOES",
     }
 
-    resp = requests.get(REST_ENDPOINT, headers=HEADERS, params=params, timeout=20)
+    resp = http_client.get(REST_ENDPOINT, headers=HEADERS, params=params, timeout=20)
     resp.raise_for_status()
     return resp.json()
 
@@ -1313,7 +1313,7 @@ def _atualizar_operacao_supabase(op_id: str, dados: dict):
         return
 
     params = {"id": f"eq.{op_id}"}
-    resp = requests.patch(
+    resp = http_client.patch(
         REST_ENDPOINT,
         headers=HEADERS,
         params=params,
@@ -1331,7 +1331,7 @@ def obter_preco_opcao(symbol: str) -> float | None:
     url = f"{OPLAB_BASE_URL}/market/options/details/{symbol}"
 
     try:
-        r = requests.get(url, headers=_headers(), timeout=10)
+        r = http_client.get(url, headers=_headers(), timeout=10)
         r.raise_for_status()
         data = r.json()
 
@@ -1550,7 +1550,7 @@ def carregar_df_operacoes(status: str) -> pd.DataFrame:
             "order": "created_at.desc",
         }
 
-        resp = requests.get(REST_ENDPOINT, headers=HEADERS, params=params, timeout=20)
+        resp = http_client.get(REST_ENDPOINT, headers=HEADERS, params=params, timeout=20)
         resp.raise_for_status()
 
         df = pd.DataFrame(resp.json())
@@ -57,10 +57,10 @@ st.markdown("---")
 # 📊 SEÇÃO ADMIN (EDITAR)
 # =========================================================
 st.subheader("📂 Ferramentas Administrativas")
-st.info("📌 Aqui você insere relatórios, tabelas, gráficos ou controles internos.")
 
-# EXEMPLO DE PLACEHOLDER
-st.write("Área administrativa em construção...")
+from bp.ui.metrics_panel import show_metrics_panel
+
+show_metrics_panel()
 
 st.markdown("---")
 
@@ -68,7 +68,7 @@ import os
 import json
 import datetime
 
-import requests
+import http_client
 import plotly.graph_objects as go
 from streamlit_autorefresh import st_autorefresh
 from zoneinfo import ZoneInfo
@@ -149,7 +149,7 @@ def salvar_lead_dashboard(nome: str, email: str, telefone: str) -> tuple[bool, s
     }
 
     try:
-        r = requests.post(url, json=payload, headers=headers, timeout=10)
+        r = http_client.post(url, json=payload, headers=headers, timeout=10)
         if r.status_code in (200, 201, 204):
             return True, "OK"
         else:
@@ -322,19 +322,7 @@ def load_state_curto() -> RoboState:
     if not url or not key:
         return RoboState([], DEFAULT_PARAMS.copy(), None, [], {})
 
-    try:
-        endpoint = f"{url}/rest/v1/{tabela}?select=v&k=eq.{chave_k}"
-        headers = {
-            "apikey": key,
-            "Authorization": f"Bearer {key}",
-            "Content-Type": "application/json",
-        }
-        r = requests.get(endpoint, headers=headers, timeout=10)
-        r.raise_for_status()
-        data = r.json()
-        raw = (data[0].get("v", {}) if data else {}) or {}
-    except:
-        raw = {}
+    raw = read_kv(url, key, tabela, chave_k, timeout=10)
 
     # --------- NORMALIZAÇÃO CORRIGIDA ---------
     raw.setdefault("ativos", [])
@@ -394,23 +382,7 @@ def load_state_loss_curto() -> RoboState:
     if not url or not key:
         return RoboState([], {}, None, [], {})
 
-    try:
-        endpoint = f"{url}/rest/v1/{tabela}?select=v&k=eq.{chave_k}"
-        headers = {
-            "apikey": key,
-            "Authorization": f"Bearer {key}",
-            "Content-Type": "application/json",
-        }
-
-        r = requests.get(endpoint, headers=headers, timeout=10)
-        r.raise_for_status()
-
-        data = r.json()
-        raw = (data[0].get("v", {}) if data else {}) or {}
-
-    except Exception as e:
-        print("Erro ao ler estado loss curto:", e)
-        raw = {}
+    raw = read_kv(url, key, tabela, chave_k, timeout=10)
 
     # Normalização
     if "ativos" not in raw:
@@ -465,51 +437,12 @@ def load_state_loss_curto() -> RoboState:
 
 
 
-def fetch_quotes_yf(tickers: List[str]) -> Dict[str, float]:
-    """
-    Busca preço intraday. Se não existir, usa preço diário.
-    """
-    if not tickers:
-        return {}
-
-    yf_symbols = [t.upper() + ".SA" for t in tickers]
-    quotes = {}
+# Cotações: serviço único do processo (quote_service.py), compartilhado
+# entre todas as páginas e sessões — 1 requisição por janela de TTL.
+from quote_service import fetch_quotes as fetch_quotes_yf
+from kv_cache import begin_run as begin_kv_run, read_kv
 
-    # 1) tenta intraday 1m
-    try:
-        data = yf.download(
-            tickers=yf_symbols,
-            period="1d",
-            interval="1m",
-            auto_adjust=True,
-            progress=False,
-        )
-    except:
-        data = None
-
-    for t, y in zip(tickers, yf_symbols):
-        px = None
-
-        # tenta pegar intraday
-        try:
-            if isinstance(data.columns, pd.MultiIndex):
-                px = float(data["Close"][y].dropna().iloc[-1])
-            else:
-                px = float(data["Close"].dropna().iloc[-1])
-        except:
-            px = None
-
-        # fallback: usa close diário se intraday falhar
-        if px is None or px == 0:
-            try:
-                d = yf.download(y, period="5d", interval="1d", auto_adjust=True, progress=False)
-                px = float(d["Close"].dropna().iloc[-1])
-            except:
-                px = 0.0
-
-        quotes[t] = px
-
-    return quotes
+begin_kv_run()      # nova rodada: cada linha KV é lida uma vez por execução da página
 
 
 
@@ -577,34 +510,9 @@ def dentro_pregao() -> bool:
 
 
 # -------------------------------------------------
-# HISTÓRICO LOCAL — FUNÇÕES
+# HISTÓRICO LOCAL — disparos_historico.jsonl (ver trigger_history.py)
 # -------------------------------------------------
-HIST_FILE = "disparos_historico.json"
-
-def carregar_historico() -> list:
-    if os.path.exists(HIST_FILE):
-        try:
-            with open(HIST_FILE, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except:
-            return []
-    return []
-
-def salvar_historico(data: list):
-    try:
-        with open(HIST_FILE, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-    except:
-        pass
-
-def contar_disparos_por_robo(historico: list) -> dict:
-    contagem = {}
-    for r in historico:
-        key = r.get("robo")
-        if not key:
-            continue
-        contagem[key] = contagem.get(key, 0) + 1
-    return contagem
+from trigger_history import get_trigger_history
 
 
 OPERACOES_FILE = "operacoes_encerradas.json"
@@ -624,22 +532,8 @@ def salvar_operacoes_encerradas(ops):
 # SUPABASE — leitura estado de robôs (KV)
 # -------------------------------------------------
 def ler_estado_supabase(url: str, key: str, tabela: str, chave_k: str) -> Dict[str, Any]:
-    if not url or not key:
-        return {}
-    try:
-        endpoint = f"{url}/rest/v1/{tabela}?select=v&k=eq.{chave_k}"
-        headers = {
-            "apikey": key,
-            "Authorization": f"Bearer {key}",
-            "Content-Type": "application/json",
-        }
-        r = requests.get(endpoint, headers=headers, timeout=12)
-        r.raise_for_status()
-        data = r.json()
-        v = (data[0].get("v", {}) if data else {}) or {}
-        return v if isinstance(v, dict) else {}
-    except:
-        return {}
+    v = read_kv(url, key, tabela, chave_k)
+    return v if isinstance(v, dict) else {}
 
 # -------------------------------------------------
 # SUPABASE — REST API (para anon key no Streamlit Cloud)
@@ -656,7 +550,7 @@ def supabase_insert(table: str, data: dict):
         "Content-Type": "application/json",
         "Prefer": "return=minimal"
     }
-    return requests.post(url, headers=headers, json=data)
+    return http_client.post(url, headers=headers, json=data)
 
 def supabase_select(table: str, filters: str = ""):
     url = f"{SUPABASE_URL}/rest/v1/{table}{filters}"
@@ -664,7 +558,7 @@ def supabase_select(table: str, filters: str = ""):
         "apikey": SUPABASE_KEY,
         "Authorization": f"Bearer {SUPABASE_KEY}"
     }
-    r = requests.get(url, headers=headers)
+    r = http_client.get(url, headers=headers)
     try:
         return r.json()
     except:
@@ -989,8 +883,9 @@ if secao == "Painel":
     loaded_visual = {}
     sb_cache = {}
     
-    historico_local = carregar_historico()
-    disparos_por_robo = contar_disparos_por_robo(historico_local)
+    historico = get_trigger_history()
+    historico.refresh()
+    disparos_por_robo = historico.counts_by_robo()
     
     for robo in ROBOS:
         state = None
@@ -1062,19 +957,13 @@ if secao == "Painel":
                 "hora": d.get("hora") or datetime.datetime.now(TZ).isoformat(timespec="seconds"),
             }
     
-            # evita duplicar (usa robo + ticker + hora como chave)
-            if not any(
-                r["robo"] == registro["robo"]
-                and r["ticker"] == registro["ticker"]
-                and r["hora"] == registro["hora"]
-                for r in historico_local
-            ):
-                historico_local.append(registro)
+            # evita duplicar (índice robo + ticker + hora)
+            if historico.add(registro):
                 novos_registros += 1
     
-    # salva novamente o histórico consolidado
+    # acrescenta só os disparos novos ao arquivo
     if novos_registros > 0:
-        salvar_historico(historico_local)
+        historico.flush()
         st.success(f"✅ {novos_registros} novos disparos adicionados ao histórico.")
     else:
         st.info("Nenhum novo disparo encontrado. Monitorando ...")
@@ -1083,7 +972,8 @@ if secao == "Painel":
     # -------------------------------------------------
     # 🔁 Recalcula os disparos por robô após atualizar o histórico
     # -------------------------------------------------
-    disparos_por_robo = contar_disparos_por_robo(historico_local)
+    historico_local = historico.records()
+    disparos_por_robo = historico.counts_by_robo()
     
     
     st.markdown("""
@@ -2145,7 +2035,7 @@ if secao == "Relatórios":
             }
     
             try:
-                r = requests.get(endpoint, headers=headers, timeout=10)
+                r = http_client.get(endpoint, headers=headers, timeout=10)
                 r.raise_for_status()
                 data = r.json()
     
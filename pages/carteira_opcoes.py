@@ -86,7 +86,7 @@ if st.button("⬅️ Voltar ao Dashboard Geral"):
 
 
 
-import requests
+import http_client
 
 import os
 import tempfile
@@ -95,7 +95,7 @@ from typing import List, Dict, Any, Optional
 
 
 import pandas as pd
-import requests
+import http_client
 import matplotlib.pyplot as plt
 
 import os
@@ -213,7 +213,7 @@ def carregar_df_operacoes_opcoes(status: Optional[str] = None) -> pd.DataFrame:
         params["status"] = f"eq.{status}"
 
     try:
-        resp = requests.get(REST_ENDPOINT, headers=HEADERS, params=params, timeout=20)
+        resp = http_client.get(REST_ENDPOINT, headers=HEADERS, params=params, timeout=20)
         resp.raise_for_status()
         data = resp.json()
     except Exception as e:
@@ -0,0 +1,231 @@
+# =========================================================
+# 💹 SERVIÇO DE COTAÇÕES COMPARTILHADO — FÊNIX
+# =========================================================
+"""
+Um único serviço de cotações por processo, usado por todas as páginas
+(carteira_ibov, carteira_bdr, carteira_small, Dash_Acoes) e por todas as
+sessões do Streamlit.
+
+    from quote_service import fetch_quotes
+    quotes = fetch_quotes(["PETR4", "VALE3"])   # {ticker: último preço}
+
+Como funciona:
+    - cada pedido registra seus tickers na lista observada do processo
+    - preço em memória com menos de QUOTE_TTL_SECONDS → servido direto
+    - senão, UMA requisição intraday (yf.download 1m) busca de uma vez
+      todos os tickers observados que estão vencidos — os de outras
+      páginas/sessões vêm junto, e a próxima página já encontra tudo
+      em memória
+    - pedidos simultâneos esperam a requisição em andamento (single
+      flight) em vez de abrir outra
+    - tickers sem intraday (fora do pregão: todos) caem no fechamento
+      diário, buscado em UM lote e guardado até o fim do dia (B3)
+
+Com 50 dashboards abertos o custo é ~1 chamada ao Yahoo por janela de
+TTL, em vez de 2 chamadas por página a cada autorefresh.
+"""
+
+import datetime
+import threading
+import time
+from typing import Dict, List
+from zoneinfo import ZoneInfo
+
+import pandas as pd
+
+from bp.core.utils import yf_download
+
+QUOTE_TTL_SECONDS = 60          # idade máxima de um preço servido da memória
+WATCH_TTL_SECONDS = 30 * 60     # ticker sem pedidos há mais tempo sai da lista observada
+MARKET_TZ = ZoneInfo("America/Sao_Paulo")   # "dia" do cache de fechamentos diários
+
+
+def _yf_symbol(ticker: str) -> str:
+    t = ticker.upper()
+    return t if t.endswith(".SA") else t + ".SA"
+
+
+def _last_close(data, symbol):
+    """
+    Último Close válido de `symbol` no retorno do yf.download
+    (MultiIndex com vários tickers ou colunas simples). None se não houver.
+    """
+    try:
+        if isinstance(data.columns, pd.MultiIndex):
+            px = float(data["Close"][symbol].dropna().iloc[-1])
+        else:
+            px = float(data["Close"].dropna().iloc[-1])
+    except Exception:
+        return None
+    return px or None
+
+
+class QuoteService:
+    """
+    Cache de últimos preços com TTL + lote único por janela.
+    Thread-safe; uma instância por processo (ver get_quote_service).
+
+    O download padrão é o yf_download do BP: o ScanWorker do dashboard
+    roda no mesmo processo, e o yfinance não aguenta duas chamadas
+    simultâneas.
+    """
+
+    def __init__(self, ttl=QUOTE_TTL_SECONDS, watch_ttl=WATCH_TTL_SECONDS,
+                 download=yf_download, clock=time.time):
+        self.ttl = ttl
+        self.watch_ttl = watch_ttl
+        self._download = download
+        self._clock = clock
+
+        self._prices = {}          # símbolo → (preço, instante da cotação)
+        self._watch = {}           # símbolo → instante do último pedido
+        self._daily = {}           # símbolo → (fechamento diário, data B3)
+        self._lock = threading.Lock()          # estado (_prices/_watch/_daily)
+        self._fetch_lock = threading.Lock()    # single flight do upstream
+
+        self.stats = {"requests": 0, "served_from_cache": 0, "upstream_calls": 0}
+
+    # -----------------------------------------------------
+    def get_quotes(self, tickers: List[str]) -> Dict[str, float]:
+        """
+        {ticker: último preço} (0.0 quando não há cotação), com as
+        mesmas chaves recebidas.
+        """
+        if not tickers:
+            return {}
+
+        symbols = {t: _yf_symbol(t) for t in tickers}
+        now = self._clock()
+
+        with self._lock:
+            self.stats["requests"] += 1
+            for s in symbols.values():
+                self._watch[s] = now
+            stale = self._stale(symbols.values(), now)
+
+        if stale:
+            self._refresh(now)
+        else:
+            with self._lock:
+                self.stats["served_from_cache"] += 1
+
+        with self._lock:
+            return {t: self._prices.get(s, (0.0, 0))[0] for t, s in symbols.items()}
+
+    def _stale(self, symbols, now):
+        # chamado com self._lock adquirido
+        return [
+            s for s in symbols
+            if s not in self._prices or now - self._prices[s][1] >= self.ttl
+        ]
+
+    def _refresh(self, now):
+        """
+        Atualiza, em UMA requisição, todos os símbolos observados vencidos.
+        """
+        with self._fetch_lock:
+            with self._lock:
+                # outro pedido pode ter atualizado enquanto esperávamos
+                self._watch = {s: t for s, t in self._watch.items() if now - t < self.watch_ttl}
+                stale = self._stale(list(self._watch), self._clock())
+            if not stale:
+                return
+
+            prices = self._fetch(sorted(stale))
+            fetched_at = self._clock()
+
+            with self._lock:
+                for s in stale:
+                    self._prices[s] = (prices.get(s, 0.0), fetched_at)
+
+    # -----------------------------------------------------
+    def _fetch(self, symbols):
+        """
+        Intraday 1m em lote; símbolo sem intraday cai no fechamento diário.
+        """
+        with self._lock:
+            self.stats["upstream_calls"] += 1
+        try:
+            data = self._download(
+                tickers=symbols,
+                period="1d",
+                interval="1m",
+                auto_adjust=True,
+                progress=False,
+            )
+        except Exception as e:
+            print(f"[ERRO] Cotações intraday ({len(symbols)} tickers): {e}")
+            data = None
+
+        prices = {}
+        misses = []
+        for s in symbols:
+            px = _last_close(data, s) if data is not None else None
+            if px is None:
+                misses.append(s)
+            else:
+                prices[s] = px
+
+        # fallback: usa close diário se intraday falhar (todos de uma vez)
+        if misses:
+            prices.update(self._daily_closes(misses))
+        return prices
+
+    def _daily_closes(self, symbols):
+        """
+        Fechamento diário mais recente de cada símbolo: cache do dia ou
+        UMA requisição 5d/1d para todos os que faltam. Sem dado → 0.0.
+        """
+        today = datetime.datetime.fromtimestamp(self._clock(), MARKET_TZ).date()
+
+        with self._lock:
+            closes = {
+                s: self._daily[s][0] for s in symbols
+                if s in self._daily and self._daily[s][1] == today
+            }
+        missing = [s for s in symbols if s not in closes]
+
+        if missing:
+            with self._lock:
+                self.stats["upstream_calls"] += 1
+            try:
+                data = self._download(
+                    tickers=missing,
+                    period="5d",
+                    interval="1d",
+                    auto_adjust=True,
+                    progress=False,
+                )
+            except Exception as e:
+                print(f"[ERRO] Fechamentos diários ({len(missing)} tickers): {e}")
+                data = None
+
+            with self._lock:
+                for s in missing:
+                    px = _last_close(data, s) if data is not None else None
+                    closes[s] = px if px is not None else 0.0
+                    if px is not None:          # falha não fica presa no cache do dia
+                        self._daily[s] = (px, today)
+
+        return closes
+
+    def clear(self):
+        with self._lock:
+            self._prices.clear()
+            self._watch.clear()
+            self._daily.clear()
+
+
+_SERVICE = QuoteService()
+
+
+def get_quote_service() -> QuoteService:
+    return _SERVICE
+
+
+def fetch_quotes(tickers: List[str]) -> Dict[str, float]:
+    """
+    Busca preço intraday (compartilhado entre páginas e sessões).
+    Se não existir, usa preço diário.
+    """
+    return _SERVICE.get_quotes(tickers)
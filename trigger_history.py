@@ -0,0 +1,321 @@
+# =========================================================
+# 📒 HISTÓRICO DE DISPAROS (JSON LINES) — FÊNIX
+# =========================================================
+"""
+Histórico local dos disparos dos robôs, compartilhado pelas páginas de
+carteira e pelo Dash_Acoes — substitui o disparos_historico.json que era
+lido e regravado inteiro (indent=2) a cada refresh.
+
+    from trigger_history import get_trigger_history
+    hist = get_trigger_history()
+    hist.refresh()                       # lê só as linhas novas do arquivo
+    if hist.add(registro):               # O(1): índice (robo, ticker, hora)
+        novos += 1
+    hist.flush()                         # UM append com os registros novos
+    historico_local = hist.records()
+
+Formato: disparos_historico.jsonl, um registro por linha, só cresce por
+append. Na primeira carga, o disparos_historico.json antigo (se existir)
+é migrado para o novo arquivo.
+
+Retenção: registros com "hora" mais antiga que RETENTION_DAYS saem na
+compactação (reescrita atômica: temp exclusivo + rename), feita no máximo
+uma vez por dia quando há algo a descartar. "hora" ilegível nunca é
+descartada.
+
+Vários processos (sessões do Streamlit, robôs) podem usar o mesmo arquivo:
+append, compactação e migração acontecem sob um lock exclusivo de arquivo
+(disparos_historico.jsonl.lock), e cada leitura confere se o arquivo
+aberto ainda é o mesmo já lido (dev/inode, tamanho, quebra de linha antes
+do offset) — se outro processo compactou, recarrega tudo.
+"""
+
+import contextlib
+import datetime
+import json
+import os
+import threading
+from collections import Counter
+
+from bp.core.utils import atomic_write
+
+try:
+    import fcntl
+except ImportError:                 # Windows
+    fcntl = None
+    import msvcrt
+
+HIST_FILE = "disparos_historico.jsonl"
+LEGACY_FILE = "disparos_historico.json"
+RETENTION_DAYS = 180
+
+
+@contextlib.contextmanager
+def _file_lock(path):
+    """
+    Lock exclusivo entre processos (arquivo .lock ao lado do histórico).
+    """
+    with open(path + ".lock", "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def record_key(r):
+    return (r.get("robo"), r.get("ticker"), r.get("hora"))
+
+
+def _parse_hora(hora):
+    try:
+        return datetime.datetime.fromisoformat(str(hora))
+    except (TypeError, ValueError):
+        return None
+
+
+def _is_expired(r, cutoff_aware, cutoff_naive):
+    t = _parse_hora(r.get("hora"))
+    if t is None:
+        return False
+    return t < (cutoff_naive if t.tzinfo is None else cutoff_aware)
+
+
+class TriggerHistory:
+    """
+    Registros em memória + índice de chaves + contagem por robô, em
+    sincronia com o arquivo JSON lines. Thread-safe e seguro entre
+    processos; uma instância por processo (ver get_trigger_history).
+    """
+
+    def __init__(self, path=HIST_FILE, legacy_path=LEGACY_FILE, retention_days=RETENTION_DAYS):
+        self.path = path
+        self.legacy_path = legacy_path
+        self.retention_days = retention_days
+
+        self._records = []
+        self._keys = set()          # (robo, ticker, hora)
+        self._por_robo = Counter()
+        self._pending = []          # adicionados e ainda não gravados
+        self._offset = 0            # bytes do arquivo já lidos
+        self._file_id = None        # (st_dev, st_ino) do arquivo já lido
+        self._compacted_on = None
+        self._lock = threading.Lock()
+
+    # -----------------------------------------------------
+    def refresh(self):
+        """
+        Lê as linhas acrescentadas ao arquivo desde a última leitura
+        (outro processo pode ter gravado). Arquivo trocado (compactado
+        por outro processo) → recarrega tudo.
+        """
+        with self._lock:
+            if not os.path.exists(self.path):
+                with _file_lock(self.path):
+                    if not os.path.exists(self.path):
+                        self._migrate_legacy()
+                if not os.path.exists(self.path):
+                    return
+
+            self._sync()
+            self._maybe_compact()
+
+    def _reset(self):
+        self._records = list(self._pending)
+        self._keys = {record_key(r) for r in self._records}
+        self._por_robo = Counter(r.get("robo") for r in self._records if r.get("robo"))
+        self._offset = 0
+
+    def _sync(self):
+        """
+        Alcança o fim do arquivo. Tudo é lido do MESMO descritor cujo
+        inode é conferido — um rename no meio do caminho não mistura
+        arquivos.
+        """
+        # chamado com self._lock adquirido
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            return
+
+        with f:
+            st = os.fstat(f.fileno())
+            file_id = (st.st_dev, st.st_ino)
+
+            if file_id != self._file_id or st.st_size < self._offset or not self._at_line_start(f):
+                self._reset()
+                self._file_id = file_id
+
+            if st.st_size > self._offset:
+                f.seek(self._offset)
+                self._consume(f.read())
+
+    def _at_line_start(self, f):
+        # o byte antes do offset tem de ser a quebra da última linha lida
+        # (inode reaproveitado por outro arquivo não passa aqui)
+        if self._offset == 0:
+            return True
+        f.seek(self._offset - 1)
+        return f.read(1) == b"\n"
+
+    def _consume(self, data):
+        # linha incompleta no fim (append em andamento) fica para a próxima leitura
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            if not line.strip():
+                continue
+            try:
+                r = json.loads(line)
+            except ValueError:
+                continue
+            if not self._index(r) and self._pending:
+                self._drop_pending(record_key(r))
+        self._offset += end
+
+    def _drop_pending(self, k):
+        # outro processo já gravou o mesmo disparo: o pendente não vai de novo
+        self._pending = [r for r in self._pending if record_key(r) != k]
+
+    def _index(self, r):
+        k = record_key(r)
+        if k in self._keys:
+            return False
+        self._keys.add(k)
+        self._records.append(r)
+        if r.get("robo"):
+            self._por_robo[r["robo"]] += 1
+        return True
+
+    def _migrate_legacy(self):
+        # chamado com self._lock e o lock de arquivo adquiridos
+        if not self.legacy_path or not os.path.exists(self.legacy_path):
+            return
+        try:
+            with open(self.legacy_path, "r", encoding="utf-8") as f:
+                legacy = json.load(f)
+        except Exception as e:
+            print(f"[!] Histórico antigo ilegível ({e}) — começando vazio.")
+            return
+        if not isinstance(legacy, list):
+            return
+
+        migrated = [r for r in legacy if isinstance(r, dict)]
+        self._write_all(migrated)
+        self._file_id = None            # o _sync indexa o arquivo recém-escrito
+        print(f"[OK] {len(migrated)} disparos migrados de {self.legacy_path} para {self.path}.")
+
+    # -----------------------------------------------------
+    def add(self, registro) -> bool:
+        """
+        Acrescenta o registro se (robo, ticker, hora) ainda não existir.
+        Só vai para o disco no flush().
+        """
+        with self._lock:
+            if not self._index(registro):
+                return False
+            self._pending.append(registro)
+            return True
+
+    def flush(self):
+        """
+        Grava os registros pendentes em UM append (sob o lock de arquivo:
+        nenhuma compactação de outro processo no meio). Pendentes cuja
+        chave outro processo já gravou são descartados, não duplicados.
+        """
+        with self._lock:
+            if not self._pending:
+                return
+            try:
+                with _file_lock(self.path):
+                    # o offset passa a apontar para o fim antes do append, e
+                    # pendentes que outro processo já gravou saem da fila
+                    self._sync()
+                    if not self._pending:
+                        return
+                    text = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in self._pending)
+                    with open(self.path, "ab") as f:
+                        f.write(text.encode("utf-8"))
+                        f.flush()
+                        st = os.fstat(f.fileno())
+                    self._file_id = (st.st_dev, st.st_ino)
+                    self._offset = st.st_size
+                self._pending = []
+            except Exception as e:
+                print(f"[ERRO] Falha ao gravar histórico de disparos: {e}")
+
+    # -----------------------------------------------------
+    def _maybe_compact(self):
+        # chamado com self._lock adquirido
+        today = datetime.date.today()
+        if self._compacted_on == today or not self.retention_days:
+            return
+        self._compacted_on = today
+
+        now = datetime.datetime.now(datetime.timezone.utc)
+        cutoff_aware = now - datetime.timedelta(days=self.retention_days)
+        cutoff_naive = cutoff_aware.replace(tzinfo=None)
+
+        def expired(r):
+            return _is_expired(r, cutoff_aware, cutoff_naive)
+
+        if not any(expired(r) for r in self._records):
+            return
+
+        try:
+            with _file_lock(self.path):
+                # appends de outros processos até aqui entram na reescrita
+                self._sync()
+                kept = [r for r in self._records if not expired(r)]
+                pending_keys = {record_key(r) for r in self._pending}
+                self._write_all([r for r in kept if record_key(r) not in pending_keys])
+        except Exception as e:
+            print(f"[ERRO] Falha ao compactar histórico de disparos: {e}")
+            return
+
+        dropped = len(self._records) - len(kept)
+        self._records = kept
+        self._keys = {record_key(r) for r in kept}
+        self._por_robo = Counter(r.get("robo") for r in kept if r.get("robo"))
+        print(f"[OK] Histórico compactado: {dropped} disparos com mais de {self.retention_days} dias removidos.")
+
+    def _write_all(self, records):
+        """
+        Reescreve o arquivo (temp exclusivo + rename) e passa a apontar
+        para o arquivo novo, já lido até o fim.
+        """
+        # chamado com o lock de arquivo adquirido
+        def write(f):
+            for r in records:
+                f.write((json.dumps(r, ensure_ascii=False) + "\n").encode("utf-8"))
+
+        st = atomic_write(self.path, write)
+        self._file_id = (st.st_dev, st.st_ino)
+        self._offset = st.st_size
+
+    # -----------------------------------------------------
+    def records(self) -> list:
+        with self._lock:
+            return list(self._records)
+
+    def counts_by_robo(self) -> dict:
+        with self._lock:
+            return dict(self._por_robo)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._records)
+
+
+_HISTORY = TriggerHistory()
+
+
+def get_trigger_history() -> TriggerHistory:
+    return _HISTORY